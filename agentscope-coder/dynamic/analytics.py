@@ -0,0 +1,291 @@
+"""analytics.py - Sampled log of queries no template matched
+
+Every query that falls through TemplateRetriever.match costs an LLM call.
+MissRecorder keeps a bounded set of clusters of such queries: a query is
+reduced to shingles (normalized words plus CJK bigrams), summarized by a
+MinHash signature and joined to the cluster whose signature it resembles,
+found through LSH bands. Ranked by size, the clusters show which new
+templates would remove the most LLM calls.
+
+The recorder is flushed to a JSONL file, one cluster per line, and reads
+it back on start so counts accumulate across runs.
+"""
+
+import hashlib
+import json
+import logging
+import operator
+import os
+import random
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .normalize import normalize_query, normalize_token
+from .retriever import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+# MinHash signature length; split into NUM_BANDS bands of rows for LSH
+NUM_PERM = 64
+NUM_BANDS = 16
+
+# Estimated Jaccard similarity needed to join a cluster
+SIMILARITY_THRESHOLD = 0.5
+
+# Candidates verified per query, most shared bands first
+MAX_CANDIDATES = 4
+
+# Distinct example queries kept per cluster
+MAX_EXAMPLES = 5
+
+# Share of clusters dropped at once when max_clusters is exceeded
+EVICT_FRACTION = 0.1
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_CJK_RUN_RE = re.compile(r'[\u4e00-\u9fff]+')
+
+
+@dataclass
+class _Cluster:
+    """Misses that look alike"""
+    signature: Tuple[int, ...]
+    count: int = 0
+    # example query -> times seen
+    examples: Dict[str, int] = field(default_factory=dict)
+    first_seen: float = 0.0
+    last_seen: float = 0.0
+
+
+def shingles(query: str) -> List[str]:
+    """Normalized English words and CJK bigrams of a query"""
+    text = query.lower()
+    items = [normalize_token(w) for w in _WORD_RE.findall(text)
+             if len(w) > 1 and w not in STOPWORDS]
+    for run in _CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            items.append(run)
+        items.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return list(dict.fromkeys(items)) or [normalize_query(query)]
+
+
+@lru_cache(maxsize=65536)
+def _shingle_hashes(item: str) -> array:
+    """NUM_PERM independent 32-bit hashes of a shingle, from one SHAKE digest"""
+    return array('I', hashlib.shake_128(item.encode('utf-8')).digest(4 * NUM_PERM))
+
+
+def minhash(items: List[str]) -> Tuple[int, ...]:
+    """MinHash signature of a set of strings"""
+    hashes = [_shingle_hashes(item) for item in items]
+    if len(hashes) == 1:
+        return tuple(hashes[0])
+    return tuple(map(min, *hashes))
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(map(operator.eq, a, b)) / len(a)
+
+
+class MissRecorder:
+    """Sampled, bounded clusters of template misses"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        sample_rate: float = 1.0,
+        max_clusters: int = 1000,
+        flush_interval: float = 60.0,
+        threshold: float = SIMILARITY_THRESHOLD
+    ):
+        """Initialize recorder
+
+        Args:
+            path: JSONL file for flushes (optional; memory only if None).
+                Clusters already in the file are loaded.
+            sample_rate: Fraction of misses recorded
+            max_clusters: Clusters kept; the smallest are evicted
+            flush_interval: Seconds between automatic flushes
+            threshold: Estimated similarity needed to join a cluster
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_clusters = max_clusters
+        self.flush_interval = flush_interval
+        self.threshold = threshold
+        self.evicted = 0
+        self._clusters: Dict[int, _Cluster] = {}
+        # (band, hash of band rows) -> cluster ids
+        self._bands: Dict[Tuple[int, int], set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._random = random.Random()
+        self._last_flush = time.monotonic()
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def record(self, query: str) -> bool:
+        """Record a miss, subject to sampling
+
+        Returns:
+            True if the query was sampled
+        """
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            return False
+
+        example = normalize_query(query)
+        signature = minhash(shingles(query))
+        now = time.time()
+        with self._lock:
+            cluster = self._find(signature)
+            if cluster is None:
+                cluster = self._add(signature, now)
+            cluster.count += 1
+            cluster.last_seen = now
+            if example in cluster.examples or len(cluster.examples) < MAX_EXAMPLES:
+                cluster.examples[example] = cluster.examples.get(example, 0) + 1
+            if len(self._clusters) > self.max_clusters:
+                self._evict()
+
+        if self.path:
+            self._flush_if_due()
+        return True
+
+    def top(self, n: int = 20) -> List[dict]:
+        """Largest clusters first
+
+        Returns:
+            Dicts with count, estimated_misses (count corrected for
+            sampling), share of recorded misses and example queries
+        """
+        return [{k: v for k, v in row.items() if k != "minhash"} for row in self._rows()[:n]]
+
+    def flush(self):
+        """Write all clusters to path, replacing its previous contents"""
+        if not self.path:
+            return
+        with self._flush_lock:
+            self._write()
+
+    def _flush_if_due(self):
+        """Flush once flush_interval has passed, unless another thread is
+        flushing or just did"""
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._write()
+        finally:
+            self._flush_lock.release()
+
+    def _write(self):
+        """Replace the file with the current clusters (caller holds _flush_lock)"""
+        self._last_flush = time.monotonic()
+        rows = self._rows()
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not write miss log %s: %s", self.path, e)
+
+    def close(self):
+        """Flush pending clusters"""
+        self.flush()
+
+    def _rows(self) -> List[dict]:
+        """Clusters as JSON rows, largest first"""
+        with self._lock:
+            clusters = sorted(self._clusters.values(), key=lambda c: (-c.count, -c.last_seen))
+            total = sum(c.count for c in clusters)
+            scale = 1.0 / self.sample_rate if self.sample_rate > 0 else 0.0
+            return [{
+                "count": c.count,
+                "estimated_misses": round(c.count * scale),
+                "share": round(c.count / total, 4),
+                "examples": sorted(c.examples, key=c.examples.get, reverse=True),
+                "first_seen": round(c.first_seen, 3),
+                "last_seen": round(c.last_seen, 3),
+                "minhash": list(c.signature),
+            } for c in clusters]
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, int]]:
+        rows = len(signature) // NUM_BANDS
+        return [(band, hash(signature[band * rows:(band + 1) * rows])) for band in range(NUM_BANDS)]
+
+    def _find(self, signature: Tuple[int, ...]) -> Optional[_Cluster]:
+        """Most similar cluster above the threshold
+
+        Only the candidates sharing the most bands are verified; the
+        number of shared bands already tracks similarity.
+        """
+        candidates = []
+        for key in self._band_keys(signature):
+            ids = self._bands.get(key)
+            if ids:
+                candidates.extend(ids)
+        hits = Counter(candidates)
+        best, best_score = None, self.threshold
+        for cluster_id, _ in hits.most_common(MAX_CANDIDATES):
+            cluster = self._clusters[cluster_id]
+            score = similarity(signature, cluster.signature)
+            if score >= best_score:
+                best, best_score = cluster, score
+        return best
+
+    def _add(self, signature: Tuple[int, ...], now: float) -> _Cluster:
+        cluster_id = self._next_id
+        self._next_id += 1
+        cluster = self._clusters[cluster_id] = _Cluster(signature, first_seen=now, last_seen=now)
+        for key in self._band_keys(signature):
+            self._bands.setdefault(key, set()).add(cluster_id)
+        return cluster
+
+    def _evict(self):
+        """Drop the smallest, least recent clusters"""
+        drop = max(1, int(len(self._clusters) * EVICT_FRACTION))
+        victims = sorted(self._clusters, key=lambda i: (self._clusters[i].count,
+                                                        self._clusters[i].last_seen))[:drop]
+        for cluster_id in victims:
+            cluster = self._clusters.pop(cluster_id)
+            self.evicted += cluster.count
+            for key in self._band_keys(cluster.signature):
+                ids = self._bands.get(key)
+                if ids is not None:
+                    ids.discard(cluster_id)
+                    if not ids:
+                        del self._bands[key]
+
+    def _load(self, path: str):
+        """Restore clusters from a previous flush"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        signature = tuple(int(v) for v in row["minhash"])
+                        count = int(row["count"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    if len(signature) != NUM_PERM:
+                        continue
+                    cluster = self._add(signature, row.get("first_seen", 0.0))
+                    cluster.count = count
+                    cluster.last_seen = row.get("last_seen", 0.0)
+                    cluster.examples = {q: 0 for q in row.get("examples", [])[:MAX_EXAMPLES]}
+        except OSError as e:
+            logger.warning("Could not read miss log %s: %s", path, e)
+        while len(self._clusters) > self.max_clusters:
+            self._evict()
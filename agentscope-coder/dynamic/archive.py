@@ -0,0 +1,213 @@
+"""archive.py - Compressed single-file template archive
+
+Layout of <templates_dir>/templates.tpa:
+
+    MAGIC
+    preset dictionary          raw bytes shared by all entries
+    entry data ...             zlib streams, one per file
+    central directory          zlib-compressed JSON
+    footer                     directory offset, directory length, MAGIC
+
+The central directory maps relative paths ("agents/react_agent/concise.py")
+to (offset, compressed size, size, crc32, content hash). Opening an archive reads only
+the footer and the directory; entries are decompressed one at a time on
+request. Templates repeat a lot of boilerplate (imports, agentscope.init,
+agent construction), so entries are compressed against a shared preset
+dictionary built from lines that occur in several files.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+import weakref
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+ARCHIVE_FILE = "templates.tpa"
+MAGIC = b"TPLARC01"
+_FOOTER = struct.Struct("<QQ8s")
+
+# Files packed from a templates root
+ARCHIVE_SUFFIXES = (".py", ".json")
+
+# zlib only looks back 32 KB, so a larger dictionary is wasted
+MAX_DICT_SIZE = 32 * 1024
+
+
+def content_hash(data: bytes) -> str:
+    """Content fingerprint of a template file (used as its ETag)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def archive_path(templates_dir: str) -> str:
+    """Path of the archive for a templates root"""
+    return os.path.join(templates_dir, ARCHIVE_FILE)
+
+
+def has_archive(templates_dir: str) -> bool:
+    """Check if a templates root ships a compressed archive"""
+    return os.path.exists(archive_path(templates_dir))
+
+
+def collect_files(source_dir: str, suffixes: Tuple[str, ...] = ARCHIVE_SUFFIXES) -> Dict[str, bytes]:
+    """Read files to pack as {relative posix path: bytes}"""
+    files = {}
+    for dirpath, _, filenames in os.walk(source_dir):
+        for name in sorted(filenames):
+            if not name.endswith(suffixes) or name == ARCHIVE_FILE:
+                continue
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            with open(path, 'rb') as f:
+                files[rel] = f.read()
+    return dict(sorted(files.items()))
+
+
+def build_dictionary(files: Iterable[bytes], max_size: int = MAX_DICT_SIZE) -> bytes:
+    """Preset dictionary of lines shared by several files
+
+    Most common lines go last; zlib finds recent dictionary bytes with
+    the shortest distances.
+    """
+    counts = Counter()
+    for data in files:
+        counts.update(set(line.strip() for line in data.splitlines() if len(line.strip()) > 8))
+    shared = [(count * len(line), line) for line, count in counts.items() if count > 1]
+    shared.sort(reverse=True)
+
+    picked, size = [], 0
+    for _, line in shared:
+        if size + len(line) + 1 > max_size:
+            continue
+        picked.append(line)
+        size += len(line) + 1
+    return b"\n".join(reversed(picked))
+
+
+def write_archive(files: Dict[str, bytes], out_path: str, use_dictionary: bool = True) -> Dict[str, int]:
+    """Write files as an archive
+
+    Args:
+        files: {relative posix path: bytes}, e.g. from collect_files()
+        out_path: Archive file; replaced atomically
+        use_dictionary: Compress against a shared preset dictionary
+
+    Returns:
+        Dict[str, int]: Entry count, raw bytes and archive bytes
+    """
+    zdict = build_dictionary(files.values()) if use_dictionary else b""
+    tmp_path = f"{out_path}.tmp"
+    directory = {}
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(zdict)
+        for name, data in files.items():
+            compressor = zlib.compressobj(9, zdict=zdict) if zdict else zlib.compressobj(9)
+            blob = compressor.compress(data) + compressor.flush()
+            directory[name] = [f.tell(), len(blob), len(data), zlib.crc32(data), content_hash(data)]
+            f.write(blob)
+
+        dir_offset = f.tell()
+        dir_blob = zlib.compress(json.dumps(
+            {"dictionary": [len(MAGIC), len(zdict)], "entries": directory},
+            ensure_ascii=False
+        ).encode('utf-8'), 9)
+        f.write(dir_blob)
+        f.write(_FOOTER.pack(dir_offset, len(dir_blob), MAGIC))
+    os.replace(tmp_path, out_path)
+
+    return {
+        "entries": len(files),
+        "raw_bytes": sum(len(data) for data in files.values()),
+        "archive_bytes": os.path.getsize(out_path),
+    }
+
+
+class TemplateArchive:
+    """Read-only view of an archive; entries are decompressed on read()
+
+    The file is closed by close(), or once the archive is garbage collected.
+    """
+
+    def __init__(self, path: str):
+        """Open an archive and read its central directory
+
+        Raises:
+            ValueError: If the file is not a complete archive
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._lock = threading.Lock()
+        try:
+            st = os.fstat(self._file.fileno())
+            self._signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+            size = st.st_size
+            if size < len(MAGIC) + _FOOTER.size:
+                raise ValueError(f"Not a template archive: {path}")
+            self._file.seek(size - _FOOTER.size)
+            dir_offset, dir_length, magic = _FOOTER.unpack(self._file.read(_FOOTER.size))
+            if magic != MAGIC or dir_offset + dir_length > size:
+                raise ValueError(f"Not a template archive: {path}")
+            directory = json.loads(zlib.decompress(self._read(dir_offset, dir_length)))
+        except (zlib.error, json.JSONDecodeError, struct.error) as e:
+            self._file.close()
+            raise ValueError(f"Corrupt template archive {path}: {e}") from e
+        except Exception:
+            self._file.close()
+            raise
+
+        self.entries: Dict[str, List[int]] = directory["entries"]
+        dict_offset, dict_length = directory["dictionary"]
+        self._zdict = self._read(dict_offset, dict_length)
+        self._finalizer = weakref.finalize(self, self._file.close)
+
+    def is_current(self) -> bool:
+        """Check the file at path is still the one that was opened"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return (st.st_ino, st.st_mtime_ns, st.st_size) == self._signature
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def names(self) -> List[str]:
+        """Relative paths of all entries"""
+        return list(self.entries)
+
+    def read(self, name: str) -> bytes:
+        """Decompress one entry
+
+        Raises:
+            KeyError: If the entry does not exist
+            ValueError: If the entry is corrupt
+        """
+        offset, length, size, crc = self.entries[name][:4]
+        blob = self._read(offset, length)
+        decompressor = zlib.decompressobj(zdict=self._zdict) if self._zdict else zlib.decompressobj()
+        try:
+            data = decompressor.decompress(blob) + decompressor.flush()
+        except zlib.error as e:
+            raise ValueError(f"Corrupt entry {name} in {self.path}: {e}") from e
+        if len(data) != size or zlib.crc32(data) != crc:
+            raise ValueError(f"Checksum mismatch for {name} in {self.path}")
+        return data
+
+    def content_hash(self, name: str) -> str:
+        """Content hash of an entry, from the directory when recorded there"""
+        entry = self.entries[name]
+        return entry[4] if len(entry) > 4 else content_hash(self.read(name))
+
+    def close(self):
+        # Under the lock: an in-progress read finishes first
+        with self._lock:
+            self._finalizer()
+
+    def _read(self, offset: int, length: int) -> bytes:
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
@@ -0,0 +1,251 @@
+"""backends.py - LLM backends behind CodeGenerator
+
+A backend turns a prompt into generated text, blocking (call), on an
+event loop (acall) or chunk by chunk (stream). API failures are raised
+as exceptions; CodeGenerator turns them into failed results.
+
+DashScopeBackend talks to DashScope through the dashscope SDK, or the
+pooled async client of llm_client for acall. LocalBackend answers
+offline, deterministically, with canned or templated responses after a
+configurable latency, for benchmarks and load tests of the whole
+generate-parse-validate path.
+"""
+
+import asyncio
+import json
+import re
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+from .errors import LLMGenerationError
+from .llm_client import DASHSCOPE_URL, DEFAULT_CONCURRENCY, AsyncDashScopeClient, has_httpx
+
+DEFAULT_MODEL = "qwen-max"
+
+# Characters per streamed chunk of LocalBackend
+LOCAL_CHUNK_CHARS = 16
+
+_QUERY_RE = re.compile(r'^Generate Python code for: (.*)$', re.MULTILINE)
+_LENGTH_RE = re.compile(r'Code length: (\d+)-\d+ lines')
+
+
+class LLMBackend:
+    """Interface of LLM backends; subclasses implement call()"""
+
+    name = "base"
+    model = ""
+
+    def available(self) -> bool:
+        """Check if the backend is configured (e.g. has credentials)"""
+        return True
+
+    def call(self, prompt: str) -> str:
+        """Generated text for a prompt
+
+        Raises:
+            LLMGenerationError: On an API error
+            ImportError: If the client library is not installed
+        """
+        raise NotImplementedError
+
+    async def acall(self, prompt: str) -> str:
+        """call() for event-loop callers (default: on the loop's executor)"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.call, prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Generated text in chunks as they arrive (default: one chunk)"""
+        yield self.call(prompt)
+
+    async def aclose(self):
+        """Release connections"""
+
+
+class DashScopeBackend(LLMBackend):
+    """DashScope text generation"""
+
+    name = "dashscope"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_connections: int = DEFAULT_CONCURRENCY,
+        url: str = DASHSCOPE_URL
+    ):
+        """Initialize backend
+
+        Args:
+            api_key: DashScope API key
+            model: Model name
+            temperature: Sampling temperature
+            max_connections: Pooled connections of acall (needs httpx;
+                without it acall runs the SDK call on a worker thread)
+            url: Text generation endpoint of acall
+        """
+        self.api_key = api_key
+        self.model = model
+        self.temperature = temperature
+        self._client = (AsyncDashScopeClient(url, max_connections=max_connections)
+                        if has_httpx() else None)
+
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def call(self, prompt: str) -> str:
+        response = self._generation().call(**self._request(prompt))
+        if response.status_code != 200:
+            raise LLMGenerationError(f"API error {response.status_code}: {response.message}")
+        return response.output.text
+
+    async def acall(self, prompt: str) -> str:
+        if self._client is None:
+            return await super().acall(prompt)
+        return await self._client.call(**self._request(prompt))
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        responses = self._generation().call(
+            **self._request(prompt), stream=True, incremental_output=True
+        )
+        for response in responses:
+            if response.status_code != 200:
+                raise LLMGenerationError(f"API error {response.status_code}: {response.message}")
+            yield response.output.text or ""
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+    def _request(self, prompt: str) -> dict:
+        """Generation.call arguments"""
+        return dict(
+            model=self.model,
+            api_key=self.api_key,
+            prompt=prompt,
+            temperature=self.temperature,
+            result_format='text',
+        )
+
+    @staticmethod
+    def _generation():
+        try:
+            from dashscope import Generation
+        except ImportError:
+            raise ImportError("dashscope is required for LLM generation (pip install dashscope)")
+        return Generation
+
+
+class LocalBackend(LLMBackend):
+    """Deterministic offline backend with simulated latency
+
+    The response to a prompt is the first canned response whose key occurs
+    in the query (case-insensitive), else JSON with valid AgentScope code
+    sized to the requested complexity. Equal prompts always get equal
+    responses.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, str]] = None,
+        latency: float = 0.0,
+        chars_per_second: Optional[float] = None,
+        fail_every: int = 0,
+        model: str = "local"
+    ):
+        """Initialize backend
+
+        Args:
+            responses: Raw response text by query substring (optional)
+            latency: Seconds before the first output
+            chars_per_second: Output rate after that (None: instant)
+            fail_every: Raise a 429 error on every n-th call (0: never)
+            model: Model name, part of generation cache keys
+        """
+        self.responses = {key.lower(): text for key, text in (responses or {}).items()}
+        self.latency = latency
+        self.chars_per_second = chars_per_second
+        self.fail_every = fail_every
+        self.model = model
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def call(self, prompt: str) -> str:
+        text = self.respond(prompt)
+        time.sleep(self._duration(text))
+        return text
+
+    async def acall(self, prompt: str) -> str:
+        text = self.respond(prompt)
+        await asyncio.sleep(self._duration(text))
+        return text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        text = self.respond(prompt)
+        time.sleep(self.latency)
+        for i in range(0, len(text), LOCAL_CHUNK_CHARS):
+            chunk = text[i:i + LOCAL_CHUNK_CHARS]
+            if self.chars_per_second:
+                time.sleep(len(chunk) / self.chars_per_second)
+            yield chunk
+
+    def respond(self, prompt: str) -> str:
+        """Response text of a prompt, counted as a call, without latency
+
+        Raises:
+            LLMGenerationError: On every fail_every-th call
+        """
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if self.fail_every and calls % self.fail_every == 0:
+            raise LLMGenerationError("API error 429: Throttling (local backend)")
+
+        match = _QUERY_RE.search(prompt)
+        query = match.group(1).strip() if match else prompt.strip()
+        lowered = query.lower()
+        for key, text in self.responses.items():
+            if key in lowered:
+                return text
+        length = _LENGTH_RE.search(prompt)
+        return json.dumps({
+            "title": query[:60] or "Local example",
+            "code": local_code(query, int(length.group(1)) if length else 30),
+        }, ensure_ascii=False)
+
+    def _duration(self, text: str) -> float:
+        if not self.chars_per_second:
+            return self.latency
+        return self.latency + len(text) / self.chars_per_second
+
+
+def local_code(query: str, lines: int) -> str:
+    """Valid AgentScope example of about lines lines for a query"""
+    head = [
+        f"# {query}",
+        "import agentscope",
+        "from agentscope.agents import ReActAgent",
+        "from agentscope.message import Msg",
+        "",
+        "",
+        "def main() -> None:",
+        "    agentscope.init(model_configs=[{",
+        '        "config_name": "qwen",',
+        '        "model_type": "dashscope_chat",',
+        '        "model_name": "qwen-max",',
+        "    }])",
+        '    agent = ReActAgent(name="assistant", model_config_name="qwen",',
+        '                       sys_prompt="You are a helpful assistant.")',
+    ]
+    tail = [
+        f"    msg = Msg(name=\"user\", content={query!r}, role=\"user\")",
+        "    print(agent(msg).content)",
+        "",
+        "",
+        'if __name__ == "__main__":',
+        "    main()",
+    ]
+    steps = [f"    print({f'step {i}'!r})" for i in range(1, max(0, lines - len(head) - len(tail)) + 1)]
+    return "\n".join(head + steps + tail) + "\n"
@@ -0,0 +1,206 @@
+"""batch.py - Concurrent generation for a file of queries
+
+Every query becomes one output file. A checkpoint file in the output
+directory gets a JSON line per finished query, written after its output
+file, so a killed run resumes where it stopped. Transient LLM failures
+(rate limits, 5xx, timeouts, dropped connections) are retried with
+jittered exponential backoff.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .core import ComplexityLevel, GeneratedCode, ValidationStatus
+from .generator import CodeGenerator
+
+CHECKPOINT_FILE = ".batch_checkpoint.jsonl"
+
+_TRANSIENT_RE = re.compile(
+    r'\b(429|5\d\d)\b|throttl|rate limit|timeout|timed out|temporar|connection|unavailable',
+    re.IGNORECASE
+)
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+@dataclass
+class BatchSummary:
+    """Counts of one batch run"""
+    total: int = 0
+    skipped: int = 0
+    written: int = 0
+    failed: int = 0
+    template: int = 0
+    llm: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+
+def read_queries(path: str) -> List[str]:
+    """Queries of a text file, one per line (blank lines and # comments skipped)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def output_name(index: int, query: str) -> str:
+    """File name of a query's output: line index plus a slug of the query"""
+    slug = _SLUG_RE.sub("_", query.lower()).strip("_")[:40].rstrip("_")
+    return f"{index:05d}_{slug or 'query'}.py"
+
+
+def is_transient(result: GeneratedCode) -> bool:
+    """Check if a failed LLM result is worth retrying"""
+    validation = result.validation
+    return (result.source == "llm" and validation is not None
+            and validation.status == ValidationStatus.FAILED
+            and validation.message == "LLM generation failed"
+            and bool(_TRANSIENT_RE.search(validation.error or "")))
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff before retry number attempt + 1"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class BatchRunner:
+    """Generates a list of queries into an output directory, resumably"""
+
+    def __init__(
+        self,
+        generator: CodeGenerator,
+        output_dir: str,
+        complexity: ComplexityLevel = ComplexityLevel.CONCISE,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0,
+        retry_failed: bool = False
+    ):
+        """Initialize runner
+
+        Args:
+            generator: Generator to use; its max_concurrency and
+                rate_limiter bound the LLM calls
+            output_dir: Directory for output files and the checkpoint
+            complexity: Complexity level of every query
+            max_retries: Retries of a transient failure
+            backoff_base: First backoff ceiling in seconds
+            backoff_cap: Largest backoff ceiling in seconds
+            retry_failed: Rerun queries that failed in an earlier run
+        """
+        self.generator = generator
+        self.output_dir = output_dir
+        self.complexity = complexity
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_failed = retry_failed
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+
+    def load_checkpoint(self) -> Dict[int, dict]:
+        """Latest checkpoint record per query index"""
+        records: Dict[int, dict] = {}
+        if not os.path.exists(self.checkpoint_path):
+            return records
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    records[int(record["index"])] = record
+                except (ValueError, KeyError, TypeError):
+                    # Torn last line of a killed run
+                    continue
+        return records
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.checkpoint_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _finished(self, record: Optional[dict], query: str) -> bool:
+        if record is None or record.get("query") != query:
+            return False
+        return record.get("status") != "failed" or not self.retry_failed
+
+    async def run(
+        self,
+        queries: List[str],
+        progress: Optional[Callable[[dict], None]] = None
+    ) -> BatchSummary:
+        """Generate every query not finished by an earlier run
+
+        Pooled LLM connections of the running loop are closed when done.
+
+        Args:
+            queries: Queries, in input file order
+            progress: Called with each new checkpoint record
+
+        Returns:
+            Counts of this run
+        """
+        start = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+        checkpoint = self.load_checkpoint()
+        summary = BatchSummary(total=len(queries))
+        pending = []
+        for index, query in enumerate(queries):
+            if self._finished(checkpoint.get(index), query):
+                summary.skipped += 1
+            else:
+                pending.append((index, query))
+
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as log:
+            if log.tell() and not self._ends_with_newline():
+                # Terminate a torn last line so the next record stays whole
+                log.write("\n")
+            tasks = [asyncio.ensure_future(self._generate(index, query, summary))
+                     for index, query in pending]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    record = await next_done
+                    log.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    log.flush()
+                    if progress is not None:
+                        progress(record)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await self.generator.aclose()
+
+        summary.elapsed = time.perf_counter() - start
+        return summary
+
+    async def _generate(self, index: int, query: str, summary: BatchSummary) -> dict:
+        """Generate one query with retries and write its output file"""
+        for attempt in range(self.max_retries + 1):
+            result = await self.generator.agenerate(query, self.complexity)
+            if not is_transient(result) or attempt == self.max_retries:
+                break
+            summary.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_cap))
+
+        record = {"index": index, "query": query, "source": result.source, "attempts": attempt + 1}
+        if result.code:
+            name = output_name(index, query)
+            path = os.path.join(self.output_dir, name)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(result.code)
+            os.replace(tmp_path, path)
+            record["file"] = name
+            record["status"] = "ok" if result.is_valid() else "invalid"
+            summary.written += 1
+            if result.source in ("template", "composed"):
+                summary.template += 1
+            else:
+                summary.llm += 1
+        else:
+            record["status"] = "failed"
+            summary.failed += 1
+        if result.validation is not None and not result.is_valid():
+            record["error"] = result.validation.error or result.validation.message
+        return record
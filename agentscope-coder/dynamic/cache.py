@@ -0,0 +1,548 @@
+"""cache.py - Disk cache of LLM generations
+
+Identical queries reach the LLM again and again, each call costing
+seconds and money. GenerationCache stores parsed code and its validation
+result in SQLite, keyed on the normalized query, complexity, model,
+prompt version and validator version, so changing any of them misses.
+
+The database runs in WAL mode: readers never block the writer, and
+several worker processes can share one file. Every thread of every
+process opens its own connection. Entries expire after a TTL and the
+least recently used are evicted past max_entries.
+
+SemanticCache puts a near-duplicate lookup in front of a GenerationCache:
+paraphrases of a cached query ("ReAct agent with weather tool" for
+"react agent that calls a weather tool") return its generation.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from .core import ComplexityLevel, GeneratedCode, ValidationResult, ValidationStatus
+from .normalize import normalize_query, normalize_token
+from .retriever import STOPWORDS
+from .semantic import HashingEmbedder, has_numpy
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "generations.sqlite3"
+
+# Default time to live: one week
+DEFAULT_TTL = 7 * 24 * 3600.0
+
+DEFAULT_MAX_ENTRIES = 10000
+
+# Minimum cosine similarity for a semantic hit
+SEMANTIC_THRESHOLD = 0.7
+
+# Embedding size of SemanticCache (float32: 1 KB per entry)
+SEMANTIC_DIM = 256
+
+# Candidates above the threshold checked per semantic lookup
+SEMANTIC_CANDIDATES = 16
+
+# Share of a group's rows that may belong to removed entries before it is compacted
+SEMANTIC_DEAD_FRACTION = 0.5
+
+# Words that do not change what a request asks for
+FILLER_WORDS = frozenset({
+    "that", "which", "who", "can", "call", "calls", "and", "of", "in", "on", "by",
+    "using", "uses", "me", "want", "please", "build", "create", "make", "write",
+    "code", "example", "simple", "python", "some", "implement", "show", "give",
+})
+CJK_FILLER = frozenset("的之间个一了和与及把被在用于让使它们这那请帮我写实现一下")
+
+_TERM_RE = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]+')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+# Access times are refreshed at most this often (seconds), so hits rarely write
+TOUCH_INTERVAL = 60.0
+
+# Columns after id; AUTOINCREMENT ids are never reused, so entries with
+# an id above the last one seen are exactly the new ones
+_COLUMNS = ("key", "query", "complexity", "model", "prompt_version", "validator_version",
+            "title", "code", "status", "message", "error", "created", "accessed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    query TEXT NOT NULL,
+    complexity TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    validator_version TEXT NOT NULL,
+    title TEXT NOT NULL,
+    code TEXT NOT NULL,
+    status TEXT,
+    message TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_accessed ON generations (accessed);
+"""
+
+
+def default_cache_path() -> str:
+    """Cache database under $XDG_CACHE_HOME (or ~/.cache)"""
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "agentscope-coder", CACHE_FILE)
+
+
+def cache_key(
+    query: str,
+    complexity: str,
+    model: str,
+    prompt_version: str,
+    validator_version: str
+) -> str:
+    """Stable key of one generation request"""
+    parts = [normalize_query(query), complexity, model, prompt_version, validator_version]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class GenerationCache:
+    """SQLite-backed cache of generated code, shared across processes"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        touch_interval: float = TOUCH_INTERVAL
+    ):
+        """Initialize cache
+
+        Args:
+            path: Database file (default: default_cache_path())
+            ttl: Seconds an entry stays valid (None: forever)
+            max_entries: Entries kept; least recently used are evicted
+                (trimmed every max_entries / 100 puts)
+            touch_interval: Minimum seconds between access-time updates
+        """
+        self.path = path or default_cache_path()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        # Trimming walks the access index, so it runs once per 1% of max_entries puts
+        self._trim_every = max(1, max_entries // 100)
+        self._puts = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create the table, upgrading one written before entries had ids"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(generations)")]
+            legacy = bool(columns) and "id" not in columns
+            if legacy:
+                conn.execute("DROP INDEX IF EXISTS generations_accessed")
+                conn.execute("ALTER TABLE generations RENAME TO generations_legacy")
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            if legacy:
+                names = ", ".join(_COLUMNS)
+                conn.execute(f"INSERT INTO generations ({names}) "
+                             f"SELECT {names} FROM generations_legacy ORDER BY rowid")
+                conn.execute("DROP TABLE generations_legacy")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, reopened after a fork"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(
+        self,
+        query: str,
+        complexity: ComplexityLevel,
+        model: str,
+        prompt_version: str,
+        validator_version: str
+    ) -> Optional[GeneratedCode]:
+        """Cached generation, or None if missing or expired"""
+        key = cache_key(query, complexity.value, model, prompt_version, validator_version)
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT title, code, status, message, error, created, accessed "
+                "FROM generations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[5], now):
+                conn.execute("DELETE FROM generations WHERE key = ?", (key,))
+                row = None
+            elif row is not None and now - row[6] >= self.touch_interval:
+                conn.execute("UPDATE generations SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.warning("Generation cache read failed: %s", e)
+            row = None
+
+        self._count(row is not None)
+        if row is None:
+            return None
+
+        title, code, status, message, error = row[:5]
+        validation = None
+        if status is not None:
+            validation = ValidationResult(status=ValidationStatus(status), message=message, error=error)
+        return GeneratedCode(code=code, title=title, complexity=complexity,
+                             source="llm", validation=validation)
+
+    def put(
+        self,
+        query: str,
+        result: GeneratedCode,
+        model: str,
+        prompt_version: str,
+        validator_version: str
+    ):
+        """Store a generation, periodically dropping expired and least recently used entries"""
+        complexity = result.complexity.value
+        key = cache_key(query, complexity, model, prompt_version, validator_version)
+        validation = result.validation
+        now = time.time()
+        with self._stats_lock:
+            trim = self._puts % self._trim_every == 0
+            self._puts += 1
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A replaced entry gets a new id, so SemanticCache re-indexes it
+                conn.execute(
+                    f"INSERT OR REPLACE INTO generations ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    (key, normalize_query(query), complexity, model, prompt_version,
+                     validator_version, result.title, result.code,
+                     validation.status.value if validation else None,
+                     validation.message if validation else None,
+                     validation.error if validation else None, now, now)
+                )
+                if trim and self.ttl is not None:
+                    conn.execute("DELETE FROM generations WHERE created < ?", (now - self.ttl,))
+                if trim:
+                    conn.execute(
+                        "DELETE FROM generations WHERE key IN (SELECT key FROM generations "
+                        "ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning("Generation cache write failed: %s", e)
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+
+    def entries_since(self, entry_id: int) -> List[Tuple[int, str, str, str, str, str]]:
+        """(id, query, complexity, model, prompt_version, validator_version)
+        of entries written after entry_id, oldest first
+        """
+        try:
+            return self._connect().execute(
+                "SELECT id, query, complexity, model, prompt_version, validator_version "
+                "FROM generations WHERE id > ? ORDER BY id", (entry_id,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Generation cache read failed: %s", e)
+            return []
+
+    def entry_ids(self) -> Set[int]:
+        """Ids of the stored entries"""
+        try:
+            return {row[0] for row in self._connect().execute("SELECT id FROM generations")}
+        except sqlite3.Error as e:
+            logger.warning("Generation cache read failed: %s", e)
+            return set()
+
+    def clear(self):
+        """Remove every entry"""
+        self._connect().execute("DELETE FROM generations")
+
+    def stats(self) -> Dict[str, int]:
+        """Hits and misses of this instance, and entries on disk"""
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class _Group:
+    """Embedded queries of one (complexity, model, prompt, validator) key
+
+    The matrix is stored bucket-major, (dim, capacity): a query embedding
+    has few nonzero buckets, and only their rows are read per lookup.
+    Rows of entries removed from the store are zeroed (their query becomes
+    None) and dropped when the group is compacted.
+    """
+
+    def __init__(self, dim: int):
+        self.matrix = np.zeros((dim, 64), dtype=np.float32)
+        self.queries: List[Optional[str]] = []
+        self.terms: List[Set[str]] = []
+        self.entry_ids: List[int] = []
+        # normalized query -> row
+        self.rows: Dict[str, int] = {}
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def full(self) -> bool:
+        return len(self.queries) == self.matrix.shape[1]
+
+    def add(self, query: str, vector: "np.ndarray", terms: Set[str], entry_id: int):
+        row = self.rows.get(query)
+        if row is None:
+            row = self.rows[query] = len(self.queries)
+            if row == self.matrix.shape[1]:
+                grown = np.zeros((self.matrix.shape[0], 2 * row), dtype=np.float32)
+                grown[:, :row] = self.matrix
+                self.matrix = grown
+            self.queries.append(query)
+            self.terms.append(terms)
+            self.entry_ids.append(entry_id)
+        self.entry_ids[row] = entry_id
+        self.matrix[:, row] = vector
+
+    def discard(self, query: str, entry_id: int):
+        """Zero the row of an entry gone from the store, unless it was re-added since"""
+        row = self.rows.get(query)
+        if row is not None and self.entry_ids[row] == entry_id:
+            self.remove(row)
+            if self.dead > SEMANTIC_DEAD_FRACTION * len(self.queries):
+                self.compact()
+
+    def remove(self, row: int):
+        del self.rows[self.queries[row]]
+        self.matrix[:, row] = 0.0
+        self.queries[row] = None
+        self.terms[row] = set()
+        self.dead += 1
+
+    def compact(self):
+        """Drop zeroed rows, shrinking the matrix to twice the live rows"""
+        live = [row for row, query in enumerate(self.queries) if query is not None]
+        matrix = np.zeros((self.matrix.shape[0], max(64, 2 * len(live))), dtype=np.float32)
+        matrix[:, :len(live)] = self.matrix[:, live]
+        self.matrix = matrix
+        self.queries = [self.queries[row] for row in live]
+        self.terms = [self.terms[row] for row in live]
+        self.entry_ids = [self.entry_ids[row] for row in live]
+        self.rows = {query: row for row, query in enumerate(self.queries)}
+        self.dead = 0
+
+    def scores(self, vector: "np.ndarray") -> "np.ndarray":
+        """Cosine similarity of vector to every row"""
+        buckets = np.flatnonzero(vector)
+        return vector[buckets] @ self.matrix[buckets, :len(self.queries)]
+
+
+class SemanticCache:
+    """Near-duplicate lookup over the entries of a GenerationCache
+
+    Each (complexity, model, prompt version, validator version) key has
+    its own float32 matrix of query embeddings from the offline hashing
+    embedder. A lookup is one matrix-vector product. The best rows above
+    the threshold must also pass a term check: every content word only
+    one query has must be a fragment of the other query, so "csv" and
+    "json" exports stay apart. Entries written by other processes are
+    picked up on the next lookup. Entries the store expired or evicted
+    are dropped when a lookup finds them gone, or before a full group
+    grows, so groups stay proportional to the store.
+    """
+
+    def __init__(
+        self,
+        store: GenerationCache,
+        threshold: float = SEMANTIC_THRESHOLD,
+        dim: int = SEMANTIC_DIM
+    ):
+        """Initialize semantic cache
+
+        Args:
+            store: Generation cache holding the entries
+            threshold: Minimum cosine similarity for a hit
+            dim: Embedding size
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        if not has_numpy():
+            raise ImportError("numpy is required for the semantic cache (pip install numpy)")
+        self.store = store
+        self.threshold = threshold
+        self.embedder = HashingEmbedder(dim)
+        self.hits = 0
+        self.misses = 0
+        self._groups: Dict[Tuple[str, str, str, str], _Group] = {}
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._sync()
+
+    def __len__(self) -> int:
+        return sum(len(group) for group in self._groups.values())
+
+    def get(
+        self,
+        query: str,
+        complexity: ComplexityLevel,
+        model: str,
+        prompt_version: str,
+        validator_version: str
+    ) -> Optional[GeneratedCode]:
+        """Generation of the closest cached paraphrase, or None"""
+        self._sync()
+        text = normalize_query(query)
+        terms = _content_terms(text)
+        vector = self._embed(terms)
+        candidates = []
+        with self._lock:
+            group = self._groups.get((complexity.value, model, prompt_version, validator_version))
+            if group is not None and len(group):
+                candidates = [(group.queries[row], group.entry_ids[row])
+                              for row in self._candidates(group, vector)
+                              if _same_request(terms, group.terms[row], text, group.queries[row])]
+
+        result = None
+        for cached_query, entry_id in candidates:
+            result = self.store.get(cached_query, complexity, model,
+                                    prompt_version, validator_version)
+            if result is not None:
+                break
+            # Expired or evicted from the store
+            with self._lock:
+                group.discard(cached_query, entry_id)
+
+        with self._lock:
+            if result is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Hits and misses of this instance, and indexed entries"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def _candidates(self, group: _Group, vector: "np.ndarray") -> List[int]:
+        """Rows above the threshold, most similar first"""
+        scores = group.scores(vector)
+        k = min(SEMANTIC_CANDIDATES, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [int(row) for row in top if scores[row] >= self.threshold]
+
+    def _sync(self):
+        """Index entries added to the store since the last sync
+
+        Before a full group grows, rows of entries no longer in the store
+        are removed.
+        """
+        with self._lock:
+            for entry_id, query, complexity, model, prompt_version, validator_version in \
+                    self.store.entries_since(self._last_id):
+                key = (complexity, model, prompt_version, validator_version)
+                group = self._groups.get(key)
+                if group is None:
+                    group = self._groups[key] = _Group(self.embedder.dim)
+                if query not in group.rows and group.full():
+                    self._prune(group)
+                terms = _content_terms(query)
+                group.add(query, self._embed(terms), terms, entry_id)
+                self._last_id = entry_id
+
+    def _prune(self, group: _Group):
+        """Remove rows of entries the store expired or evicted, then compact"""
+        stored = self.store.entry_ids()
+        for row, entry_id in enumerate(group.entry_ids):
+            if group.queries[row] is not None and entry_id not in stored:
+                group.remove(row)
+        group.compact()
+
+    def _embed(self, terms: Set[str]) -> "np.ndarray":
+        return self.embedder.embed(" ".join(sorted(terms)))
+
+
+def _content_terms(text: str) -> Set[str]:
+    """Normalized content words and CJK characters of a lowercase query"""
+    terms = set()
+    for word in _TERM_RE.findall(text):
+        if _CJK_RE.match(word):
+            terms.update(ch for ch in word if ch not in CJK_FILLER)
+        elif word not in STOPWORDS and word not in FILLER_WORDS:
+            terms.add(normalize_token(word))
+    return terms
+
+
+def _same_request(a: Set[str], b: Set[str], a_text: str, b_text: str) -> bool:
+    """Check every term only one query has is a fragment of the other
+
+    A term passes if it occurs inside the other query's text ("bot" in
+    "chatbot") or starts like one of its extra terms ("scraper" and
+    "scrape", "web" and "websites"; up to four letters, at least three).
+    """
+    only_a, only_b = a - b, b - a
+    for extra, other, other_text in ((only_a, only_b, b_text), (only_b, only_a, a_text)):
+        for term in extra:
+            if len(term) >= 3 and term in other_text:
+                continue
+            if any(_shared_prefix(term, t) for t in other):
+                continue
+            return False
+    return True
+
+
+def _shared_prefix(a: str, b: str) -> bool:
+    n = min(4, len(a), len(b))
+    return n >= 3 and a[:n] == b[:n]
@@ -0,0 +1,101 @@
+"""catalog.py - Sharded template catalog for large template sets
+
+Layout under <templates_dir>/catalog/:
+
+    manifest.json      {"version": 1, "shards": {...}, "templates": [...]}
+    <category>.json    {"category": ..., "templates": [full metadata entries]}
+
+The manifest carries only the fields needed to build the match index
+(id, title, category, difficulty, priority, keywords, shard). Everything
+else (description, learning objectives, ...) stays in the per-category
+shard and is read when a template from that shard is first materialized.
+
+Only those extra fields load lazily: the manifest holds an index row for
+every template and is read in full when the index is built, so load time
+and index memory still grow with the template count. The catalog saves
+parsing and keeping descriptions of templates that are never returned.
+
+Every file is written to a temporary name and renamed into place, the
+manifest last, so readers see either the old or the new version of each.
+"""
+
+import json
+import os
+import sys
+from typing import Dict, Iterable, List
+
+CATALOG_DIR = "catalog"
+MANIFEST_FILE = "manifest.json"
+CATALOG_VERSION = 1
+
+# Metadata fields copied into the manifest
+INDEX_FIELDS = ("id", "title", "category", "difficulty", "priority", "keywords")
+
+
+def manifest_path(templates_dir: str) -> str:
+    """Path of the catalog manifest for a templates root"""
+    return os.path.join(templates_dir, CATALOG_DIR, MANIFEST_FILE)
+
+
+def has_catalog(templates_dir: str) -> bool:
+    """Check if a templates root ships a sharded catalog"""
+    return os.path.exists(manifest_path(templates_dir))
+
+
+def write_catalog(entries: Iterable[dict], templates_dir: str) -> Dict[str, int]:
+    """Write metadata entries as a sharded catalog
+
+    Args:
+        entries: Full template metadata entries (metadata_index.json style)
+        templates_dir: Templates root; the catalog goes into its catalog/
+
+    Returns:
+        Dict[str, int]: Template count per shard file
+    """
+    shards: Dict[str, List[dict]] = {}
+    for entry in entries:
+        shards.setdefault(entry.get("category", ""), []).append(entry)
+
+    out_dir = os.path.join(templates_dir, CATALOG_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    rows, counts = [], {}
+    for category, shard_entries in shards.items():
+        shard_file = f"{category or '_'}.json"
+        _write_json(os.path.join(out_dir, shard_file),
+                    {"category": category, "templates": shard_entries})
+        counts[shard_file] = len(shard_entries)
+        for entry in shard_entries:
+            row = {k: entry[k] for k in INDEX_FIELDS if k in entry}
+            row["shard"] = shard_file
+            rows.append(row)
+
+    # Manifest last, so a watcher never sees it point at missing shards
+    _write_json(manifest_path(templates_dir),
+                {"version": CATALOG_VERSION, "shards": counts, "templates": rows})
+    return counts
+
+
+def _write_json(path: str, data: dict):
+    """Replace a file atomically, so readers never see it half written"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(templates_dir: str) -> List[dict]:
+    """Read manifest rows (index fields plus shard file name)"""
+    with open(manifest_path(templates_dir), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get("version") != CATALOG_VERSION:
+        raise ValueError(f"Unsupported catalog version: {data.get('version')}")
+    return data.get("templates", [])
+
+
+def read_shard(templates_dir: str, shard_file: str) -> Dict[str, dict]:
+    """Read one shard as {template id: full metadata entry}"""
+    path = os.path.join(templates_dir, CATALOG_DIR, shard_file)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {sys.intern(entry["id"]): entry for entry in data.get("templates", [])}
@@ -0,0 +1,409 @@
+"""composer.py - One example composed from several matched templates
+
+"ReActAgent with long-term memory and streaming" is served by three
+templates, each covering part of the request. TemplateComposer merges
+them at the AST level into one program:
+
+- imports are deduplicated and grouped per module; names only a
+  secondary template's own agent class needed are dropped
+- the agentscope.init calls become one, keyword arguments merged
+- the agent constructors become one call of the primary template's
+  class with the keyword arguments of all of them; dict arguments such
+  as tools are merged entry by entry
+- helper functions, classes and setup statements are kept (once per
+  name) with their comments, followed by each template's usage code
+
+On conflicts the better-matching template wins; a template whose setup
+would rebind a name of one before it (memory = ...) is left out. A
+template joins only if it covers whole query keywords the ones before it
+do not, worth a fair share of the best match's score, so incidental
+overlaps leave single-intent queries to one template. Only templates
+with one top-level agent can be composed. Results pass CodeValidator
+and are cached, so repeated requests are answered at template speed.
+"""
+
+import ast
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .core import ComplexityLevel, ValidationResult, ValidationStatus
+from .retriever import KEYWORD_WEIGHT, TemplateInfo, TemplateRetriever
+from .validator import CodeValidator
+
+# Templates merged into one example at most
+MAX_PARTS = 3
+
+# Ranked matches considered for composition
+MAX_CANDIDATES = 8
+
+# Weight of the keywords a template adds, as a share of the best match's
+# score, for it to join. Below this (e.g. 对话 in 如何使用长期记忆存储对话,
+# 1.0 of 5.0) the overlap is taken as incidental.
+MIN_TERM_SHARE = 0.3
+
+# Composed examples kept in memory
+COMPOSE_CACHE_SIZE = 256
+
+# One-line calls up to this length
+LINE_LENGTH = 88
+
+
+@dataclass
+class ComposedCode:
+    """Example merged from several templates"""
+    code: str
+    title: str
+    templates: List[str]
+    validation: ValidationResult
+
+
+@dataclass
+class _Stmt:
+    """Top-level statement with its source text (leading comments and blank lines included)"""
+    node: ast.stmt
+    text: str
+
+
+@dataclass
+class _Parts:
+    """Template source split for merging"""
+    source: str
+    imports: List[ast.stmt] = field(default_factory=list)
+    init: Optional[_Stmt] = None
+    agent: Optional[_Stmt] = None
+    agent_var: str = ""
+    before: List[_Stmt] = field(default_factory=list)
+    after: List[_Stmt] = field(default_factory=list)
+
+    @property
+    def agent_call(self) -> ast.Call:
+        return self.agent.node.value
+
+
+class TemplateComposer:
+    """Answers compound requests by merging matched templates"""
+
+    def __init__(
+        self,
+        retriever: TemplateRetriever,
+        validator: Optional[CodeValidator] = None,
+        cache_size: int = COMPOSE_CACHE_SIZE
+    ):
+        """Initialize composer
+
+        Args:
+            retriever: Template retriever to match and read templates with
+            validator: Validator composed code must pass
+            cache_size: Composed examples kept in memory
+        """
+        self.retriever = retriever
+        self.validator = validator or CodeValidator()
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compose(
+        self,
+        query: str,
+        complexity: ComplexityLevel = ComplexityLevel.CONCISE
+    ) -> Optional[ComposedCode]:
+        """Composed example for a query several templates cover
+
+        Returns:
+            None if one template covers the query, or the templates
+            cannot be merged into valid code
+        """
+        templates = self.select(query)
+        if len(templates) < 2:
+            return None
+        sources = []
+        for template in templates:
+            code = self.retriever.get_template_code(template.id, complexity.value)
+            if not code:
+                return None
+            sources.append(code)
+
+        # Template sources are cached strings, so the key hashes in O(1)
+        key = (tuple(t.id for t in templates), tuple(sources))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        result = self._compose(templates, sources)
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def select(self, query: str) -> List[TemplateInfo]:
+        """Best match, then each match adding enough query keywords not yet covered"""
+        matches = self.retriever.match_topk(query, k=MAX_CANDIDATES)
+        if len(matches) < 2:
+            return [m.template for m in matches]
+        terms = self.retriever.match_terms(query)
+        chosen = [matches[0].template]
+        covered = set(terms.get(matches[0].template.id, ()))
+        min_weight = MIN_TERM_SHARE * matches[0].score
+        for match in matches[1:]:
+            new = terms.get(match.template.id, set()) - covered
+            if new and len(new) * KEYWORD_WEIGHT >= min_weight:
+                chosen.append(match.template)
+                covered |= new
+                if len(chosen) == MAX_PARTS:
+                    break
+        return chosen
+
+    def _compose(self, templates: List[TemplateInfo], sources: List[str]) -> Optional[ComposedCode]:
+        """Merged code of the templates, or None if they do not merge"""
+        primary = _split(sources[0])
+        if primary is None:
+            return None
+        parts, used = [primary], [templates[0]]
+        bound = _bound_names(primary)
+        for template, source in zip(templates[1:], sources[1:]):
+            secondary = _split(source)
+            if secondary is None:
+                continue
+            # Its setup would overwrite an earlier template's object
+            # (memory = InMemoryMemory() after memory = LongTermMemory(...))
+            if _rebinds(secondary, bound, primary.agent_var):
+                continue
+            parts.append(secondary)
+            used.append(template)
+            bound |= _bound_names(secondary)
+        if len(parts) < 2:
+            return None
+
+        code = _render(parts, [t.title for t in used])
+        validation = self.validator.validate(code)
+        if validation.status != ValidationStatus.PASSED:
+            return None
+        return ComposedCode(code=code, title=" + ".join(t.title for t in used),
+                            templates=[t.id for t in used], validation=validation)
+
+
+def _split(source: str) -> Optional[_Parts]:
+    """Template parts, or None without exactly one top-level agent"""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    lines = source.splitlines()
+    parts = _Parts(source)
+    body = tree.body
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        prev_end, body = body[0].end_lineno, body[1:]
+    else:
+        prev_end = 0
+
+    for node in body:
+        stmt = _Stmt(node, "\n".join(lines[prev_end:node.end_lineno]))
+        prev_end = node.end_lineno
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            parts.imports.append(node)
+        elif parts.init is None and _is_init(node):
+            parts.init = stmt
+        elif _agent_target(node):
+            if parts.agent is not None:
+                return None
+            parts.agent, parts.agent_var = stmt, _agent_target(node)
+        elif parts.agent is None:
+            parts.before.append(stmt)
+        else:
+            parts.after.append(stmt)
+    return parts if parts.agent is not None else None
+
+
+def _bound_names(parts: _Parts) -> Set[str]:
+    """Names the setup statements and the agent of a template bind"""
+    names = {parts.agent_var}
+    for stmt in parts.before:
+        names |= _defined_names(stmt.node)
+    return names
+
+
+def _rebinds(parts: _Parts, bound: Set[str], agent_var: str) -> bool:
+    """Check a secondary template rebinds one of the bound names
+
+    Its agent merges into the primary's agent_var, or is aliased to it
+    under its own name. Functions and classes of the same name are kept
+    once instead.
+    """
+    names = set()
+    for stmt in parts.before:
+        if not isinstance(stmt.node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names |= _defined_names(stmt.node)
+    if parts.agent_var != agent_var:
+        names.add(parts.agent_var)
+    return bool(names & bound)
+
+
+def _is_init(node: ast.stmt) -> bool:
+    """agentscope.init(...) statement"""
+    return (isinstance(node, ast.Expr) and isinstance(node.value, ast.Call)
+            and isinstance(node.value.func, ast.Attribute) and node.value.func.attr == "init"
+            and isinstance(node.value.func.value, ast.Name)
+            and node.value.func.value.id == "agentscope")
+
+
+def _agent_target(node: ast.stmt) -> str:
+    """Variable name of a "name = SomeAgent(...)" statement, else \"\""""
+    if not (isinstance(node, ast.Assign) and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name) and isinstance(node.value, ast.Call)):
+        return ""
+    func = node.value.func
+    name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", "")
+    return node.targets[0].id if name.endswith("Agent") else ""
+
+
+def _render(parts: List[_Parts], titles: List[str]) -> str:
+    """Source of the merged program"""
+    primary = parts[0]
+    defined: Set[str] = set()
+    blocks: List[str] = []
+
+    init = _merge_call([(p.source, p.init.node.value) for p in parts if p.init is not None])
+    if init is not None:
+        comment = _comments(next(p.init.text for p in parts if p.init is not None))
+        blocks.append(comment + init)
+
+    kept: List[ast.AST] = []
+    for p in parts:
+        texts = []
+        for stmt in p.before:
+            names = _defined_names(stmt.node)
+            if isinstance(stmt.node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) \
+                    and names & defined:
+                continue
+            defined |= names
+            texts.append(stmt.text)
+            kept.append(stmt.node)
+        if texts:
+            blocks.append("\n".join(texts).strip("\n"))
+
+    agent = _merge_call([(p.source, p.agent_call) for p in parts])
+    blocks.append(_comments(primary.agent.text) + f"{primary.agent_var} = {agent}")
+    # The merged call uses the primary's class and everyone's arguments
+    kept.append(primary.agent_call)
+    kept.extend(kw.value for p in parts[1:] for kw in p.agent_call.keywords if kw.arg is not None)
+
+    for i, p in enumerate(parts):
+        if not p.after:
+            continue
+        lines = ["\n".join(stmt.text for stmt in p.after).strip("\n")]
+        if i > 0:
+            if p.agent_var != primary.agent_var:
+                lines.insert(0, f"{p.agent_var} = {primary.agent_var}")
+            lines.insert(0, f"# ============ {titles[i]} ============")
+        blocks.append("\n".join(lines))
+        kept.extend(stmt.node for stmt in p.after)
+
+    used = {n.id for node in kept for n in ast.walk(node) if isinstance(n, ast.Name)}
+    used.add("agentscope")
+    imports = _merge_imports(parts, used)
+    header = f'"""{" + ".join(titles)}\n\n组合示例：由 {len(parts)} 个模板合并生成。\n"""'
+    return "\n\n".join([header, imports] + blocks) + "\n"
+
+
+def _comments(text: str) -> str:
+    """Leading comment lines of a statement's text"""
+    lines = []
+    for line in text.strip("\n").splitlines():
+        if not line.lstrip().startswith("#"):
+            break
+        lines.append(line)
+    return "".join(line + "\n" for line in lines)
+
+
+def _defined_names(node: ast.stmt) -> Set[str]:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return {node.name}
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+
+
+def _merge_call(calls: List[Tuple[str, ast.Call]]) -> Optional[str]:
+    """First call with the keyword arguments of all calls
+
+    Earlier calls win conflicts, except that dict literals are merged.
+    """
+    if not calls:
+        return None
+    source, first = calls[0]
+    args = [_segment(source, arg) for arg in first.args]
+    kwargs: "OrderedDict[Optional[str], List[Tuple[str, ast.expr]]]" = OrderedDict()
+    for i, (src, call) in enumerate(calls):
+        for keyword in call.keywords:
+            if keyword.arg is None and i > 0:
+                continue  # **kwargs only make sense in their own template
+            kwargs.setdefault(keyword.arg, []).append((src, keyword.value))
+
+    for name, values in kwargs.items():
+        text = _merge_value(values)
+        args.append(f"**{text}" if name is None else f"{name}={text}")
+    func = ast.get_source_segment(source, first.func)
+    one_line = f"{func}({', '.join(args)})"
+    if len(one_line) <= LINE_LENGTH and "\n" not in one_line:
+        return one_line
+    return f"{func}(\n" + "".join(f"    {_indent(arg)},\n" for arg in args) + ")"
+
+
+def _segment(source: str, node: ast.AST) -> str:
+    """Source of a node, continuation lines relative to its first line's indentation"""
+    text = ast.get_source_segment(source, node)
+    line = source.splitlines()[node.lineno - 1]
+    indent = line[:len(line) - len(line.lstrip())]
+    return "\n".join(
+        part[len(indent):] if part.startswith(indent) else part for part in text.split("\n")
+    ) if indent else text
+
+
+def _merge_value(values: List[Tuple[str, ast.expr]]) -> str:
+    """Source of a keyword value; dict literals are merged by key"""
+    source, first = values[0]
+    if not isinstance(first, ast.Dict) or len(values) == 1:
+        return _segment(source, first)
+    entries: "OrderedDict[str, str]" = OrderedDict()
+    for src, value in values:
+        if not isinstance(value, ast.Dict):
+            continue
+        for key, item in zip(value.keys, value.values):
+            if key is None:
+                continue
+            entries.setdefault(_segment(src, key), _segment(src, item))
+    return "{\n" + "".join(f"    {k}: {v},\n" for k, v in entries.items()) + "}"
+
+
+def _indent(text: str) -> str:
+    return text.replace("\n", "\n    ")
+
+
+def _merge_imports(parts: List[_Parts], used: Set[str]) -> str:
+    """Deduplicated imports, grouped per module
+
+    Imports of secondary templates binding unused names are dropped.
+    """
+    plain: "OrderedDict[str, None]" = OrderedDict()
+    froms: "OrderedDict[Tuple[int, str], OrderedDict]" = OrderedDict()
+    for i, p in enumerate(parts):
+        for node in p.imports:
+            for alias in node.names:
+                bound = (alias.asname or alias.name).split(".")[0]
+                if i > 0 and bound not in used:
+                    continue
+                name = alias.name + (f" as {alias.asname}" if alias.asname else "")
+                if isinstance(node, ast.Import):
+                    plain.setdefault(name, None)
+                else:
+                    key = (node.level, node.module or "")
+                    froms.setdefault(key, OrderedDict()).setdefault(name, None)
+
+    lines = [f"import {name}" for name in plain]
+    for (level, module), names in froms.items():
+        lines.append(f"from {'.' * level}{module} import {', '.join(names)}")
+    future = [line for line in lines if line.startswith("from __future__")]
+    return "\n".join(future + [line for line in lines if line not in future])
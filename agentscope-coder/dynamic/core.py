@@ -3,7 +3,8 @@
 Designed for Claude Code - returns code only, no tutorial content.
 """
 
-from dataclasses import dataclass
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
@@ -38,14 +39,17 @@ class GeneratedCode:
         code: Generated Python code
         title: Code title
         complexity: Complexity level used
-        source: Source (template/llm)
+        source: Source (template/composed/llm)
         validation: Validation result
+        upgrade: Pending LLM version of a template result (revalidate
+            mode of CodeGenerator only)
     """
     code: str
     title: str
     complexity: ComplexityLevel
-    source: str  # "template" or "llm"
+    source: str  # "template", "composed" or "llm"
     validation: Optional[ValidationResult] = None
+    upgrade: Optional["Future[GeneratedCode]"] = field(default=None, repr=False, compare=False)
 
     def is_valid(self) -> bool:
         """Check if code is valid"""
@@ -0,0 +1,86 @@
+"""fuzzy.py - Typo-tolerant keyword lookup (symmetric delete)
+
+Every dictionary word is indexed under all strings reachable by deleting
+up to max_distance characters. A query term is looked up under its own
+deletes, and the candidates are verified with optimal string alignment
+distance (Damerau-Levenshtein with adjacent transpositions), so
+"memroy" -> "memory" is distance 1.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Words shorter than this are never corrected ("that" is one edit from "chat")
+MIN_WORD_LENGTH = 5
+
+# Words at least this long may be corrected with two edits
+TWO_EDIT_LENGTH = 8
+
+
+def max_distance_for(word: str, max_distance: int) -> int:
+    """Allowed edit distance for a word: 1 below TWO_EDIT_LENGTH, else 2"""
+    return min(max_distance, 1 if len(word) < TWO_EDIT_LENGTH else 2)
+
+
+class SymmetricDeleteIndex:
+    """Bounded-edit-distance lookup over a fixed vocabulary"""
+
+    def __init__(self, words: Iterable[str], max_distance: int = 2):
+        self.max_distance = max_distance
+        self.words: Set[str] = set()
+        self.deletes: Dict[str, List[str]] = {}
+        for word in words:
+            if len(word) < MIN_WORD_LENGTH or not word.isascii():
+                continue
+            self.words.add(word)
+            for variant in _deletes(word, max_distance_for(word, max_distance)):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def lookup(self, term: str) -> List[Tuple[str, int]]:
+        """Vocabulary words within the allowed distance of term, closest first"""
+        if len(term) < MIN_WORD_LENGTH or not term.isascii():
+            return []
+
+        limit = max_distance_for(term, self.max_distance)
+        seen: Set[str] = set()
+        results = []
+        for variant in _deletes(term, limit):
+            for word in self.deletes.get(variant, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                distance = osa_distance(
+                    term, word, min(limit, max_distance_for(word, self.max_distance))
+                )
+                if distance is not None:
+                    results.append((word, distance))
+        results.sort(key=lambda item: (item[1], item[0]))
+        return results
+
+
+def osa_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """Optimal string alignment distance, or None if it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return None
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= limit else None
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """word plus every string obtained by deleting up to distance chars"""
+    results = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
@@ -1,63 +1,382 @@
 """generator.py - Main code generator with progressive enhancement
 
-Level 1: Static templates (no API needed)
-Level 2: LLM generation (requires DASHSCOPE_API_KEY)
+Level 1: Static templates (no API needed), composed from several
+         templates for compound requests
+Level 2: LLM generation (requires DASHSCOPE_API_KEY, or another backend)
 """
 
+import asyncio
 import os
-from typing import Optional
+import threading
+import weakref
+from concurrent.futures import Future, wait as wait_futures
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+from .analytics import MissRecorder
+from .backends import DashScopeBackend, LLMBackend
+from .cache import GenerationCache, SemanticCache, cache_key
+from .composer import TemplateComposer
 from .core import GeneratedCode, ComplexityLevel, ValidationResult, ValidationStatus
-from .retriever import TemplateRetriever
-from .parser import CodeParser
+from .llm_client import DEFAULT_CONCURRENCY
+from .retriever import TemplateMatch, TemplateRetriever
+from .parser import CodeParser, StreamingCodeParser
+from .ratelimit import RateLimiter, estimate_tokens
+from .singleflight import SingleFlight
 from .validator import CodeValidator
 
+# Bump when _build_prompt changes; cached LLM results are keyed on it
+PROMPT_VERSION = "1"
+
 
 class CodeGenerator:
     """Progressive code generator for AgentScope"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        retriever: Optional[TemplateRetriever] = None,
+        miss_recorder: Optional[MissRecorder] = None,
+        cache: Optional[GenerationCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        rate_limiter: Optional[RateLimiter] = None,
+        single_flight: Optional[SingleFlight] = None,
+        backend: Optional[LLMBackend] = None,
+        revalidate: bool = False,
+        revalidate_below: Optional[float] = None,
+        compose: bool = True
+    ):
         """Initialize generator
 
         Args:
             api_key: DashScope API key (optional, for LLM generation)
+            retriever: Template retriever (optional, e.g. with semantic
+                matching enabled)
+            miss_recorder: Records queries no template matched (optional)
+            cache: Cache of LLM generations (optional)
+            semantic_cache: Near-duplicate lookup tried after an exact
+                cache miss (optional; its store is the default cache)
+            max_concurrency: In-flight LLM calls of agenerate and
+                agenerate_many (per event loop)
+            rate_limiter: Request and token quota for LLM calls of
+                agenerate and agenerate_many (optional)
+            single_flight: Coalesces concurrent LLM generations of the
+                same request (default: within this process)
+            backend: LLM backend (default: DashScope with api_key)
+            revalidate: Stale-while-revalidate: generate() answers with
+                the matched template at once and generates an LLM
+                version in the background, which later identical
+                requests get from the cache (no effect without a cache).
+                Upgrades go through rate_limiter and max_concurrency
+                like agenerate
+            revalidate_below: Only upgrade template matches scoring
+                below this (None: all)
+            compose: Answer requests several templates cover with one
+                example merged from them
         """
-        self.api_key = api_key or os.getenv('DASHSCOPE_API_KEY')
-        self.retriever = TemplateRetriever()
+        if backend is None:
+            backend = DashScopeBackend(api_key or os.getenv('DASHSCOPE_API_KEY'),
+                                       max_connections=max_concurrency)
+        self.backend = backend
+        self.retriever = retriever or TemplateRetriever()
+        self.miss_recorder = miss_recorder
+        if cache is None and semantic_cache is not None:
+            cache = semantic_cache.store
+        self.cache = cache
+        self.semantic_cache = semantic_cache
         self.parser = CodeParser()
         self.validator = CodeValidator()
+        self.composer = TemplateComposer(self.retriever, self.validator) if compose else None
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight if single_flight is not None else SingleFlight()
+        self.revalidate = revalidate
+        self.revalidate_below = revalidate_below
+        # Event loop -> its concurrency limit
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._upgrades: Dict[str, Future] = {}
+        self._upgrades_lock = threading.Lock()
+        # Background event loop running upgrades, and its thread
+        self._upgrade_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._upgrade_thread: Optional[threading.Thread] = None
 
     def has_llm(self) -> bool:
         """Check if LLM generation is available"""
-        return bool(self.api_key)
+        return self.backend.available()
 
     def generate(
         self,
         query: str,
-        complexity: ComplexityLevel = ComplexityLevel.CONCISE
+        complexity: ComplexityLevel = ComplexityLevel.CONCISE,
+        on_upgrade: Optional[Callable[[GeneratedCode], None]] = None
     ) -> GeneratedCode:
         """Generate code with progressive strategy
 
-        Level 1: Try static template first
+        Level 1: Try static template first (composed, if the query
+                 needs several)
         Level 2: Fallback to LLM if configured
+
+        In revalidate mode a template result carries the pending LLM
+        version as its upgrade future, unless a valid one is cached
+        already and returned instead.
+
+        Args:
+            on_upgrade: Called on the worker thread with the LLM version
+                of a template result, if it is valid (revalidate mode only)
         """
         # Level 1: Static template
-        template = self.retriever.match(query)
-        if template:
-            code = self.retriever.get_template_code(template.id, complexity.value)
-            if code:
-                return GeneratedCode(
-                    code=code,
-                    title=template.title,
-                    complexity=complexity,
-                    source="template",
-                    validation=None  # Templates are pre-validated
-                )
+        match = self._match(query)
+        if match:
+            result = self._compose(query, complexity) or self._template_result(
+                match.template, complexity
+            )
+            if result is not None:
+                if self._should_upgrade(match):
+                    return self._revalidate(query, result, on_upgrade)
+                return result
+        self._record_miss(query)
 
         # Level 2: LLM generation
         if self.has_llm():
             return self._generate_llm(query, complexity)
 
         # No template and no API
+        return self._not_available(complexity)
+
+    async def agenerate(
+        self,
+        query: str,
+        complexity: ComplexityLevel = ComplexityLevel.CONCISE
+    ) -> GeneratedCode:
+        """generate() for event-loop callers
+
+        Template matching and reads run on the retriever's I/O thread
+        pool. LLM calls go through the backend's acall (for DashScope a
+        pooled async HTTP client, or the SDK on the default executor
+        without httpx), at most max_concurrency at a time.
+        """
+        template = await self.retriever.amatch(query)
+        if template:
+            if self.composer is not None:
+                loop = asyncio.get_running_loop()
+                composed = await loop.run_in_executor(None, self._compose, query, complexity)
+                if composed is not None:
+                    return composed
+            code = await self.retriever.aget_template_code(template.id, complexity.value)
+            if code:
+                return self._from_template(template, code, complexity)
+        self._record_miss(query)
+
+        if self.has_llm():
+            return await self._agenerate_llm(query, complexity)
+
+        return self._not_available(complexity)
+
+    async def agenerate_many(
+        self,
+        queries: Iterable[str],
+        complexity: ComplexityLevel = ComplexityLevel.CONCISE
+    ) -> AsyncIterator[Tuple[int, GeneratedCode]]:
+        """Generate code for many queries concurrently
+
+        Pooled LLM connections of the running loop are closed when done.
+
+        Yields:
+            (index of the query, result) in completion order
+        """
+        async def run(index: int, query: str) -> Tuple[int, GeneratedCode]:
+            return index, await self.agenerate(query, complexity)
+
+        tasks = [asyncio.ensure_future(run(i, q)) for i, q in enumerate(queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.aclose()
+
+    async def aclose(self):
+        """Close pooled LLM connections of the running loop"""
+        await self.backend.aclose()
+
+    async def agenerate_llm(
+        self,
+        query: str,
+        complexity: ComplexityLevel = ComplexityLevel.CONCISE
+    ) -> GeneratedCode:
+        """LLM generation (cache first) without template matching or miss
+        recording, e.g. to warm the cache"""
+        return await self._agenerate_llm(query, complexity)
+
+    def cached(self, query: str, complexity: ComplexityLevel) -> Optional[GeneratedCode]:
+        """Cached LLM generation of a query (or a paraphrase), without generating"""
+        return self._cached_llm(query, complexity)
+
+    def estimate_tokens(self, query: str, complexity: ComplexityLevel) -> int:
+        """Estimated prompt plus output tokens of an LLM generation"""
+        return estimate_tokens(self._build_prompt(query, complexity), complexity.value)
+
+    def close(self, wait: bool = True):
+        """Stop the background upgrade loop
+
+        Args:
+            wait: Finish queued upgrades first (else they are cancelled)
+        """
+        with self._upgrades_lock:
+            loop, self._upgrade_loop = self._upgrade_loop, None
+            thread, self._upgrade_thread = self._upgrade_thread, None
+            pending = list(self._upgrades.values())
+        if loop is None:
+            return
+        if wait:
+            wait_futures(pending)
+        else:
+            for future in pending:
+                future.cancel()
+        asyncio.run_coroutine_threadsafe(self.backend.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        # Let cancelled upgrades unwind before closing the loop
+        tasks = asyncio.all_tasks(loop)
+        if tasks:
+            loop.run_until_complete(asyncio.wait(tasks))
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+    def _match(self, query: str) -> Optional[TemplateMatch]:
+        """Best scored template match"""
+        matches = self.retriever.match_topk(query, k=1)
+        return matches[0] if matches else None
+
+    def _should_upgrade(self, match: TemplateMatch) -> bool:
+        # Without a cache an upgrade would be paid for and then thrown away
+        return (self.revalidate and self.cache is not None and self.has_llm()
+                and (self.revalidate_below is None or match.score < self.revalidate_below))
+
+    def _revalidate(
+        self,
+        query: str,
+        stale: GeneratedCode,
+        on_upgrade: Optional[Callable[[GeneratedCode], None]]
+    ) -> GeneratedCode:
+        """The cached LLM version of a template result, or the template result
+        with an upgrade scheduled"""
+        upgraded = self._cached_llm(query, stale.complexity)
+        if upgraded is not None and upgraded.is_valid():
+            return upgraded
+
+        stale.upgrade = self._schedule_upgrade(query, stale.complexity)
+        if on_upgrade is not None:
+            def notify(future: Future):
+                if not future.cancelled() and future.result().is_valid():
+                    on_upgrade(future.result())
+
+            stale.upgrade.add_done_callback(notify)
+        return stale
+
+    def _schedule_upgrade(self, query: str, complexity: ComplexityLevel) -> Future:
+        """Pending background LLM generation, started only if none is queued
+
+        Upgrades run as _agenerate_llm on a background event loop, so they
+        take rate_limiter quota and a max_concurrency slot like agenerate.
+        """
+        key = self._flight_key(query, complexity)
+        with self._upgrades_lock:
+            future = self._upgrades.get(key)
+            if future is not None:
+                return future
+            if self._upgrade_loop is None:
+                self._upgrade_loop = asyncio.new_event_loop()
+                self._upgrade_thread = threading.Thread(
+                    target=self._upgrade_loop.run_forever, name="upgrade", daemon=True
+                )
+                self._upgrade_thread.start()
+            future = self._upgrades[key] = asyncio.run_coroutine_threadsafe(
+                self._agenerate_llm(query, complexity), self._upgrade_loop
+            )
+
+        def done(_):
+            with self._upgrades_lock:
+                if self._upgrades.get(key) is future:
+                    del self._upgrades[key]
+
+        # Outside the lock: runs immediately if the upgrade already finished
+        future.add_done_callback(done)
+        return future
+
+    async def _agenerate_llm(self, query: str, complexity: ComplexityLevel) -> GeneratedCode:
+        """_generate_llm without holding a thread for the LLM call"""
+        try:
+            return await self.single_flight.ado(
+                self._flight_key(query, complexity), lambda: self._agenerate_once(query, complexity)
+            )
+        except TimeoutError as e:
+            return self._llm_failed(complexity, e)
+
+    async def _agenerate_once(self, query: str, complexity: ComplexityLevel) -> GeneratedCode:
+        """Cached result or one LLM call, run by the flight leader"""
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self._cached_llm, query, complexity)
+        if cached is not None:
+            return cached
+
+        prompt = self._build_prompt(query, complexity)
+        async with self._get_semaphore():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(estimate_tokens(prompt, complexity.value))
+            try:
+                text = await self.backend.acall(prompt)
+            except ImportError as e:
+                return self._backend_missing(complexity, e)
+            except Exception as e:
+                return self._llm_failed(complexity, e)
+        return await loop.run_in_executor(None, self._from_response, query, complexity, text)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """The running loop's concurrency limit"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _record_miss(self, query: str):
+        """Log a query that no template served"""
+        if self.miss_recorder is not None:
+            self.miss_recorder.record(query)
+
+    def _template_result(self, template, complexity: ComplexityLevel) -> Optional[GeneratedCode]:
+        """Result for a matched template, or None if its code is missing"""
+        code = self.retriever.get_template_code(template.id, complexity.value)
+        return self._from_template(template, code, complexity) if code else None
+
+    def _compose(self, query: str, complexity: ComplexityLevel) -> Optional[GeneratedCode]:
+        """Example merged from the templates a compound query needs, if any"""
+        if self.composer is None:
+            return None
+        composed = self.composer.compose(query, complexity)
+        if composed is None:
+            return None
+        return GeneratedCode(
+            code=composed.code,
+            title=composed.title,
+            complexity=complexity,
+            source="composed",
+            validation=composed.validation
+        )
+
+    def _from_template(self, template, code: str, complexity: ComplexityLevel) -> GeneratedCode:
+        """Result for a matched template"""
+        return GeneratedCode(
+            code=code,
+            title=template.title,
+            complexity=complexity,
+            source="template",
+            validation=None  # Templates are pre-validated
+        )
+
+    def _not_available(self, complexity: ComplexityLevel) -> GeneratedCode:
+        """Result when no template matched and no API key is configured"""
         return GeneratedCode(
             code="",
             title="Not Available",
@@ -70,70 +389,113 @@ class CodeGenerator:
             )
         )
 
+    def generate_stream(
+        self,
+        query: str,
+        complexity: ComplexityLevel = ComplexityLevel.CONCISE
+    ) -> Iterator[Union[str, GeneratedCode]]:
+        """Generate code, yielding lines as soon as they are available
+
+        LLM output is streamed and parsed incrementally, so code lines
+        arrive while the model is still generating. Template and cached
+        results are yielded line by line at once.
+
+        Yields:
+            Code lines (str, without newline), then one GeneratedCode with
+            the complete code and its validation
+        """
+        template = self.retriever.match(query)
+        if template:
+            result = self._compose(query, complexity) or self._template_result(template, complexity)
+            if result is not None:
+                yield from result.code.splitlines()
+                yield result
+                return
+        self._record_miss(query)
+
+        if not self.has_llm():
+            yield self._not_available(complexity)
+            return
+
+        cached = self._cached_llm(query, complexity)
+        if cached is not None:
+            yield from cached.code.splitlines()
+            yield cached
+            return
+
+        stream = StreamingCodeParser()
+        try:
+            for chunk in self.backend.stream(self._build_prompt(query, complexity)):
+                yield from stream.feed(chunk)
+            yield from stream.flush()
+            result = self._from_response(query, complexity, stream.text)
+        except ImportError as e:
+            result = self._backend_missing(complexity, e)
+        except Exception as e:
+            result = self._llm_failed(complexity, e)
+        yield result
+
     def _generate_llm(
         self,
         query: str,
         complexity: ComplexityLevel
     ) -> GeneratedCode:
-        """Generate code using LLM"""
+        """Generate code using LLM
+
+        Concurrent calls for the same request share one generation.
+        """
         try:
-            from dashscope import Generation
-        except ImportError:
-            return GeneratedCode(
-                code="",
-                title="Not Available",
-                complexity=complexity,
-                source="llm",
-                validation=ValidationResult(
-                    status=ValidationStatus.FAILED,
-                    message="DashScope not installed",
-                    error="Run: pip install dashscope"
-                )
+            return self.single_flight.do(
+                self._flight_key(query, complexity), lambda: self._generate_once(query, complexity)
             )
+        except TimeoutError as e:
+            return self._llm_failed(complexity, e)
 
-        # Build prompt
-        prompt = self._build_prompt(query, complexity)
+    def _generate_once(self, query: str, complexity: ComplexityLevel) -> GeneratedCode:
+        """Cached result or one LLM call, run by the flight leader
+
+        The cache is checked inside the flight, so a leader that waited
+        for another process's flight finds its result.
+        """
+        cached = self._cached_llm(query, complexity)
+        if cached is not None:
+            return cached
+        return self._call_llm(query, complexity)
 
-        # Call LLM
+    def _call_llm(self, query: str, complexity: ComplexityLevel) -> GeneratedCode:
+        """One blocking backend call, parsed, validated and cached"""
         try:
-            response = Generation.call(
-                model="qwen-max",
-                api_key=self.api_key,
-                prompt=prompt,
-                temperature=0.7,
-                result_format='text',
-            )
+            text = self.backend.call(self._build_prompt(query, complexity))
+        except ImportError as e:
+            return self._backend_missing(complexity, e)
+        except Exception as e:
+            return self._llm_failed(complexity, e)
+        return self._from_response(query, complexity, text)
 
-            if response.status_code != 200:
-                raise Exception(f"API error: {response.message}")
-
-            # Parse response
-            parsed, error = self.parser.parse(response.output.text)
-            if not parsed:
-                return GeneratedCode(
-                    code="",
-                    title="Generation Failed",
-                    complexity=complexity,
-                    source="llm",
-                    validation=ValidationResult(
-                        status=ValidationStatus.FAILED,
-                        message="Failed to parse LLM response",
-                        error=error
-                    )
-                )
+    def _cache_args(self) -> tuple:
+        return self.backend.model, PROMPT_VERSION, self.validator.VERSION
 
-            # Validate code
-            validation = self.validator.validate(parsed.code)
+    def _flight_key(self, query: str, complexity: ComplexityLevel) -> str:
+        return cache_key(query, complexity.value, *self._cache_args())
 
-            return GeneratedCode(
-                code=parsed.code,
-                title=parsed.title,
-                complexity=complexity,
-                source="llm",
-                validation=validation
-            )
+    def _cached_llm(self, query: str, complexity: ComplexityLevel) -> Optional[GeneratedCode]:
+        """Earlier generation of this query (or a paraphrase), if cached
 
-        except Exception as e:
+        Failed entries (e.g. stored by an older version) count as misses.
+        """
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.get(query, complexity, *self._cache_args())
+        if cached is None and self.semantic_cache is not None:
+            cached = self.semantic_cache.get(query, complexity, *self._cache_args())
+        if cached is not None and _failed(cached):
+            return None
+        return cached
+
+    def _from_response(self, query: str, complexity: ComplexityLevel, text: str) -> GeneratedCode:
+        """Parse, validate and cache an LLM response"""
+        parsed, error = self.parser.parse(text)
+        if not parsed:
             return GeneratedCode(
                 code="",
                 title="Generation Failed",
@@ -141,11 +503,52 @@ class CodeGenerator:
                 source="llm",
                 validation=ValidationResult(
                     status=ValidationStatus.FAILED,
-                    message=f"LLM generation failed",
-                    error=str(e)
+                    message="Failed to parse LLM response",
+                    error=error
                 )
             )
 
+        # Validate code
+        validation = self.validator.validate(parsed.code)
+
+        result = GeneratedCode(
+            code=parsed.code,
+            title=parsed.title,
+            complexity=complexity,
+            source="llm",
+            validation=validation
+        )
+        # Code that failed validation is regenerated next time, not served
+        if self.cache is not None and validation.status != ValidationStatus.FAILED:
+            self.cache.put(query, result, *self._cache_args())
+        return result
+
+    def _backend_missing(self, complexity: ComplexityLevel, error: ImportError) -> GeneratedCode:
+        return GeneratedCode(
+            code="",
+            title="Not Available",
+            complexity=complexity,
+            source="llm",
+            validation=ValidationResult(
+                status=ValidationStatus.FAILED,
+                message=f"{self.backend.name} backend not installed",
+                error=str(error)
+            )
+        )
+
+    def _llm_failed(self, complexity: ComplexityLevel, error: Exception) -> GeneratedCode:
+        return GeneratedCode(
+            code="",
+            title="Generation Failed",
+            complexity=complexity,
+            source="llm",
+            validation=ValidationResult(
+                status=ValidationStatus.FAILED,
+                message="LLM generation failed",
+                error=str(error)
+            )
+        )
+
     def _build_prompt(self, query: str, complexity: ComplexityLevel) -> str:
         """Build LLM prompt for code generation"""
         complexity_guide = {
@@ -177,3 +580,7 @@ Do not include any explanation outside the JSON."""
     def list_templates(self) -> list:
         """List all available templates"""
         return list(self.retriever.templates.values())
+
+
+def _failed(result: GeneratedCode) -> bool:
+    return result.validation is not None and result.validation.status == ValidationStatus.FAILED
@@ -0,0 +1,134 @@
+"""llm_client.py - Async DashScope text generation over pooled HTTP
+
+The dashscope SDK call blocks its thread for the whole generation.
+AsyncDashScopeClient posts to the same REST endpoint with one
+httpx.AsyncClient per event loop, so concurrent generations share
+keep-alive connections instead of holding a thread each. Requires httpx
+(optional dependency); without it CodeGenerator runs the SDK call on a
+worker thread.
+"""
+
+import asyncio
+import weakref
+from typing import Dict
+
+from .errors import LLMGenerationError
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - exercised only without httpx
+    httpx = None
+
+DASHSCOPE_URL = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
+
+# In-flight LLM calls per generator, and pooled connections per client
+DEFAULT_CONCURRENCY = 8
+
+
+def has_httpx() -> bool:
+    """Check if httpx is installed"""
+    return httpx is not None
+
+
+class AsyncDashScopeClient:
+    """DashScope text generation over a pooled, keep-alive httpx client"""
+
+    def __init__(
+        self,
+        url: str = DASHSCOPE_URL,
+        max_connections: int = DEFAULT_CONCURRENCY,
+        timeout: float = 120.0
+    ):
+        """Initialize client
+
+        Args:
+            url: Text generation endpoint
+            max_connections: Connections kept open per event loop
+            timeout: Seconds to wait for a response
+
+        Raises:
+            ImportError: If httpx is not installed
+        """
+        if httpx is None:
+            raise ImportError("httpx is required for async generation (pip install httpx)")
+        self.url = url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        # Event loop -> its pooled client; httpx clients cannot cross event loops
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # Client -> calls in flight, and clients to close when their last call ends
+        self._in_flight: Dict[object, int] = {}
+        self._closing = set()
+
+    def _get_client(self):
+        """The running loop's pooled client"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+            )
+        return client
+
+    async def call(
+        self,
+        model: str,
+        api_key: str,
+        prompt: str,
+        temperature: float = 0.7,
+        result_format: str = "text"
+    ) -> str:
+        """Generated text for a prompt
+
+        Takes the same arguments as dashscope Generation.call.
+
+        Raises:
+            LLMGenerationError: On an API error or malformed response
+        """
+        client = self._get_client()
+        self._in_flight[client] = self._in_flight.get(client, 0) + 1
+        try:
+            response = await client.post(
+                self.url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json={
+                    "model": model,
+                    "input": {"prompt": prompt},
+                    "parameters": {"temperature": temperature, "result_format": result_format},
+                },
+            )
+        finally:
+            self._in_flight[client] -= 1
+            if not self._in_flight[client]:
+                del self._in_flight[client]
+                if client in self._closing:
+                    self._closing.discard(client)
+                    await client.aclose()
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code != 200:
+            raise LLMGenerationError(f"API error {response.status_code}: {data.get('message', '')}")
+        try:
+            return data["output"]["text"]
+        except (KeyError, TypeError):
+            raise LLMGenerationError("API error: response has no output text")
+
+    async def aclose(self):
+        """Close pooled connections of the running loop's client
+
+        Calls still in flight on it finish first; the last one closes it.
+        Later calls on the loop open a new client.
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is None:
+            return
+        if client in self._in_flight:
+            self._closing.add(client)
+        else:
+            await client.aclose()
@@ -0,0 +1,123 @@
+"""normalize.py - Token normalization shared by keywords and queries
+
+English tokens are reduced by a light suffix stemmer (agents -> agent,
+memories -> memory, streamed/streaming -> stream) and then mapped through
+a synonym table to the word the templates use as a keyword. Chinese text
+is scanned for synonym phrases, each adding the canonical keyword.
+
+Keywords and queries go through the same functions, so a stem only has
+to be consistent, not a real word ("pipeline" -> "pipelin"). Every lookup
+is a dict access; stems are memoized.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterator
+
+# English variants -> keyword used in metadata_index.json
+SYNONYMS: Dict[str, str] = {
+    "chatbot": "chat",
+    "conversational": "chat",
+    "multiagent": "multi",
+    "debate": "multi",
+    "discuss": "multi",
+    "sub": "subagent",
+    "delegate": "subagent",
+    "delegation": "subagent",
+    "mem": "memory",
+    "persistent": "longterm",
+    "persist": "longterm",
+    "persistence": "longterm",
+    "reasoning": "react",
+    "reason": "react",
+    "hub": "msghub",
+    "broadcast": "msghub",
+    "workflow": "pipeline",
+    "chain": "pipeline",
+    "realtime": "streaming",
+    "retrieval": "rag",
+    "retrieve": "rag",
+    "vector": "rag",
+    "plugin": "tool",
+}
+
+# Chinese phrases -> keyword used in metadata_index.json
+CJK_SYNONYMS: Dict[str, str] = {
+    "聊天机器人": "聊天",
+    "对话机器人": "对话",
+    "回忆": "记忆",
+    "持久化": "存储",
+    "子智能体": "子",
+    "主从": "层级",
+    "多智能体": "多agent",
+    "群聊": "消息中心",
+    "管道": "流水线",
+    "串行": "顺序",
+    "向量数据库": "向量",
+    "知识检索": "检索",
+    "函数调用": "函数",
+    "流输出": "流式",
+    "智能体技能": "技能",
+}
+
+# Words whose trailing "s" is not a plural
+_KEEP_S = {"news", "series", "species", "always", "perhaps", "alias", "bias", "status", "analysis"}
+
+_VOWELS = set("aeiouy")
+
+_CJK_SYNONYM_LENGTHS = sorted({len(phrase) for phrase in CJK_SYNONYMS}, reverse=True)
+
+
+def stem(word: str) -> str:
+    """Strip common English inflections from a lowercase ASCII word
+
+    Non-alphabetic and short words are returned unchanged.
+    """
+    if len(word) <= 3 or not word.isalpha() or not word.isascii() or word in _KEEP_S:
+        return word
+
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith(("sses", "ches", "shes", "xes", "zes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    elif word.endswith("ing") and len(word) >= 7 and _VOWELS & set(word[:-3]):
+        word = _undouble(word[:-3])
+    elif word.endswith("ed") and len(word) >= 6 and _VOWELS & set(word[:-2]):
+        word = _undouble(word[:-2])
+
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def _undouble(word: str) -> str:
+    """running -> runn -> run"""
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz" + "aeiou":
+        return word[:-1]
+    return word
+
+
+_SYNONYM_STEMS = {stem(variant): stem(keyword) for variant, keyword in SYNONYMS.items()}
+
+
+@lru_cache(maxsize=65536)
+def normalize_token(word: str) -> str:
+    """Stem a token and map it to its canonical keyword"""
+    stemmed = stem(word)
+    return _SYNONYM_STEMS.get(stemmed, stemmed)
+
+
+def cjk_synonyms(run: str) -> Iterator[str]:
+    """Canonical keywords of synonym phrases found in a CJK run"""
+    for i in range(len(run)):
+        for n in _CJK_SYNONYM_LENGTHS:
+            keyword = CJK_SYNONYMS.get(run[i:i + n])
+            if keyword is not None:
+                yield keyword
+                break
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and collapse whitespace"""
+    return " ".join(query.lower().split())
@@ -6,7 +6,13 @@ Simplified version - extracts code only, no tutorial fields.
 import json
 import re
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
+
+_CODE_KEY_RE = re.compile(r'"code"\s*:\s*"')
+_FENCE_RE = re.compile(r'```([A-Za-z0-9_+-]*)[ \t]*\r?\n')
+_JSON_SPECIAL_RE = re.compile(r'[\\"]')
+_HEX4_RE = re.compile(r'[0-9A-Fa-f]{4}')
+_JSON_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '/': '/', '\\': '\\', '"': '"'}
 
 
 @dataclass
@@ -118,3 +124,148 @@ class CodeParser:
             return m.group(1).strip()
 
         return 'Generated Code'
+
+
+class StreamingCodeParser:
+    """Incremental code extraction from a streamed LLM response
+
+    feed() returns code lines as soon as they are complete: once the
+    JSON "code" string or a (non-JSON) code fence has opened, whichever
+    comes first. The final result should still come from
+    CodeParser.parse(text), which sees the whole response.
+
+    Chunks are kept in a list and joined only when text is read. Scanning
+    works on _buf, which holds just the part not consumed yet (the text
+    before the code start, an incomplete escape or line), so each chunk
+    costs time in its own length rather than the response's.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._text: Optional[str] = ""
+        # None: looking for the code start; "json" / "fence": in code; "done"
+        self._mode: Optional[str] = None
+        # Unconsumed response text, and the scan position in it
+        self._buf = ""
+        self._pos = 0
+        self._pending = ""
+
+    @property
+    def text(self) -> str:
+        """The response received so far"""
+        if self._text is None:
+            self._text = "".join(self._chunks)
+        return self._text
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk of the response, return newly completed code lines"""
+        self._chunks.append(chunk)
+        self._text = None
+        if self._mode == "done":
+            return []
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        if self._mode is None:
+            self._find_start()
+        if self._mode == "json":
+            return self._lines(self._read_json())
+        if self._mode == "fence":
+            return self._lines(self._read_fence(final=False))
+        return []
+
+    def flush(self) -> List[str]:
+        """End of response: return the last, unterminated code line"""
+        if self._mode == "fence":
+            self._pending += self._read_fence(final=True)
+        elif self._mode == "json":
+            self._pending += self._read_json()
+        line, self._pending = self._pending, ""
+        return [line] if line else []
+
+    def _find_start(self):
+        key = _CODE_KEY_RE.search(self._buf)
+        fence = next((m for m in _FENCE_RE.finditer(self._buf)
+                      if m.group(1).lower() != "json"), None)
+        if key and (fence is None or key.start() < fence.start()):
+            self._mode, self._pos = "json", key.end()
+        elif fence:
+            self._mode, self._pos = "fence", fence.end()
+
+    def _read_json(self) -> str:
+        """Decode the JSON string from _pos up to its end or an incomplete escape"""
+        out = []
+        text = self._buf
+        while True:
+            m = _JSON_SPECIAL_RE.search(text, self._pos)
+            if m is None:
+                out.append(text[self._pos:])
+                self._pos = len(text)
+                break
+            out.append(text[self._pos:m.start()])
+            if m.group(0) == '"':
+                self._mode, self._pos = "done", m.end()
+                break
+            escape = self._json_escape(m.start())
+            if escape is None:
+                self._pos = m.start()
+                break
+            decoded, self._pos = escape
+            out.append(decoded)
+        return "".join(out)
+
+    def _json_escape(self, start: int) -> Optional[Tuple[str, int]]:
+        """(decoded text, end) of the escape at start, or None if incomplete"""
+        text = self._buf
+        if start + 1 >= len(text):
+            return None
+        kind = text[start + 1]
+        if kind != 'u':
+            return _JSON_ESCAPES.get(kind, kind), start + 2
+        end = start + 6
+        if end > len(text):
+            return None
+        if not _HEX4_RE.fullmatch(text, start + 2, end):
+            # Malformed: drop the "\u" and read on, so a closing quote still ends the string
+            return "", start + 2
+        if 0xD800 <= int(text[start + 2:end], 16) < 0xDC00:
+            # High surrogate: decode together with the low half
+            if end + 6 > len(text):
+                return None
+            if text[end:end + 2] == '\\u':
+                end += 6
+        try:
+            return json.loads('"' + text[start:end] + '"'), end
+        except (json.JSONDecodeError, ValueError):
+            return "", end
+
+    def _read_fence(self, final: bool) -> str:
+        """Complete lines from _pos up to the closing fence"""
+        out = []
+        text = self._buf
+        while self._mode == "fence":
+            newline = text.find("\n", self._pos)
+            if newline == -1:
+                if final and self._pos < len(text):
+                    line = text[self._pos:]
+                    self._pos = len(text)
+                    if not line.lstrip().startswith("```"):
+                        out.append(line)
+                break
+            line = text[self._pos:newline + 1]
+            self._pos = newline + 1
+            if line.lstrip().startswith("```"):
+                self._mode = "done"
+            else:
+                out.append(line)
+        return "".join(out)
+
+    def _lines(self, decoded: str) -> List[str]:
+        """Split decoded code into complete lines, keeping the remainder"""
+        if not decoded:
+            return []
+        lines = (self._pending + decoded).split("\n")
+        self._pending = lines.pop()
+        if self._mode == "done" and self._pending:
+            lines.append(self._pending)
+            self._pending = ""
+        return [line.rstrip("\r") for line in lines]
@@ -0,0 +1,105 @@
+"""ratelimit.py - Token-bucket limits on LLM requests and tokens per minute
+
+DashScope quotas are per minute, on both requests and tokens. A
+RateLimiter holds one bucket for each; an LLM call takes one request and
+its estimated tokens, waiting until both buckets have refilled enough.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Optional
+
+# Expected output tokens per complexity level
+OUTPUT_TOKENS = {"minimal": 600, "concise": 1500, "complete": 3000}
+
+
+def estimate_tokens(prompt: str, complexity: str = "concise") -> int:
+    """Rough prompt plus output tokens of one generation
+
+    About four ASCII characters per token; other characters (CJK) count
+    one token each.
+    """
+    ascii_chars = sum(ch.isascii() for ch in prompt)
+    prompt_tokens = ascii_chars // 4 + (len(prompt) - ascii_chars)
+    return prompt_tokens + OUTPUT_TOKENS.get(complexity, OUTPUT_TOKENS["concise"])
+
+
+class TokenBucket:
+    """Continuously refilling bucket of rate_per_minute tokens"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """Initialize bucket
+
+        Args:
+            rate_per_minute: Refill rate
+            capacity: Maximum burst (default: one minute of tokens)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if they are now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount: float):
+        """Remove tokens; the balance goes negative for amounts over capacity"""
+        self._refill()
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one process"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ):
+        """Initialize limiter
+
+        Args:
+            requests_per_minute: Request quota (None: unlimited)
+            tokens_per_minute: Token quota (None: unlimited)
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        # Event loop -> lock queueing its callers; buckets are shared by all loops
+        self._locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._buckets_lock = threading.Lock()
+
+    async def acquire(self, tokens: int = 0):
+        """Wait for one request and tokens of quota, then take them
+
+        Callers on one event loop are served one at a time, in arrival
+        order. Several loops (e.g. the generator's upgrade loop) share the
+        quota.
+        """
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        async with lock:
+            while True:
+                with self._buckets_lock:
+                    delay = max(
+                        self.requests.wait_time(1) if self.requests else 0.0,
+                        self.tokens.wait_time(tokens) if self.tokens else 0.0,
+                    )
+                    if delay <= 0:
+                        if self.requests:
+                            self.requests.take(1)
+                        if self.tokens:
+                            self.tokens.take(tokens)
+                        return
+                await asyncio.sleep(delay)
@@ -3,11 +3,78 @@
 Simplified version of tutorial_generator/retriever.py
 """
 
+import asyncio
+import functools
+import heapq
 import json
+import logging
 import os
 import re
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from . import archive, catalog
+from .fuzzy import SymmetricDeleteIndex
+from .normalize import cjk_synonyms, normalize_token
+from .sections import SectionIndex, build_section_index, read_sections, select_sections
+from .semantic import SemanticIndex, has_numpy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Continuous run of CJK ideographs
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]+')
+
+# CJK n-gram sizes and the score each overlapping n-gram contributes.
+# A CJK keyword that is itself an indexed n-gram scores like an exact hit.
+NGRAM_WEIGHTS = {2: 0.5, 3: 1.0}
+KEYWORD_WEIGHT = 1.0
+
+# Minimum score for a template to count as a match
+MATCH_THRESHOLD = 1.0
+
+# Default minimum embedding similarity of a semantic match. On the labeled
+# "paraphrase" split of scripts/corpus/retriever_queries.jsonl (see
+# scripts/bench_semantic.py) every value from 0.125 to 0.16 serves no
+# off-topic query; 0.12 and below start serving them. The embedding is
+# lexical, so most paraphrases without a template keyword still go to the
+# LLM: "agent that remembers past sessions" scores 0.120 against
+# long_term_memory, below "connect to a postgres database" at 0.123.
+SEMANTIC_MATCH_THRESHOLD = 0.15
+
+STOPWORDS = {'how', 'to', 'use', 'the', 'a', 'an', 'for', 'with', '如何', '怎么', '使用'}
+
+METADATA_FILE = "metadata_index.json"
+
+# Upper bound on dense score cells (queries x templates) per match_batch chunk
+BATCH_CELL_BUDGET = 4_000_000
+
+# Total posting length above which a query is scored with numpy bincount
+DENSE_SCORING_MIN = 2048
+
+# Template files, one per complexity level
+COMPLEXITY_LEVELS = ("minimal", "concise", "complete")
+
+# Default number of cached match_topk results
+RESULT_CACHE_SIZE = 4096
+
+# Threads for async template I/O, shared by all retrievers
+IO_WORKERS = 8
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_executor_lock = threading.Lock()
 
 
 @dataclass
@@ -20,70 +87,997 @@ class TemplateInfo:
     concise_path: str
     minimal_path: Optional[str] = None
     complete_path: Optional[str] = None
+    difficulty: str = ""
+    priority: int = 0
+    description: str = ""
+    # Complexity level -> content hash of its file (see get_template_code_if_changed)
+    content_hashes: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class TemplateCode:
+    """Result of a conditional template fetch"""
+    etag: str
+    modified: bool
+    code: Optional[str] = None  # only set when modified
+
+
+@dataclass
+class TemplateMatch:
+    """Scored template match"""
+    template: TemplateInfo
+    score: float
+
+
+class _IndexRow(NamedTuple):
+    """Compact per-template index record (one per template, kept in memory)"""
+    id: str
+    title: str
+    category: str
+    difficulty: str
+    priority: int
+    keywords: Tuple[str, ...]
+    description: Optional[str]  # None: read from the catalog shard
+    shard: Optional[str]
+
+
+@dataclass
+class _IndexSnapshot:
+    """One consistent version of the index
+
+    Never mutated after publication except for the lazily filled caches
+    (infos, contents, sections, hashes, term_matrix, results); reloads build a new snapshot and swap
+    it in. Templates are addressed by ordinals that stay stable across
+    incremental updates; removed templates leave a None slot in ids.
+    """
+    entries: Dict[str, _IndexRow] = field(default_factory=dict)
+    ids: List[Optional[str]] = field(default_factory=list)  # ordinal -> id
+    ordinals: Dict[str, int] = field(default_factory=dict)
+    priorities: array = field(default_factory=lambda: array('i'))
+    # keyword -> template ordinals
+    keyword_index: Dict[str, array] = field(default_factory=dict)
+    # CJK n-gram -> (template ordinals, weights), built from keywords and titles
+    ngram_index: Dict[str, Tuple[array, array]] = field(default_factory=dict)
+    # Filter bitsets over template ordinals
+    category_bits: Dict[str, int] = field(default_factory=dict)
+    difficulty_bits: Dict[str, int] = field(default_factory=dict)
+    # Materialized TemplateInfo objects, filled on first access
+    infos: Dict[str, TemplateInfo] = field(default_factory=dict)
+    # Template file path -> source, filled on first read
+    contents: Dict[str, str] = field(default_factory=dict)
+    # Template file path -> top-level section index
+    sections: Dict[str, SectionIndex] = field(default_factory=dict)
+    # Template file path -> (content hash, mtime_ns, size) it was computed at
+    hashes: Dict[str, Tuple[str, int, int]] = field(default_factory=dict)
+    semantic_index: Optional[SemanticIndex] = None
+    # (keyword columns, n-gram columns, CSR term-template matrix), built on first batch
+    term_matrix: Optional[tuple] = None
+    # Symmetric-delete dictionary over keyword_index for typo correction
+    fuzzy_index: Optional[SymmetricDeleteIndex] = None
+    # (sorted query tokens, k, filters) -> matches, most recently used last
+    results: OrderedDict = field(default_factory=OrderedDict)
+    # Archive the template files are read from; a replaced archive stays
+    # open until the last snapshot referring to it is dropped
+    source_archive: Optional[archive.TemplateArchive] = None
+
+
+class _TemplateView(Mapping):
+    """Read-only {id: TemplateInfo} view that materializes entries lazily"""
+
+    def __init__(self, retriever: "TemplateRetriever", snap: _IndexSnapshot):
+        self._retriever = retriever
+        self._snap = snap
+
+    def __getitem__(self, tpl_id: str) -> TemplateInfo:
+        if tpl_id not in self._snap.ordinals:
+            raise KeyError(tpl_id)
+        return self._retriever._info(self._snap, tpl_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return (tpl_id for tpl_id in self._snap.ids if tpl_id is not None)
+
+    def __len__(self) -> int:
+        return len(self._snap.ordinals)
+
+    def __contains__(self, tpl_id) -> bool:
+        return tpl_id in self._snap.ordinals
 
 
 class TemplateRetriever:
-    """Fast template matching by keywords"""
+    """Fast template matching by keywords
+
+    Index state lives in an immutable snapshot that lookups read once per
+    call. refresh() builds the next snapshot incrementally and swaps the
+    reference, so lookups never wait for a reload.
+
+    Templates come from metadata_index.json, or from a sharded catalog
+    (see catalog.py) when <templates_dir>/catalog/manifest.json exists.
+    When <templates_dir>/templates.tpa exists, metadata and template
+    files are read from that compressed archive instead (see archive.py).
+    """
 
-    def __init__(self, templates_dir: str = None):
+    def __init__(
+        self,
+        templates_dir: str = None,
+        cjk_ngrams: bool = True,
+        semantic: bool = False,
+        semantic_threshold: float = SEMANTIC_MATCH_THRESHOLD,
+        fuzzy: bool = True,
+        fuzzy_max_distance: int = 2,
+        fuzzy_budget_ms: float = 2.0,
+        cache_size: int = RESULT_CACHE_SIZE,
+        section_index: bool = True,
+        normalize: bool = True
+    ):
+        """Initialize retriever
+
+        Args:
+            templates_dir: Templates root containing metadata_index.json
+                or a catalog/ directory
+            cjk_ngrams: Score CJK queries by overlapping character n-grams
+            semantic: Fall back to offline embedding similarity when no
+                keyword matches (requires numpy)
+            semantic_threshold: Minimum cosine similarity for a semantic
+                match to be served instead of going to the LLM (see
+                SEMANTIC_MATCH_THRESHOLD for how the default was chosen
+                and what it misses)
+            fuzzy: Correct misspelled query words against the keyword
+                vocabulary when exact matching finds nothing
+            fuzzy_max_distance: Maximum edit distance of a correction
+            fuzzy_budget_ms: Time cap for typo correction per query
+            cache_size: Maximum cached match results (0 disables caching)
+            section_index: Parse template files into sections at load
+                time for get_template_section()
+            normalize: Stem English words and map synonyms (see
+                normalize.py) in both keywords and queries
+        """
         if templates_dir is None:
             templates_dir = os.path.join(
                 os.path.dirname(__file__),
                 "..", "references", "templates"
             )
         self.templates_dir = os.path.expanduser(templates_dir)
-        self.templates: Dict[str, TemplateInfo] = {}
-        self.keyword_index: Dict[str, List[str]] = {}
+        self._archive: Optional[archive.TemplateArchive] = None
+        if archive.has_archive(self.templates_dir):
+            self._archive = archive.TemplateArchive(archive.archive_path(self.templates_dir))
+        self.use_catalog = self._archive is None and catalog.has_catalog(self.templates_dir)
+        self.cjk_ngrams = cjk_ngrams
+        self.normalize = normalize
+        self.semantic = semantic
+        if semantic and not has_numpy():
+            logger.warning("numpy not installed, semantic matching disabled")
+            self.semantic = False
+        self.semantic_threshold = semantic_threshold
+        self.fuzzy = fuzzy
+        self.fuzzy_max_distance = fuzzy_max_distance
+        self.fuzzy_budget_ms = fuzzy_budget_ms
+        self.cache_size = cache_size
+        self.section_index = section_index
+        self._cache_lock = threading.Lock()
+        self._cache_stats = {"hits": 0, "misses": 0, "negative_hits": 0}
+        self._write_lock = threading.Lock()
+        # Catalog shards loaded so far: shard file -> {id: full entry}
+        self._shards: Dict[str, Dict[str, dict]] = {}
+        self._shard_lock = threading.Lock()
+        # (snapshot id, file path) -> pending read on the I/O pool
+        self._inflight: Dict[Tuple[int, str], Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._snapshot = _IndexSnapshot()
         self._load_templates()
 
+    @classmethod
+    async def acreate(cls, *args, **kwargs) -> "TemplateRetriever":
+        """Construct a retriever without blocking the event loop
+
+        Reading and indexing the templates runs on the I/O thread pool.
+        Takes the same arguments as TemplateRetriever().
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_io_executor(), functools.partial(cls, *args, **kwargs))
+
+    # Read-only views of the current snapshot
+    @property
+    def templates(self) -> Mapping:
+        return _TemplateView(self, self._snapshot)
+
+    @property
+    def keyword_index(self) -> Dict[str, array]:
+        return self._snapshot.keyword_index
+
+    @property
+    def ngram_index(self) -> Dict[str, Tuple[array, array]]:
+        return self._snapshot.ngram_index
+
+    @property
+    def category_bits(self) -> Dict[str, int]:
+        return self._snapshot.category_bits
+
+    @property
+    def difficulty_bits(self) -> Dict[str, int]:
+        return self._snapshot.difficulty_bits
+
+    @property
+    def semantic_index(self) -> Optional[SemanticIndex]:
+        return self._snapshot.semantic_index
+
+    @property
+    def use_archive(self) -> bool:
+        return self._archive is not None
+
+    @property
+    def loaded_shards(self) -> List[str]:
+        """Catalog shard files read so far"""
+        return list(self._shards)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Result cache counters since creation, plus the current size
+
+        negative_hits counts cache hits for queries known to match nothing.
+        """
+        with self._cache_lock:
+            return dict(self._cache_stats, size=len(self._snapshot.results),
+                        maxsize=self.cache_size)
+
     def _load_templates(self):
-        """Load metadata from metadata_index.json"""
-        index_path = os.path.join(self.templates_dir, "metadata_index.json")
-        if not os.path.exists(index_path):
+        """Load metadata from metadata_index.json or the catalog manifest"""
+        with self._write_lock:
+            self._snapshot = self._apply_changes(
+                _IndexSnapshot(), self._read_metadata(), changed_paths=()
+            )
+
+    def _index_path(self) -> str:
+        if self._archive is not None:
+            return self._archive.path
+        if self.use_catalog:
+            return catalog.manifest_path(self.templates_dir)
+        return os.path.join(self.templates_dir, METADATA_FILE)
+
+    def _read_metadata(self) -> Dict[str, _IndexRow]:
+        """Read index rows keyed by id, with repeated strings interned"""
+        index_path = self._index_path()
+        if self._archive is not None:
+            if METADATA_FILE not in self._archive:
+                return {}
+            rows = json.loads(self._archive.read(METADATA_FILE)).get("templates", [])
+        elif not os.path.exists(index_path):
+            return {}
+        elif self.use_catalog:
+            rows = catalog.read_manifest(self.templates_dir)
+        else:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                rows = json.load(f).get("templates", [])
+
+        entries = {}
+        for row in rows:
+            tpl_id = sys.intern(row.get("id", ""))
+            entries[tpl_id] = _IndexRow(
+                id=tpl_id,
+                title=row.get("title", ""),
+                category=sys.intern(row.get("category", "")),
+                difficulty=sys.intern(row.get("difficulty", "")),
+                priority=row.get("priority", 0),
+                keywords=tuple(sys.intern(kw) for kw in row.get("keywords", [])),
+                description=None if self.use_catalog else row.get("description", ""),
+                shard=sys.intern(row["shard"]) if "shard" in row else None,
+            )
+        return entries
+
+    def refresh(self, changed_paths: Iterable[str] = ()) -> bool:
+        """Apply on-disk changes to the index
+
+        Re-reads metadata_index.json (or the catalog manifest) when it is
+        among changed_paths, or when no paths are given, and applies only
+        the resulting template additions, removals and updates. Cached
+        contents of changed template files and changed catalog shards are
+        dropped. A replaced archive is reopened and all cached contents
+        and content hashes are dropped, so a new snapshot is always
+        published. Lookups keep using the previous snapshot, and the
+        archive it reads from, until the new one is swapped in.
+
+        Args:
+            changed_paths: Files that were added, modified or deleted
+
+        Returns:
+            bool: True if a new snapshot was published
+        """
+        changed_paths = {os.path.abspath(p) for p in changed_paths}
+        index_path = os.path.abspath(self._index_path())
+
+        with self._write_lock:
+            current = self._snapshot
+            replaced = False
+            if not changed_paths or index_path in changed_paths:
+                opened = self._archive
+                try:
+                    if opened is not None and not opened.is_current():
+                        self._archive = archive.TemplateArchive(index_path)
+                        replaced = True
+                        # Every file may differ, even if metadata did not change
+                        changed_paths |= (current.contents.keys() | current.sections.keys()
+                                          | current.hashes.keys())
+                        changed_paths.add(index_path)
+                    entries = self._read_metadata()
+                except (OSError, ValueError) as e:
+                    # Half-written file; keep serving the old index
+                    if self._archive is not opened:
+                        self._archive.close()
+                    self._archive = opened
+                    logger.warning(f"Failed to reload {os.path.basename(index_path)}: {e}")
+                    return False
+            else:
+                entries = current.entries
+
+            if not replaced and entries == current.entries and not changed_paths - {index_path}:
+                return False
+            # The replaced archive is not closed here: lookups may still hold
+            # snapshots reading from it. It closes once the last one is dropped.
+            self._snapshot = self._apply_changes(current, entries, changed_paths)
+            return True
+
+    async def arefresh(self, changed_paths: Iterable[str] = ()) -> bool:
+        """refresh() on the I/O thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_io_executor(), self.refresh, list(changed_paths))
+
+    def _apply_changes(
+        self,
+        old: _IndexSnapshot,
+        entries: Dict[str, _IndexRow],
+        changed_paths: Iterable[str]
+    ) -> _IndexSnapshot:
+        """Build the next snapshot from old plus a new set of index rows
+
+        Posting arrays are copied only for keywords and n-grams of templates
+        that were added, removed or updated; everything else is shared
+        with the old snapshot.
+        """
+        removed = [tpl_id for tpl_id in old.entries if tpl_id not in entries]
+        updated = [tpl_id for tpl_id, tpl in entries.items()
+                   if tpl_id in old.entries and old.entries[tpl_id] != tpl]
+        added = [tpl_id for tpl_id in entries if tpl_id not in old.entries]
+
+        ids = list(old.ids)
+        ordinals = dict(old.ordinals)
+        priorities = array('i', old.priorities)
+        keyword_index = dict(old.keyword_index)
+        ngram_index = dict(old.ngram_index)
+        copied_keywords, copied_ngrams = set(), set()
+        stale_paths = {os.path.abspath(p) for p in changed_paths}
+        stale_ids = set(removed) | set(updated)
+
+        # Changed catalog shards: forget the parsed shard and its templates
+        catalog_dir = os.path.abspath(os.path.join(self.templates_dir, catalog.CATALOG_DIR))
+        stale_shards = {os.path.basename(p) for p in stale_paths
+                        if os.path.dirname(p) == catalog_dir}
+        if stale_shards:
+            with self._shard_lock:
+                for shard_file in stale_shards:
+                    self._shards.pop(shard_file, None)
+            stale_ids.update(tpl_id for tpl_id, row in entries.items()
+                             if row.shard in stale_shards)
+
+        # Drop postings of removed and updated templates
+        for tpl_id in removed + updated:
+            row = old.entries[tpl_id]
+            ordinal = ordinals[tpl_id]
+            stale_paths.update(self._template_paths(row))
+            for kw in self._row_keywords(row):
+                remaining = array('I', (o for o in keyword_index.get(kw, ()) if o != ordinal))
+                copied_keywords.add(kw)
+                if remaining:
+                    keyword_index[kw] = remaining
+                else:
+                    keyword_index.pop(kw, None)
+            for gram in self._row_ngrams(row):
+                postings, weights = ngram_index.get(gram, (array('I'), array('f')))
+                keep = [i for i, o in enumerate(postings) if o != ordinal]
+                copied_ngrams.add(gram)
+                if keep:
+                    ngram_index[gram] = (array('I', (postings[i] for i in keep)),
+                                         array('f', (weights[i] for i in keep)))
+                else:
+                    ngram_index.pop(gram, None)
+            if tpl_id in removed:
+                ids[ordinal] = None
+                del ordinals[tpl_id]
+
+        # Add postings of new and updated templates; updates keep their ordinal
+        for tpl_id in updated + added:
+            row = entries[tpl_id]
+            if tpl_id in ordinals:
+                ordinal = ordinals[tpl_id]
+                priorities[ordinal] = row.priority
+            else:
+                ordinal = ordinals[tpl_id] = len(ids)
+                ids.append(tpl_id)
+                priorities.append(row.priority)
+            for kw in self._row_keywords(row):
+                if kw not in copied_keywords:
+                    keyword_index[kw] = array('I', keyword_index.get(kw, ()))
+                    copied_keywords.add(kw)
+                keyword_index.setdefault(kw, array('I')).append(ordinal)
+            for gram, weight in self._row_ngrams(row).items():
+                if gram not in copied_ngrams:
+                    postings, weights = ngram_index.get(gram, ((), ()))
+                    ngram_index[gram] = (array('I', postings), array('f', weights))
+                    copied_ngrams.add(gram)
+                postings, weights = ngram_index.setdefault(gram, (array('I'), array('f')))
+                postings.append(ordinal)
+                weights.append(weight)
+
+        snapshot = _IndexSnapshot(
+            entries=dict(entries),
+            ids=ids,
+            ordinals=ordinals,
+            priorities=priorities,
+            keyword_index=keyword_index,
+            ngram_index=ngram_index,
+            # Infos carry content hashes, so edited files invalidate them too
+            infos={tpl_id: info for tpl_id, info in old.infos.items()
+                   if tpl_id not in stale_ids
+                   and stale_paths.isdisjoint(self._template_paths(entries[tpl_id]))},
+            contents={p: code for p, code in old.contents.items() if p not in stale_paths},
+            sections={p: index for p, index in old.sections.items() if p not in stale_paths},
+            hashes={p: entry for p, entry in old.hashes.items() if p not in stale_paths},
+            source_archive=self._archive,
+        )
+
+        # Hash (and parse) the files of new, updated and edited templates
+        index_paths = [path for tpl_id in updated + added
+                       for path in self._template_paths(entries[tpl_id])]
+        index_paths.extend(sorted(p for p in stale_paths
+                                  if p.endswith(".py") and p not in snapshot.hashes))
+        for path in dict.fromkeys(index_paths):
+            self._index_file(snapshot, path)
+
+        # Filter bitsets are O(templates) to rebuild
+        by_category: Dict[str, List[int]] = {}
+        by_difficulty: Dict[str, List[int]] = {}
+        for tpl_id, row in entries.items():
+            by_category.setdefault(row.category, []).append(ordinals[tpl_id])
+            by_difficulty.setdefault(row.difficulty, []).append(ordinals[tpl_id])
+        snapshot.category_bits = {k: _bitset(v) for k, v in by_category.items()}
+        snapshot.difficulty_bits = {k: _bitset(v) for k, v in by_difficulty.items()}
+
+        if self.fuzzy:
+            if old.fuzzy_index is not None and keyword_index.keys() == old.keyword_index.keys():
+                snapshot.fuzzy_index = old.fuzzy_index
+            else:
+                # Unstemmed forms too: "streamign" is closer to "streaming" than "stream"
+                vocabulary = set(keyword_index)
+                vocabulary.update(kw.lower() for row in entries.values() for kw in row.keywords)
+                snapshot.fuzzy_index = SymmetricDeleteIndex(vocabulary, self.fuzzy_max_distance)
+
+        if self.semantic:
+            if stale_ids or added or old.semantic_index is None or stale_paths:
+                snapshot.semantic_index = self._build_semantic_index(snapshot)
+            else:
+                snapshot.semantic_index = old.semantic_index
+        return snapshot
+
+    def _info(self, snap: _IndexSnapshot, tpl_id: str) -> TemplateInfo:
+        """Materialize (once per snapshot) the TemplateInfo of a template"""
+        info = snap.infos.get(tpl_id)
+        if info is None:
+            row = snap.entries[tpl_id]
+            if row.description is None:
+                shard_entry = self._load_shard(row.shard).get(tpl_id, {})
+                row = row._replace(description=shard_entry.get("description", ""))
+            info = self._make_info(row)
+            for level, path in zip(COMPLEXITY_LEVELS, self._template_paths(row)):
+                etag = self._file_hash(snap, path)
+                if etag is not None:
+                    info.content_hashes[level] = etag
+            snap.infos[tpl_id] = info
+        return info
+
+    def _index_file(self, snap: _IndexSnapshot, path: str):
+        """Record a template file's content hash and, if enabled, its sections
+
+        Archived files are not decompressed here; their hash comes from
+        the archive directory and sections are parsed on first use.
+        """
+        if snap.source_archive is not None:
+            self._file_hash(snap, path)
+            return
+        try:
+            st = os.stat(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
             return
+        snap.hashes[path] = (archive.content_hash(data), st.st_mtime_ns, st.st_size)
+        if self.section_index:
+            index = build_section_index(path, self._section_terms, data)
+            if index is not None:
+                snap.sections[path] = index._replace(mtime_ns=st.st_mtime_ns, size=st.st_size)
 
-        with open(index_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            for tpl in data.get("templates", []):
-                # Find template directory
-                category = tpl.get("category", "")
-                tpl_id = tpl.get("id", "")
-                tpl_dir = os.path.join(self.templates_dir, category, tpl_id)
-
-                info = TemplateInfo(
-                    id=tpl_id,
-                    title=tpl.get("title", ""),
-                    category=category,
-                    keywords=tpl.get("keywords", []),
-                    concise_path=os.path.join(tpl_dir, "concise.py"),
-                    minimal_path=os.path.join(tpl_dir, "minimal.py"),
-                    complete_path=os.path.join(tpl_dir, "complete.py"),
-                )
-                self.templates[tpl_id] = info
+    def _file_hash(self, snap: _IndexSnapshot, path: str) -> Optional[str]:
+        """Content hash of a template file, or None if it does not exist
+
+        A recorded hash is trusted while the file's mtime and size are
+        unchanged, so revalidation costs one stat() and no read.
+        """
+        key = os.path.abspath(path)
+        entry = snap.hashes.get(key)
+        source_archive = snap.source_archive
+        if source_archive is not None:
+            if entry is None:
+                name = self._archive_name(key)
+                if name not in source_archive:
+                    return None
+                entry = snap.hashes[key] = (source_archive.content_hash(name), 0, 0)
+            return entry[0]
+
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+        if entry is not None and entry[1:] == (st.st_mtime_ns, st.st_size):
+            return entry[0]
+        with open(key, 'rb') as f:
+            data = f.read()
+        snap.hashes[key] = (archive.content_hash(data), st.st_mtime_ns, st.st_size)
+        snap.contents[key] = data.decode('utf-8')
+        return snap.hashes[key][0]
+
+    def _archive_name(self, path: str) -> str:
+        """Archive entry name of a template file path"""
+        return os.path.relpath(path, os.path.abspath(self.templates_dir)).replace(os.sep, "/")
+
+    def _load_shard(self, shard_file: str) -> Dict[str, dict]:
+        """Parse a catalog shard on first use"""
+        shard = self._shards.get(shard_file)
+        if shard is None:
+            with self._shard_lock:
+                shard = self._shards.get(shard_file)
+                if shard is None:
+                    shard = catalog.read_shard(self.templates_dir, shard_file)
+                    self._shards[shard_file] = shard
+        return shard
 
-                # Build keyword index
-                for kw in info.keywords:
-                    kw_lower = kw.lower()
-                    if kw_lower not in self.keyword_index:
-                        self.keyword_index[kw_lower] = []
-                    self.keyword_index[kw_lower].append(tpl_id)
+    def _make_info(self, row: _IndexRow) -> TemplateInfo:
+        """Create TemplateInfo from an index row"""
+        # Find template directory
+        tpl_dir = os.path.join(self.templates_dir, row.category, row.id)
+
+        return TemplateInfo(
+            id=row.id,
+            title=row.title,
+            category=row.category,
+            keywords=list(row.keywords),
+            concise_path=os.path.join(tpl_dir, "concise.py"),
+            minimal_path=os.path.join(tpl_dir, "minimal.py"),
+            complete_path=os.path.join(tpl_dir, "complete.py"),
+            difficulty=row.difficulty,
+            priority=row.priority,
+            description=row.description or "",
+        )
+
+    def _template_paths(self, row: _IndexRow) -> List[str]:
+        """Absolute paths of a template's files"""
+        tpl_dir = os.path.join(self.templates_dir, row.category, row.id)
+        return [os.path.abspath(os.path.join(tpl_dir, f"{level}.py"))
+                for level in COMPLEXITY_LEVELS]
+
+    def _row_keywords(self, row: _IndexRow) -> List[str]:
+        """Distinct lowercased (and normalized), interned keywords of an index row"""
+        return list(dict.fromkeys(sys.intern(self._normalize_word(kw.lower())) for kw in row.keywords))
+
+    def _normalize_word(self, word: str) -> str:
+        return normalize_token(word) if self.normalize else word
+
+    def _row_ngrams(self, row: _IndexRow) -> Dict[str, float]:
+        """CJK n-grams of a template's keywords and title with their weights"""
+        weights: Dict[str, float] = {}
+        for kw in row.keywords:
+            for gram, weight in _keyword_ngrams(kw):
+                weights[gram] = max(weights.get(gram, 0.0), weight)
+        for gram in _cjk_ngrams(row.title):
+            weights.setdefault(sys.intern(gram), NGRAM_WEIGHTS[len(gram)])
+        return weights
+
+    def _build_semantic_index(self, snap: _IndexSnapshot) -> SemanticIndex:
+        """Embed every template into one float32 matrix"""
+        ids, texts = [], []
+        for tpl_id in snap.ordinals:
+            info = self._info(snap, tpl_id)
+            parts = [tpl_id.replace("_", " "), info.title, info.description]
+            parts.extend(info.keywords)
+            # Template source adds English identifiers and comments
+            code = self._read_source(snap, info.concise_path)
+            if code is not None:
+                parts.append(code)
+            ids.append(tpl_id)
+            texts.append("\n".join(parts))
+        return SemanticIndex(ids, texts)
+
+    def watch(self, interval: float = 1.0, use_inotify: bool = True):
+        """Start a background watcher that keeps the index up to date
+
+        Args:
+            interval: Polling interval in seconds (also the inotify timeout)
+            use_inotify: Use inotify when available instead of pure polling
+
+        Returns:
+            TemplateWatcher: Started watcher; call stop() when done
+        """
+        from .watcher import TemplateWatcher
+
+        watcher = TemplateWatcher(self, interval=interval, use_inotify=use_inotify)
+        watcher.start()
+        return watcher
 
     def match(self, query: str) -> Optional[TemplateInfo]:
         """Match template by query keywords"""
+        results = self.match_topk(query, k=1)
+        return results[0].template if results else None
+
+    async def amatch(self, query: str) -> Optional[TemplateInfo]:
+        """match() on the I/O thread pool
+
+        Materializing a template may stat its files or read a catalog
+        shard, so matching is kept off the event loop too.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_io_executor(), self.match, query)
+
+    def match_topk(
+        self,
+        query: str,
+        k: int = 3,
+        filters: Optional[Dict[str, Union[str, Iterable[str]]]] = None
+    ) -> List[TemplateMatch]:
+        """Return up to k best templates, highest score first
+
+        Args:
+            query: User query
+            k: Maximum number of results
+            filters: Optional {"category": ..., "difficulty": ...}; each value
+                is one name or a collection of accepted names
+
+        Returns:
+            List[TemplateMatch]: Matches ranked by score, then priority,
+                then catalog order
+
+        Results are cached per snapshot by the sorted query tokens, so
+        queries differing only in stopwords, word order or case share an
+        entry. Misses are cached too, except when typo correction ran out
+        of its time budget.
+        """
+        snap = self._snapshot
+        mask = self._filter_mask(snap, filters)
+        key = None
+        if self.cache_size > 0:
+            key = (tuple(sorted(self._tokenize(query.lower()))), k, _filters_key(filters))
+            with self._cache_lock:
+                cached = snap.results.get(key)
+                if cached is not None:
+                    snap.results.move_to_end(key)
+                    self._cache_stats["hits"] += 1
+                    if not cached:
+                        self._cache_stats["negative_hits"] += 1
+                    return list(cached)
+                self._cache_stats["misses"] += 1
+
+        top = self._top_scores(snap, self._query_postings(snap, query), mask, k)
+        complete = True
+        if top:
+            results = self._to_matches(snap, top)
+        else:
+            results, complete = self._match_fallback(snap, query, mask, k)
+
+        # A result cut short by the fuzzy budget may differ on the next try
+        if key is not None and complete:
+            with self._cache_lock:
+                snap.results[key] = tuple(results)
+                if len(snap.results) > self.cache_size:
+                    snap.results.popitem(last=False)
+        return results
+
+    def match_terms(self, query: str) -> Dict[str, Set[str]]:
+        """Whole template keywords the query contains, per template
+
+        Shows which part of a compound query each template covers. CJK
+        n-grams that are only part of a keyword (对话 of 对话历史) are not
+        counted.
+        """
+        snap = self._snapshot
         query_lower = query.lower()
-        words = self._tokenize(query_lower)
+        terms: Dict[str, Set[str]] = {}
+        for word in set(self._tokenize(query_lower)):
+            for ordinal in snap.keyword_index.get(word, ()):
+                terms.setdefault(snap.ids[ordinal], set()).add(word)
+        if self.cjk_ngrams:
+            candidates = set()
+            for gram in set(_cjk_ngrams(query_lower)):
+                postings = snap.ngram_index.get(gram)
+                if postings is not None:
+                    candidates.update(postings[0])
+            for ordinal in candidates:
+                tpl_id = snap.ids[ordinal]
+                for kw in self._row_keywords(snap.entries[tpl_id]):
+                    if _CJK_RE.match(kw) and kw in query_lower:
+                        terms.setdefault(tpl_id, set()).add(kw)
+        return terms
+
+    def _match_fallback(
+        self,
+        snap: _IndexSnapshot,
+        query: str,
+        mask: Optional[int],
+        k: int
+    ) -> Tuple[List[TemplateMatch], bool]:
+        """Typo correction, then semantic similarity, after an exact-match miss
+
+        Returns:
+            (matches, False if typo correction ran out of its time budget)
+        """
+        complete = True
+        if snap.fuzzy_index is not None:
+            postings, complete = self._fuzzy_postings(snap, query)
+            if postings:
+                top = self._top_scores(snap, postings, mask, k)
+                if top:
+                    return self._to_matches(snap, top), complete
+
+        if snap.semantic_index is not None:
+            return self._match_semantic(snap, query, mask)[:k], complete
+        return [], complete
+
+    def _to_matches(
+        self,
+        snap: _IndexSnapshot,
+        top: List[Tuple[float, int, int]]
+    ) -> List[TemplateMatch]:
+        return [
+            TemplateMatch(template=self._info(snap, snap.ids[-neg_ordinal]), score=score)
+            for score, _, neg_ordinal in top
+        ]
+
+    def _top_scores(
+        self,
+        snap: _IndexSnapshot,
+        postings: List[Tuple[array, Optional[array]]],
+        mask: Optional[int],
+        k: int
+    ) -> List[Tuple[float, int, int]]:
+        """Top-k (score, priority, -ordinal) above MATCH_THRESHOLD"""
+        if np is not None and sum(len(p) for p, _ in postings) >= DENSE_SCORING_MIN:
+            return self._top_dense(snap, postings, mask, k)
+
+        scores: Dict[int, float] = {}
+        for ordinals, weights in postings:
+            if weights is None:
+                for ordinal in ordinals:
+                    scores[ordinal] = scores.get(ordinal, 0) + KEYWORD_WEIGHT
+            else:
+                for ordinal, weight in zip(ordinals, weights):
+                    scores[ordinal] = scores.get(ordinal, 0) + weight
+        return heapq.nlargest(k, (
+            (score, snap.priorities[ordinal], -ordinal)
+            for ordinal, score in scores.items()
+            if score >= MATCH_THRESHOLD and (mask is None or mask >> ordinal & 1)
+        ))
+
+    def _top_dense(
+        self,
+        snap: _IndexSnapshot,
+        postings: List[Tuple[array, Optional[array]]],
+        mask: Optional[int],
+        k: int
+    ) -> List[Tuple[float, int, int]]:
+        """Top-k (score, priority, -ordinal) using numpy over long postings"""
+        n_slots = len(snap.ids)
+        ordinals = np.concatenate([np.frombuffer(p, dtype=np.uint32) for p, _ in postings])
+        weights = np.concatenate([
+            np.frombuffer(w, dtype=np.float32) if w is not None
+            else np.full(len(p), KEYWORD_WEIGHT, dtype=np.float32)
+            for p, w in postings
+        ])
+        scores = np.bincount(ordinals, weights=weights, minlength=n_slots)
+
+        allowed = scores >= MATCH_THRESHOLD
+        if mask is not None:
+            mask_bytes = np.frombuffer(mask.to_bytes(n_slots // 8 + 1, 'little'), dtype=np.uint8)
+            allowed &= np.unpackbits(mask_bytes, bitorder='little')[:n_slots].astype(bool)
+        cand = np.flatnonzero(allowed)
+        if len(cand) > k:
+            kth = np.partition(scores[cand], -k)[-k]
+            cand = cand[scores[cand] >= kth]
+
+        priority = np.frombuffer(snap.priorities, dtype=np.int32)[cand]
+        order = np.lexsort((cand, -priority, -scores[cand]))[:k]
+        return [(float(scores[c]), int(priority[i]), -int(c))
+                for i, c in zip(order, cand[order])]
+
+    def match_batch(self, queries: Sequence[str]) -> List[Optional[TemplateInfo]]:
+        """Match many queries at once, same results as calling match() on each
+
+        Builds a sparse query-term matrix (COO row/column indices, one entry
+        per term occurrence) and multiplies it against the sparse (CSR)
+        template-term matrix, in chunks that bound the dense score block.
+        Duplicate query strings are scored once. Falls back to a match()
+        loop without numpy.
+        """
+        snap = self._snapshot
+        if np is None or not snap.ordinals:
+            return [self.match(q) for q in queries]
+
+        word_cols, gram_cols, (indptr, indices, data) = self._get_term_matrix(snap)
+        unique: Dict[str, int] = {}
+        rows, cols = [], []
+        for query in queries:
+            if query in unique:
+                continue
+            row = unique[query] = len(unique)
+            query_lower = query.lower()
+            for word in self._tokenize(query_lower):
+                col = word_cols.get(word)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+            if self.cjk_ngrams:
+                for gram in set(_cjk_ngrams(query_lower)):
+                    col = gram_cols.get(gram)
+                    if col is not None:
+                        rows.append(row)
+                        cols.append(col)
 
-        scores = {}
-        for word in words:
-            if word in self.keyword_index:
-                for tpl_id in self.keyword_index[word]:
-                    scores[tpl_id] = scores.get(tpl_id, 0) + 1
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        n_slots = len(snap.ids)
+        priority = np.asarray(snap.priorities, dtype=np.float64)
+        best = np.full(len(unique), -1, dtype=np.int64)
+        best_scores = np.zeros(len(unique), dtype=np.float64)
 
-        if scores:
-            best_id = max(scores.keys(), key=lambda x: scores[x])
-            if scores[best_id] >= 1:
-                return self.templates.get(best_id)
-        return None
+        chunk = max(1, BATCH_CELL_BUDGET // n_slots)
+        for start in range(0, len(unique), chunk):
+            stop = min(start + chunk, len(unique))
+            in_chunk = (rows >= start) & (rows < stop)
+            scores = np.zeros((stop - start, n_slots), dtype=np.float64)
+            if in_chunk.any():
+                r, c = rows[in_chunk] - start, cols[in_chunk]
+                # Expand each (query, term) pair into the term's postings
+                lengths = indptr[c + 1] - indptr[c]
+                offsets = np.repeat(indptr[c] - np.cumsum(lengths) + lengths, lengths)
+                pos = offsets + np.arange(lengths.sum())
+                np.add.at(scores, (np.repeat(r, lengths), indices[pos]), data[pos])
+
+            # Best score per query; ties go to higher priority, then catalog order
+            chunk_best = scores.max(axis=1)
+            tied = np.where(scores == chunk_best[:, None], priority[None, :], -np.inf)
+            best[start:stop] = tied.argmax(axis=1)
+            best_scores[start:stop] = chunk_best
+
+        resolved: List[Optional[TemplateInfo]] = []
+        for query, ordinal, score in zip(unique, best, best_scores):
+            if score >= MATCH_THRESHOLD:
+                resolved.append(self._info(snap, snap.ids[ordinal]))
+            elif snap.fuzzy_index is not None or snap.semantic_index is not None:
+                results, _ = self._match_fallback(snap, query, None, 1)
+                resolved.append(results[0].template if results else None)
+            else:
+                resolved.append(None)
+        return [resolved[unique[q]] for q in queries]
+
+    def _get_term_matrix(self, snap: _IndexSnapshot) -> tuple:
+        """Build (once per snapshot) term columns and the CSR term-template matrix"""
+        if snap.term_matrix is None:
+            word_cols: Dict[str, int] = {}
+            gram_cols: Dict[str, int] = {}
+            indptr, indices, data = [0], [], []
+            for word, postings in snap.keyword_index.items():
+                word_cols[word] = len(word_cols)
+                indices.extend(postings)
+                data.extend([KEYWORD_WEIGHT] * len(postings))
+                indptr.append(len(indices))
+            if self.cjk_ngrams:
+                for gram, (postings, weights) in snap.ngram_index.items():
+                    gram_cols[gram] = len(word_cols) + len(gram_cols)
+                    indices.extend(postings)
+                    data.extend(weights)
+                    indptr.append(len(indices))
+
+            snap.term_matrix = (word_cols, gram_cols, (
+                np.asarray(indptr, dtype=np.int64),
+                np.asarray(indices, dtype=np.int64),
+                np.asarray(data, dtype=np.float64),
+            ))
+        return snap.term_matrix
+
+    def _match_semantic(
+        self,
+        snap: _IndexSnapshot,
+        query: str,
+        mask: Optional[int]
+    ) -> List[TemplateMatch]:
+        """Templates whose embedding similarity clears the threshold"""
+        results = []
+        for tpl_id, similarity in snap.semantic_index.search(query, k=len(snap.ordinals)):
+            if similarity < self.semantic_threshold:
+                break
+            if mask is None or mask >> snap.ordinals[tpl_id] & 1:
+                results.append(TemplateMatch(template=self._info(snap, tpl_id), score=similarity))
+        return results
+
+    def _filter_mask(
+        self,
+        snap: _IndexSnapshot,
+        filters: Optional[Dict[str, Union[str, Iterable[str]]]]
+    ) -> Optional[int]:
+        """Combine precomputed bitsets into a mask of allowed ordinals
+
+        Returns None when nothing is filtered.
+        """
+        if not filters:
+            return None
+
+        bitsets = {"category": snap.category_bits, "difficulty": snap.difficulty_bits}
+        mask = -1
+        for field_name, accepted in filters.items():
+            if field_name not in bitsets:
+                raise ValueError(f"Unknown filter: {field_name}")
+            if isinstance(accepted, str):
+                accepted = [accepted]
+            allowed = 0
+            for value in accepted:
+                allowed |= bitsets[field_name].get(value, 0)
+            mask &= allowed
+        return mask
+
+    def _query_postings(
+        self,
+        snap: _IndexSnapshot,
+        query: str
+    ) -> List[Tuple[array, Optional[array]]]:
+        """(ordinals, weights) postings hit by a query; None weights mean KEYWORD_WEIGHT"""
+        query_lower = query.lower()
+        hits = []
+        for word in self._tokenize(query_lower):
+            postings = snap.keyword_index.get(word)
+            if postings is not None:
+                hits.append((postings, None))
+
+        # CJK runs are not word-segmented; score overlapping n-grams instead
+        if self.cjk_ngrams:
+            for gram in set(_cjk_ngrams(query_lower)):
+                postings = snap.ngram_index.get(gram)
+                if postings is not None:
+                    hits.append(postings)
+        return hits
+
+    def _fuzzy_postings(
+        self,
+        snap: _IndexSnapshot,
+        query: str
+    ) -> Tuple[List[Tuple[array, Optional[array]]], bool]:
+        """Query postings with unknown words replaced by their closest keyword
+
+        Stops correcting once fuzzy_budget_ms has elapsed.
+
+        Returns:
+            (postings, or an empty list when no word could be corrected;
+             False if the budget ran out before every word was tried)
+        """
+        deadline = time.perf_counter() + self.fuzzy_budget_ms / 1000
+        hits = self._query_postings(snap, query)
+        corrected = False
+        complete = True
+        for word in self._tokenize(query.lower()):
+            if word in snap.keyword_index:
+                continue
+            if time.perf_counter() > deadline:
+                logger.debug(f"Fuzzy budget exhausted for query: {query!r}")
+                complete = False
+                break
+            candidates = snap.fuzzy_index.lookup(word)
+            if candidates:
+                postings = snap.keyword_index.get(self._normalize_word(candidates[0][0]))
+                if postings is not None:
+                    hits.append((postings, None))
+                    corrected = True
+        return (hits if corrected else []), complete
 
     def get_template_code(
         self,
@@ -91,28 +1085,188 @@ class TemplateRetriever:
         complexity: str = "concise"
     ) -> Optional[str]:
         """Get template code by ID and complexity"""
-        if template_id not in self.templates:
+        snap = self._snapshot
+        if template_id not in snap.ordinals:
+            return None
+
+        path = self._template_file(snap, template_id, complexity)
+        if not path:
+            return None
+        return self._read_source(snap, path)
+
+    def get_template_code_if_changed(
+        self,
+        template_id: str,
+        complexity: str = "concise",
+        etag: Optional[str] = None
+    ) -> Optional[TemplateCode]:
+        """Conditional get_template_code for clients that cache templates
+
+        When etag equals the file's current content hash the file is not
+        read and the result carries no code (like HTTP 304).
+
+        Args:
+            template_id: Template ID
+            complexity: minimal, concise or complete
+            etag: Hash from a previous fetch or TemplateInfo.content_hashes
+
+        Returns:
+            Optional[TemplateCode]: None if the template or file does not exist
+        """
+        snap = self._snapshot
+        if template_id not in snap.ordinals:
+            return None
+        path = self._template_file(snap, template_id, complexity)
+        if not path:
+            return None
+
+        current = self._file_hash(snap, path)
+        if current is None:
+            return None
+        if etag == current:
+            return TemplateCode(etag=current, modified=False)
+        return TemplateCode(etag=current, modified=True, code=self._read_source(snap, path))
+
+    async def aget_template_code(
+        self,
+        template_id: str,
+        complexity: str = "concise"
+    ) -> Optional[str]:
+        """get_template_code() without blocking the event loop
+
+        Cached code is returned directly. Otherwise the file is read (or
+        decompressed) on the I/O thread pool, and concurrent requests for
+        the same file share that one read.
+        """
+        snap = self._snapshot
+        row = snap.entries.get(template_id)
+        if row is None or template_id not in snap.ordinals:
             return None
 
-        info = self.templates[template_id]
+        level = complexity if complexity in COMPLEXITY_LEVELS else "concise"
+        path = self._template_paths(row)[COMPLEXITY_LEVELS.index(level)]
+        code = snap.contents.get(path)
+        if code is not None:
+            return code
+        return await asyncio.wrap_future(self._coalesced_read(snap, path))
+
+    def _coalesced_read(self, snap: _IndexSnapshot, path: str) -> Future:
+        """Pending _read_source of path, started only if none is in flight"""
+        key = (id(snap), path)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._inflight[key] = _get_io_executor().submit(self._read_source, snap, path)
+
+        def done(_):
+            with self._inflight_lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+        # Outside the lock: runs immediately if the read already finished
+        future.add_done_callback(done)
+        return future
+
+    def _read_source(self, snap: _IndexSnapshot, path: str) -> Optional[str]:
+        """Template file source through the snapshot's content cache
+
+        Reads the file, or decompresses its archive entry, on first access.
+        """
+        key = os.path.abspath(path)
+        code = snap.contents.get(key)
+        if code is not None:
+            return code
+        source_archive = snap.source_archive
+        if source_archive is not None:
+            name = self._archive_name(key)
+            if name not in source_archive:
+                return None
+            code = source_archive.read(name).decode('utf-8')
+        elif os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                code = f.read()
+        else:
+            return None
+        snap.contents[key] = code
+        return code
+
+    def get_template_section(
+        self,
+        template_id: str,
+        complexity: str = "concise",
+        query: str = ""
+    ) -> Optional[str]:
+        """Get only the parts of a template relevant to a query
+
+        Returns the best-matching top-level functions, classes and banner
+        blocks, the sections they depend on and the imports they use,
+        in file order. Only those byte ranges are read from disk (archived
+        templates are sliced from the decompressed source).
+
+        Args:
+            template_id: Template ID
+            complexity: minimal, concise or complete
+            query: User query the sections are matched against
+
+        Returns:
+            Optional[str]: Section source, or None if the template is
+                unknown or no section matches (use get_template_code then)
+        """
+        snap = self._snapshot
+        if template_id not in snap.ordinals:
+            return None
+
+        path = self._template_file(snap, template_id, complexity)
+        if not path:
+            return None
+        key = os.path.abspath(path)
+        data = None
+        if snap.source_archive is not None:
+            code = self._read_source(snap, key)
+            if code is None:
+                return None
+            data = code.encode('utf-8')
+
+        index = snap.sections.get(key)
+        if index is None or (data is None and not index.is_current(key)):
+            # Not indexed at load time, or edited without a refresh
+            index = build_section_index(key, self._section_terms, data)
+            if index is None:
+                return None
+            snap.sections[key] = index
+
+        selected = select_sections(index, self._section_terms(query))
+        if not selected:
+            return None
+        return read_sections(key, index, selected, data)
+
+    def _template_file(
+        self,
+        snap: _IndexSnapshot,
+        template_id: str,
+        complexity: str
+    ) -> Optional[str]:
+        """Path of a template file for a complexity (concise if unknown)"""
+        info = self._info(snap, template_id)
         path_map = {
             "minimal": info.minimal_path,
             "concise": info.concise_path,
             "complete": info.complete_path,
         }
+        return path_map.get(complexity, info.concise_path)
 
-        path = path_map.get(complexity, info.concise_path)
-        if path and os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f:
-                return f.read()
-        return None
+    def _section_terms(self, text: str) -> set:
+        """Match terms of text: query tokens plus CJK n-grams"""
+        text = text.lower()
+        return set(self._tokenize(text)) | set(_cjk_ngrams(text))
 
     def _tokenize(self, text: str) -> List[str]:
         """Tokenize query into keywords"""
         words = []
 
         # Chinese characters
-        for match in re.finditer(r'[\u4e00-\u9fff]+', text):
+        for match in _CJK_RE.finditer(text):
             words.append(match.group(0))
 
         # English words - split by space and hyphen
@@ -131,5 +1285,66 @@ class TemplateRetriever:
                     words.append(word)
 
         # Filter stopwords - removed 'agent' from stopwords
-        stopwords = {'how', 'to', 'use', 'the', 'a', 'an', 'for', 'with', '如何', '怎么', '使用'}
-        return [w for w in words if w not in stopwords and len(w) > 1]
+        words = [w for w in words if w not in STOPWORDS and len(w) > 1]
+        if self.normalize:
+            runs = [w for w in words if _CJK_RE.match(w)]
+            words = [normalize_token(w) for w in words]
+            for run in runs:
+                words.extend(cjk_synonyms(run))
+        return words
+
+
+def _cjk_ngrams(text: str) -> Iterator[str]:
+    """Yield character bigrams and trigrams of every CJK run in text
+
+    Stopword n-grams are skipped. Output size is linear in len(text).
+    """
+    for match in _CJK_RE.finditer(text):
+        run = match.group(0)
+        for n in NGRAM_WEIGHTS:
+            for i in range(len(run) - n + 1):
+                gram = run[i:i + n]
+                if gram not in STOPWORDS:
+                    yield gram
+
+
+@lru_cache(maxsize=65536)
+def _keyword_ngrams(keyword: str) -> Tuple[Tuple[str, float], ...]:
+    """Interned CJK n-grams of one keyword with their weights (memoized)"""
+    return tuple(
+        (sys.intern(gram), KEYWORD_WEIGHT if gram == keyword else NGRAM_WEIGHTS[len(gram)])
+        for gram in _cjk_ngrams(keyword)
+    )
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    """Thread pool for async template I/O, created on first use"""
+    global _io_executor
+    if _io_executor is None:
+        with _io_executor_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=IO_WORKERS, thread_name_prefix="template-io"
+                )
+    return _io_executor
+
+
+def _filters_key(filters: Optional[Dict[str, Union[str, Iterable[str]]]]) -> tuple:
+    """Hashable, order-independent form of a match_topk filters argument"""
+    if not filters:
+        return ()
+    return tuple(sorted(
+        (name, (accepted,) if isinstance(accepted, str) else tuple(sorted(accepted)))
+        for name, accepted in filters.items()
+    ))
+
+
+def _bitset(ordinals: Iterable[int]) -> int:
+    """Build an int bitset with the given bit positions set"""
+    ordinals = list(ordinals)
+    if not ordinals:
+        return 0
+    bits = bytearray(max(ordinals) // 8 + 1)
+    for ordinal in ordinals:
+        bits[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(bits, 'little')
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""bench_catalog.py - Memory and latency of TemplateRetriever at catalog scale
+
+Generates synthetic template sets and compares the single-file
+metadata_index.json format with the sharded catalog. The catalog still
+loads every template's index row from its manifest; only descriptions
+and other shard fields are read on demand (the shards column counts
+shard files read during the queries).
+
+Usage:
+    python bench_catalog.py
+    python bench_catalog.py --sizes 1000 10000
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.catalog import write_catalog
+from dynamic.retriever import TemplateRetriever
+
+CATEGORIES = ["agents", "memory", "tools", "workflows", "advanced",
+              "rag", "eval", "deploy", "multimodal", "safety"]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+CJK_WORDS = ["记忆", "工具", "检索", "流式", "对话", "推理", "协作", "部署",
+             "评测", "安全", "图像", "语音", "知识库", "工作流", "多智能体", "长期"]
+
+
+def synthetic_entries(count: int, seed: int = 0) -> list:
+    """Synthetic metadata entries with a Zipf-like keyword distribution"""
+    rng = random.Random(seed)
+    vocab = [f"kw{i}" for i in range(max(200, count // 10))]
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    entries = []
+    for i in range(count):
+        cjk = rng.sample(CJK_WORDS, 2)
+        entries.append({
+            "id": f"tpl_{i:06d}",
+            "title": f"{cjk[0]}{cjk[1]}示例 {i}",
+            "category": rng.choice(CATEGORIES),
+            "difficulty": rng.choice(DIFFICULTIES),
+            "keywords": list(dict.fromkeys(rng.choices(vocab, weights, k=5))) + cjk,
+            "description": f"Synthetic snippet {i} " + " ".join(rng.choices(vocab, k=20)),
+            "priority": rng.randint(1, 10),
+        })
+    return entries
+
+
+def synthetic_queries(entries: list, count: int, seed: int = 1) -> list:
+    """Queries built from random templates' keywords, some in Chinese"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        entry = rng.choice(entries)
+        words = rng.sample(entry["keywords"], 2)
+        queries.append(" ".join(words) if rng.random() < 0.7 else f"如何使用{words[-1]}")
+    return queries
+
+
+def measure(templates_dir: str, queries: list) -> dict:
+    """Load time, retained memory and match latency for one templates root"""
+    # Memory and time are measured on separate loads; tracemalloc is slow
+    gc.collect()
+    tracemalloc.start()
+    retriever = TemplateRetriever(templates_dir)
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del retriever
+
+    gc.collect()
+    start = time.perf_counter()
+    retriever = TemplateRetriever(templates_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        retriever.match(query)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    return {
+        "load_ms": load_ms,
+        "memory_mb": memory_mb,
+        "p50_us": statistics.median(latencies),
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1],
+        "shards_loaded": len(retriever.loaded_shards),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog scaling")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'templates':>9}  {'format':<8} {'load ms':>9} {'mem MB':>8} "
+          f"{'p50 us':>8} {'p99 us':>8} {'shards':>6}")
+    for size in args.sizes:
+        entries = synthetic_entries(size)
+        queries = synthetic_queries(entries, args.queries)
+        tmp = tempfile.mkdtemp()
+        try:
+            single_dir = os.path.join(tmp, "single")
+            os.makedirs(single_dir)
+            with open(os.path.join(single_dir, "metadata_index.json"), 'w', encoding='utf-8') as f:
+                json.dump({"templates": entries}, f, ensure_ascii=False)
+            sharded_dir = os.path.join(tmp, "sharded")
+            write_catalog(entries, sharded_dir)
+
+            for label, path in (("single", single_dir), ("catalog", sharded_dir)):
+                r = measure(path, queries)
+                print(f"{size:>9}  {label:<8} {r['load_ms']:>9.0f} {r['memory_mb']:>8.1f} "
+                      f"{r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['shards_loaded']:>6}")
+        finally:
+            shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
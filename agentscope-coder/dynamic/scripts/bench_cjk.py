@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""bench_cjk.py - Template hit rate on Chinese queries with/without CJK n-grams
+
+Usage:
+    python bench_cjk.py
+    python bench_cjk.py --corpus my_queries.jsonl
+"""
+
+import argparse
+import os
+import sys
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.retriever import TemplateRetriever
+
+from bench_common import DEFAULT_CORPUS, load_corpus
+
+
+def hit_rate(retriever: TemplateRetriever, corpus: list) -> dict:
+    """Count correct top-1 matches and any-template matches"""
+    correct = matched = 0
+    for row in corpus:
+        info = retriever.match(row["query"])
+        if info is not None:
+            matched += 1
+            if info.id == row["expected"]:
+                correct += 1
+    return {"correct": correct, "matched": matched, "total": len(corpus)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CJK n-gram retrieval")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Labeled JSONL corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, ["zh"])
+    for label, enabled in (("whole-run tokens", False), ("CJK n-grams", True)):
+        stats = hit_rate(TemplateRetriever(cjk_ngrams=enabled), corpus)
+        total = stats["total"] or 1
+        print(f"{label:<18} correct {stats['correct']}/{stats['total']} "
+              f"({stats['correct'] / total:.0%}), "
+              f"template hit {stats['matched'] / total:.0%}")
+
+
+if __name__ == "__main__":
+    main()
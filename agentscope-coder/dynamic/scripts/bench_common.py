@@ -0,0 +1,22 @@
+"""bench_common.py - Helpers shared by the benchmark scripts
+
+Corpus rows: {"query": ..., "expected": template id or null, "lang": ...}
+"""
+
+import json
+import os
+from typing import Iterable, List, Optional
+
+DEFAULT_CORPUS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "corpus", "retriever_queries.jsonl"
+)
+
+
+def load_corpus(path: str = DEFAULT_CORPUS, langs: Optional[Iterable[str]] = None) -> List[dict]:
+    """Load rows of a JSONL corpus, optionally only those of some languages"""
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    if not langs:
+        return rows
+    langs = set(langs)
+    return [row for row in rows if row.get("lang") in langs]
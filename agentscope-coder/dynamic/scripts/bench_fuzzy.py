@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""bench_fuzzy.py - Template hit rate on misspelled queries with/without typo correction
+
+Usage:
+    python bench_fuzzy.py
+    python bench_fuzzy.py --budget-ms 1 --corpus my_queries.jsonl
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.retriever import TemplateRetriever
+
+from bench_common import DEFAULT_CORPUS, load_corpus
+
+
+def run(retriever: TemplateRetriever, corpus: list, repeat: int = 20) -> dict:
+    """Correct top-1 matches, any-template matches and per-query latency"""
+    correct = matched = 0
+    latencies = []
+    for row in corpus:
+        info = retriever.match(row["query"])
+        if info is not None:
+            matched += 1
+            if info.id == row["expected"]:
+                correct += 1
+        start = time.perf_counter()
+        for _ in range(repeat):
+            retriever.match(row["query"])
+        latencies.append((time.perf_counter() - start) / repeat * 1000)
+    latencies.sort()
+    return {
+        "correct": correct,
+        "matched": matched,
+        "total": len(corpus),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark typo-tolerant retrieval")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Labeled JSONL corpus")
+    parser.add_argument("--budget-ms", type=float, default=2.0, help="Fuzzy budget per query")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, ["typo"])
+    for label, enabled in (("exact only", False), ("typo correction", True)):
+        retriever = TemplateRetriever(fuzzy=enabled, fuzzy_budget_ms=args.budget_ms, cache_size=0)
+        stats = run(retriever, corpus)
+        print(f"{label:16s} correct {stats['correct']}/{stats['total']}  "
+              f"template hits {stats['matched']}/{stats['total']}  "
+              f"p50 {stats['p50_ms']:.3f} ms  p99 {stats['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""bench_generate.py - Offline load test of the generate-parse-validate path
+
+Runs queries no template matches through CodeGenerator.agenerate with
+LocalBackend, so every stage after the LLM call (parsing, validation,
+caching, coalescing, concurrency limits) runs for real without network
+access:
+
+    throughput_qps     completed queries per second
+    p50_ms, p99_ms     per-query latency
+    llm_calls          backend calls (fewer than queries when duplicates
+                       coalesce or hit the cache)
+
+Usage:
+    python bench_generate.py
+    python bench_generate.py --queries 2000 --concurrency 32 --latency 0.5
+    python bench_generate.py --duplicates 0.5 --cache
+    python bench_generate.py --latency 0 --profile
+"""
+
+import argparse
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.backends import LocalBackend
+from dynamic.cache import GenerationCache
+from dynamic.core import ComplexityLevel
+from dynamic.generator import CodeGenerator
+
+_SUBJECTS = ["ledger", "glacier", "violin", "harbor", "orchard", "comet", "quarry", "lantern",
+             "meadow", "falcon", "pottery", "canyon", "saffron", "tundra", "walnut", "beacon"]
+_ACTIONS = ["reconciler", "forecaster", "cataloguer", "inspector", "archivist", "planner"]
+
+
+def bench_queries(n: int, duplicates: float, seed: int = 0) -> list:
+    """n queries; a duplicates share of them repeats earlier ones"""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(n):
+        if queries and rng.random() < duplicates:
+            queries.append(rng.choice(queries))
+        else:
+            queries.append(f"{rng.choice(_SUBJECTS)} {rng.choice(_ACTIONS)} number {i}")
+    return queries
+
+
+async def run(generator: CodeGenerator, queries: list, complexity: ComplexityLevel) -> list:
+    """(seconds, result) per query, all started at once"""
+    async def timed(query):
+        start = time.perf_counter()
+        result = await generator.agenerate(query, complexity)
+        return time.perf_counter() - start, result
+
+    try:
+        return await asyncio.gather(*(timed(q) for q in queries))
+    finally:
+        await generator.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generation with the local backend")
+    parser.add_argument("--queries", type=int, default=500, help="Queries to generate")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent backend calls")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per backend call")
+    parser.add_argument("--duplicates", type=float, default=0.0,
+                        help="Share of queries repeating an earlier one")
+    parser.add_argument("-c", "--complexity", choices=["minimal", "concise", "complete"],
+                        default="concise", help="Code complexity level")
+    parser.add_argument("--cache", action="store_true", help="Use a fresh generation cache")
+    parser.add_argument("--profile", action="store_true", help="Print the top cProfile entries")
+    args = parser.parse_args()
+
+    backend = LocalBackend(latency=args.latency)
+    queries = bench_queries(args.queries, args.duplicates)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = GenerationCache(os.path.join(tmp, "bench.sqlite3")) if args.cache else None
+        generator = CodeGenerator(backend=backend, cache=cache, max_concurrency=args.concurrency)
+        profiler = cProfile.Profile() if args.profile else None
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        timings = asyncio.run(run(generator, queries, ComplexityLevel(args.complexity)))
+        elapsed = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+
+    latencies = sorted(seconds * 1000 for seconds, _ in timings)
+    print(json.dumps({
+        "queries": len(queries),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_qps": round(len(queries) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 1),
+        "llm_calls": backend.calls,
+        "sources": dict(Counter(result.source for _, result in timings)),
+        "valid": sum(result.is_valid() for _, result in timings),
+    }, indent=2))
+    if profiler is not None:
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+
+
+if __name__ == "__main__":
+    main()
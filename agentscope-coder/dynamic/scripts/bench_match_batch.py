@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""bench_match_batch.py - Throughput of match_batch() vs a match() loop
+
+Usage:
+    python bench_match_batch.py
+    python bench_match_batch.py --queries 50000 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.retriever import TemplateRetriever
+
+from bench_common import load_corpus
+
+# Extra English/mixed queries so the workload is not Chinese-only
+EXTRA_QUERIES = [
+    "react agent with tools",
+    "long term memory for chat",
+    "custom tool decorator",
+    "msghub broadcast",
+    "sequential pipeline workflow",
+    "streaming output",
+    "rag knowledge base",
+    "xyzabc123 nonexistent template",
+    "ReActAgent 工具调用",
+    "multi agent 辩论",
+]
+
+
+def build_queries(count: int, unique: bool = False) -> list:
+    """Cycle the labeled corpus plus extras up to count queries
+
+    With unique=True every query gets a distinct non-keyword suffix, so
+    duplicate elimination in match_batch() cannot help.
+    """
+    base = [row["query"] for row in load_corpus()] + EXTRA_QUERIES
+    if unique:
+        return [f"{base[i % len(base)]} q{i}" for i in range(count)]
+    return [base[i % len(base)] for i in range(count)]
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall time of repeated calls"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch template matching")
+    parser.add_argument("--queries", type=int, default=10000, help="Number of queries")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions")
+    args = parser.parse_args()
+
+    retriever = TemplateRetriever()
+    for label, unique in (("repeated", False), ("unique", True)):
+        queries = build_queries(args.queries, unique=unique)
+
+        loop = [retriever.match(q) for q in queries]
+        batch = retriever.match_batch(queries)
+        assert [i and i.id for i in loop] == [i and i.id for i in batch], "results differ"
+
+        loop_time = best_of(lambda: [retriever.match(q) for q in queries], args.repeat)
+        batch_time = best_of(lambda: retriever.match_batch(queries), args.repeat)
+
+        print(f"{len(queries)} {label} queries")
+        print(f"  match loop:  {loop_time * 1000:8.1f} ms  {len(queries) / loop_time:10.0f} q/s")
+        print(f"  match_batch: {batch_time * 1000:8.1f} ms  {len(queries) / batch_time:10.0f} q/s")
+        print(f"  speedup:     {loop_time / batch_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""bench_retriever.py - Quality and latency report for TemplateRetriever
+
+Runs a labeled query corpus through the retriever and prints a JSON
+report (or writes it with --output) for comparison across commits:
+
+    recall@1, recall@3     expected template ranked first / in the top 3
+    fallback_rate          share of queries no template matched (LLM tier)
+    false_fallback_rate    share of labeled queries that went to the LLM
+    false_match_rate       share of "expected": null queries that matched
+    p50_us, p99_us         match_topk latency (result cache disabled)
+    build_ms               retriever construction time
+
+Corpus rows: {"query": ..., "expected": template id or null, "lang": ...}
+
+Usage:
+    python bench_retriever.py
+    python bench_retriever.py --output before.json
+    python bench_retriever.py --semantic --no-fuzzy --lang en zh
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.retriever import TemplateRetriever
+
+from bench_common import DEFAULT_CORPUS, load_corpus
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def evaluate(retriever: TemplateRetriever, rows: list, repeat: int) -> dict:
+    """Quality and latency metrics for one group of corpus rows"""
+    hit1 = hit3 = fallbacks = labeled = false_fallbacks = negatives = false_matches = 0
+    latencies = []
+    misses = []
+    for row in rows:
+        results = retriever.match_topk(row["query"], k=3)
+        ranked = [m.template.id for m in results]
+        expected = row.get("expected")
+        if not results:
+            fallbacks += 1
+        if expected is None:
+            negatives += 1
+            false_matches += bool(results)
+        else:
+            labeled += 1
+            hit1 += ranked[:1] == [expected]
+            hit3 += expected in ranked
+            false_fallbacks += not results
+            if ranked[:1] != [expected]:
+                misses.append({"query": row["query"], "expected": expected, "got": ranked})
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            retriever.match_topk(row["query"], k=3)
+        latencies.append((time.perf_counter() - start) / repeat * 1e6)
+
+    latencies.sort()
+    return {
+        "queries": len(rows),
+        "recall@1": round(hit1 / labeled, 4) if labeled else None,
+        "recall@3": round(hit3 / labeled, 4) if labeled else None,
+        "fallback_rate": round(fallbacks / len(rows), 4) if rows else None,
+        "false_fallback_rate": round(false_fallbacks / labeled, 4) if labeled else None,
+        "false_match_rate": round(false_matches / negatives, 4) if negatives else None,
+        "p50_us": round(statistics.median(latencies), 2) if latencies else None,
+        "p99_us": round(percentile(latencies, 0.99), 2),
+        "misses": misses,
+    }
+
+
+def build_time_ms(options: dict, runs: int) -> float:
+    """Median retriever construction time"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        TemplateRetriever(**options)
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 2)
+
+
+def git_revision() -> str:
+    """Current commit of the working tree, if available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TemplateRetriever quality and latency")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Labeled JSONL corpus")
+    parser.add_argument("--templates-dir", default=None, help="Templates root")
+    parser.add_argument("--lang", nargs="*", help="Only these corpus languages")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per query")
+    parser.add_argument("--build-runs", type=int, default=5, help="Timed index builds")
+    parser.add_argument("--semantic", action="store_true", help="Enable semantic fallback")
+    parser.add_argument("--no-fuzzy", action="store_true", help="Disable typo correction")
+    parser.add_argument("--no-cjk", action="store_true", help="Disable CJK n-grams")
+    parser.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    options = {
+        "templates_dir": args.templates_dir,
+        "cjk_ngrams": not args.no_cjk,
+        "semantic": args.semantic,
+        "fuzzy": not args.no_fuzzy,
+        "cache_size": 0,
+    }
+    rows = load_corpus(args.corpus, args.lang)
+    retriever = TemplateRetriever(**options)
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.get("lang", ""), []).append(row)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "options": {k: v for k, v in options.items() if k != "templates_dir"},
+        "templates": len(retriever.templates),
+        "build_ms": build_time_ms(options, args.build_runs),
+        "overall": evaluate(retriever, rows, args.repeat),
+        "by_lang": {lang: evaluate(retriever, group, args.repeat)
+                    for lang, group in sorted(groups.items())},
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        overall = report["overall"]
+        print(f"recall@1 {overall['recall@1']}  recall@3 {overall['recall@3']}  "
+              f"fallback {overall['fallback_rate']}  p50 {overall['p50_us']} us  "
+              f"p99 {overall['p99_us']} us  build {report['build_ms']} ms -> {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
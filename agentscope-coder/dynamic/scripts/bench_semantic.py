@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""bench_semantic.py - Semantic fallback outcomes per similarity threshold
+
+Runs the labeled paraphrase queries (no template keyword in them; some
+off-topic, labeled null) through TemplateRetriever(semantic=True) and
+counts, per threshold, the right template served, a wrong template
+served, and queries left to the LLM.
+
+Usage:
+    python bench_semantic.py
+    python bench_semantic.py --thresholds 0.1 0.12 0.15 --corpus my_queries.jsonl
+"""
+
+import argparse
+import os
+import sys
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.retriever import TemplateRetriever
+from dynamic.semantic import has_numpy
+
+from bench_common import DEFAULT_CORPUS, load_corpus
+
+DEFAULT_THRESHOLDS = [0.1, 0.11, 0.12, 0.125, 0.15, 0.17, 0.2, 0.25]
+
+
+def outcomes(retriever: TemplateRetriever, corpus: list) -> dict:
+    """Right and wrong templates served, and queries left to the LLM"""
+    counts = {"correct": 0, "wrong": 0, "off_topic_served": 0, "llm": 0}
+    for row in corpus:
+        info = retriever.match(row["query"])
+        if info is None:
+            counts["llm"] += 1
+        elif info.id == row["expected"]:
+            counts["correct"] += 1
+        else:
+            counts["wrong"] += 1
+            counts["off_topic_served"] += row["expected"] is None
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the semantic fallback threshold")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Labeled JSONL corpus")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS,
+                        help="Similarity thresholds to try")
+    args = parser.parse_args()
+
+    if not has_numpy():
+        print("numpy is required for semantic matching", file=sys.stderr)
+        sys.exit(1)
+    corpus = load_corpus(args.corpus, ["paraphrase"])
+    print(f"{len(corpus)} queries, {sum(r['expected'] is None for r in corpus)} off-topic")
+    for threshold in args.thresholds:
+        stats = outcomes(TemplateRetriever(semantic=True, semantic_threshold=threshold), corpus)
+        print(f"threshold {threshold:<6} correct {stats['correct']:>2}  wrong {stats['wrong']:>2} "
+              f"(off-topic {stats['off_topic_served']})  llm {stats['llm']:>2}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""bench_semantic_cache.py - Hit rate and lookup latency of SemanticCache
+
+Fills a generation cache with synthetic queries plus the "cached" side
+of a labeled paraphrase corpus, then looks up each "query" side:
+
+    hit_rate         paraphrases ("same": true) served the cached code
+    false_hit_rate   different requests ("same": false) served any code
+    p50_us, p99_us   SemanticCache.get latency
+
+Usage:
+    python bench_semantic_cache.py
+    python bench_semantic_cache.py --entries 100000 --threshold 0.75
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.cache import SEMANTIC_THRESHOLD, GenerationCache, SemanticCache
+from dynamic.core import ComplexityLevel, GeneratedCode
+
+from bench_common import load_corpus
+
+DEFAULT_CORPUS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "corpus", "paraphrase_pairs.jsonl"
+)
+KEY = ("qwen-max", "1", "1")
+
+_ROLES = ["support", "research", "sales", "coding", "travel", "finance", "legal", "medical",
+          "hr", "marketing", "devops", "security", "data", "tutor", "writing", "news"]
+_TASKS = ["summarizes", "classifies", "translates", "monitors", "extracts", "answers",
+          "schedules", "reviews", "generates", "searches", "ranks", "validates"]
+_OBJECTS = ["emails", "tickets", "invoices", "contracts", "logs", "articles", "reports",
+            "tweets", "receipts", "transcripts", "papers", "orders", "alerts", "forms"]
+_TOOLS = ["slack", "notion", "redis", "s3", "kafka", "excel", "gmail", "jira", "github",
+          "postgres", "elasticsearch", "calendar", "browser", "ocr", "webhook"]
+
+
+def synthetic_queries(n: int, seed: int = 0) -> list:
+    """Distinct generated requests"""
+    rng = random.Random(seed)
+    queries = set()
+    while len(queries) < n:
+        queries.add(f"{rng.choice(_ROLES)} agent that {rng.choice(_TASKS)} "
+                    f"{rng.choice(_OBJECTS)} with {rng.choice(_TOOLS)} "
+                    f"and {rng.choice(_TOOLS)} v{rng.randrange(60)}")
+    return sorted(queries)
+
+
+def _result(query: str) -> GeneratedCode:
+    return GeneratedCode(code=f"# {query}\n", title=query,
+                         complexity=ComplexityLevel.CONCISE, source="llm")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic generation cache")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Labeled paraphrase pairs")
+    parser.add_argument("--entries", type=int, default=100000, help="Synthetic cache entries")
+    parser.add_argument("--threshold", type=float, default=SEMANTIC_THRESHOLD,
+                        help="Cosine similarity threshold")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per lookup")
+    args = parser.parse_args()
+
+    pairs = load_corpus(args.corpus)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = GenerationCache(os.path.join(tmp, "bench.sqlite3"),
+                                max_entries=args.entries + len(pairs))
+        start = time.perf_counter()
+        for query in synthetic_queries(args.entries) + [p["cached"] for p in pairs]:
+            store.put(query, _result(query), *KEY)
+        fill_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cache = SemanticCache(store, threshold=args.threshold)
+        index_s = time.perf_counter() - start
+
+        hits = positives = false_hits = negatives = 0
+        latencies = []
+        misses = []
+        for pair in pairs:
+            result = cache.get(pair["query"], ComplexityLevel.CONCISE, *KEY)
+            if pair["same"]:
+                positives += 1
+                if result is not None and result.title == pair["cached"]:
+                    hits += 1
+                else:
+                    misses.append(pair["query"])
+            else:
+                negatives += 1
+                false_hits += result is not None
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                cache.get(pair["query"], ComplexityLevel.CONCISE, *KEY)
+            latencies.append((time.perf_counter() - start) / args.repeat * 1e6)
+
+    latencies.sort()
+    print(json.dumps({
+        "entries": len(cache),
+        "threshold": args.threshold,
+        "hit_rate": round(hits / positives, 4) if positives else None,
+        "false_hit_rate": round(false_hits / negatives, 4) if negatives else None,
+        "p50_us": round(statistics.median(latencies), 1),
+        "p99_us": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 1),
+        "matrix_mb": round(sum(g.matrix.nbytes for g in cache._groups.values()) / 2 ** 20, 1),
+        "fill_s": round(fill_s, 1),
+        "index_s": round(index_s, 1),
+        "missed_paraphrases": misses,
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
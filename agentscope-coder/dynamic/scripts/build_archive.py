@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""build_archive.py - Pack a templates root into a compressed archive
+
+Writes <output-dir>/templates.tpa; point TemplateRetriever at output-dir.
+Prints the on-disk size reduction and first-access latency compared
+with the raw files.
+
+Usage:
+    python build_archive.py --output-dir dist/templates
+    python build_archive.py --templates-dir /path/to/templates --output-dir out --no-dictionary
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.archive import archive_path, collect_files, write_archive
+from dynamic.retriever import TemplateRetriever
+
+DEFAULT_TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "references", "templates"
+)
+
+BLOCK_SIZE = 4096
+
+
+def disk_usage(files: dict) -> int:
+    """Bytes the raw files occupy on disk, rounded up to whole blocks"""
+    return sum(-(-len(data) // BLOCK_SIZE) * BLOCK_SIZE for data in files.values())
+
+
+def first_access_us(templates_dir: str) -> dict:
+    """Median time of the first and of a repeated get_template_code per file"""
+    retriever = TemplateRetriever(templates_dir, section_index=False)
+    first, cached = [], []
+    for tpl_id in retriever.templates:
+        for level in ("minimal", "concise", "complete"):
+            start = time.perf_counter()
+            retriever.get_template_code(tpl_id, level)
+            first.append((time.perf_counter() - start) * 1e6)
+            start = time.perf_counter()
+            retriever.get_template_code(tpl_id, level)
+            cached.append((time.perf_counter() - start) * 1e6)
+    return {"first": statistics.median(first), "cached": statistics.median(cached)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a compressed template archive")
+    parser.add_argument("--templates-dir", default=DEFAULT_TEMPLATES_DIR, help="Templates root")
+    parser.add_argument("--output-dir", required=True, help="Directory for templates.tpa")
+    parser.add_argument("--no-dictionary", action="store_true",
+                        help="Compress entries without the shared preset dictionary")
+    args = parser.parse_args()
+
+    files = collect_files(args.templates_dir)
+    os.makedirs(args.output_dir, exist_ok=True)
+    stats = write_archive(files, archive_path(args.output_dir),
+                          use_dictionary=not args.no_dictionary)
+
+    print(f"Packed {stats['entries']} files into {archive_path(args.output_dir)}")
+    print(f"  raw bytes      {stats['raw_bytes']:>9}")
+    print(f"  raw on disk    {disk_usage(files):>9}  ({BLOCK_SIZE}-byte blocks)")
+    print(f"  archive bytes  {stats['archive_bytes']:>9}  "
+          f"({stats['archive_bytes'] / stats['raw_bytes']:.1%} of raw)")
+
+    for label, root in (("raw files", args.templates_dir), ("archive", args.output_dir)):
+        latency = first_access_us(root)
+        print(f"  {label:<10} first access {latency['first']:7.1f} us, "
+              f"cached {latency['cached']:5.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""build_catalog.py - Convert metadata_index.json into a sharded catalog
+
+Usage:
+    python build_catalog.py
+    python build_catalog.py --templates-dir /path/to/templates
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.catalog import write_catalog, manifest_path
+
+DEFAULT_TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "references", "templates"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a sharded template catalog")
+    parser.add_argument("--templates-dir", default=DEFAULT_TEMPLATES_DIR, help="Templates root")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.templates_dir, "metadata_index.json"), 'r', encoding='utf-8') as f:
+        entries = json.load(f).get("templates", [])
+
+    counts = write_catalog(entries, args.templates_dir)
+    for shard_file, count in sorted(counts.items()):
+        print(f"{shard_file:<24} {count} templates")
+    print(f"Manifest written to {manifest_path(args.templates_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,15 @@ def check_dashscope():
         return False
 
 
+def check_httpx():
+    """Check if httpx is installed"""
+    try:
+        import httpx
+        return True
+    except ImportError:
+        return False
+
+
 def check_api_key():
     """Check if API key is configured"""
     return bool(os.getenv('DASHSCOPE_API_KEY'))
@@ -32,6 +41,12 @@ def main():
         print("✗ dashscope not installed (run: pip install dashscope)")
         all_ok = False
 
+    # Check httpx (optional)
+    if check_httpx():
+        print("✓ httpx installed (pooled async LLM calls)")
+    else:
+        print("○ httpx not installed (optional: pip install httpx for pooled async LLM calls)")
+
     # Check API key
     if check_api_key():
         print("✓ DASHSCOPE_API_KEY configured")
@@ -4,22 +4,38 @@
 Usage:
     python generate.py "react agent with tools"
     python generate.py "memory management" --complexity minimal
+    python generate.py "browser automation agent" --miss-log misses.jsonl
+    python generate.py "browser automation agent" --no-cache
+    python generate.py "ReAct agent with weather tool" --semantic-cache
+    python generate.py "browser automation agent" --stream
+    python generate.py --batch queries.txt --output-dir generated --rpm 60 --tpm 100000
+    python generate.py "browser automation agent" --lock-dir /tmp/agentscope-coder-locks
+    python generate.py "browser automation agent" --backend local --local-latency 2
+    python generate.py "react agent" --revalidate
 """
 
 import argparse
+import asyncio
+import sqlite3
 import sys
 import os
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from dynamic.analytics import MissRecorder
+from dynamic.backends import LocalBackend
+from dynamic.batch import BatchRunner, read_queries
+from dynamic.cache import GenerationCache, SemanticCache
 from dynamic.generator import CodeGenerator
 from dynamic.core import ComplexityLevel
+from dynamic.ratelimit import RateLimiter
+from dynamic.singleflight import SingleFlight
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate AgentScope code")
-    parser.add_argument("query", help="Code generation query")
+    parser.add_argument("query", nargs="?", help="Code generation query")
     parser.add_argument(
         "-c", "--complexity",
         choices=["minimal", "concise", "complete"],
@@ -30,13 +46,102 @@ def main():
         "-o", "--output",
         help="Output file path"
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print code lines as the LLM generates them"
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        help="LLM generation cache database (default: ~/.cache/agentscope-coder)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the LLM"
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help="Also reuse generations of paraphrased queries (requires numpy)"
+    )
+    parser.add_argument(
+        "--miss-log",
+        help="Record the query here if no template matches (see miss_report.py)"
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Print the matched template at once, then cache an LLM version for later requests"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["dashscope", "local"],
+        default="dashscope",
+        help="LLM backend; local answers offline with canned code (for benchmarks)"
+    )
+    parser.add_argument(
+        "--local-latency",
+        type=float,
+        default=0.0,
+        help="Seconds the local backend takes per call"
+    )
+    parser.add_argument(
+        "--lock-dir",
+        help="Share identical LLM generations with other processes using this directory "
+             "and the same cache"
+    )
+
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--batch", metavar="FILE", help="Generate every query in FILE (one per line)")
+    batch.add_argument("--output-dir", default="generated", help="One output file per query here")
+    batch.add_argument("--concurrency", type=int, default=8, help="Concurrent LLM calls")
+    batch.add_argument("--rpm", type=float, help="LLM requests per minute")
+    batch.add_argument("--tpm", type=float, help="LLM tokens per minute (estimated)")
+    batch.add_argument("--max-retries", type=int, default=5, help="Retries of transient failures")
+    batch.add_argument("--retry-failed", action="store_true",
+                       help="Rerun queries that failed in an earlier run")
 
     args = parser.parse_args()
+    if (args.query is None) == (args.batch is None):
+        parser.error("give either a query or --batch FILE")
 
     complexity = ComplexityLevel(args.complexity)
-    generator = CodeGenerator()
+    recorder = MissRecorder(args.miss_log) if args.miss_log else None
+    generator = CodeGenerator(
+        miss_recorder=recorder,
+        max_concurrency=args.concurrency,
+        rate_limiter=RateLimiter(args.rpm, args.tpm) if args.rpm or args.tpm else None,
+        single_flight=SingleFlight(args.lock_dir) if args.lock_dir else None,
+        backend=LocalBackend(latency=args.local_latency) if args.backend == "local" else None,
+        revalidate=args.revalidate
+    )
+    if generator.has_llm() and not args.no_cache:
+        try:
+            generator.cache = GenerationCache(args.cache)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: generation cache disabled ({e})", file=sys.stderr)
+        if args.semantic_cache and generator.cache is not None:
+            try:
+                generator.semantic_cache = SemanticCache(generator.cache)
+            except ImportError as e:
+                print(f"Warning: semantic cache disabled ({e})", file=sys.stderr)
+
+    if args.batch:
+        sys.exit(run_batch(generator, args, complexity, recorder))
 
-    result = generator.generate(args.query, complexity)
+    if args.stream and not args.output:
+        result = None
+        for item in generator.generate_stream(args.query, complexity):
+            if isinstance(item, str):
+                print(item, flush=True)
+            else:
+                result = item
+    else:
+        result = generator.generate(args.query, complexity)
+    if recorder is not None:
+        recorder.close()
 
     if result.validation and not result.is_valid():
         print(f"Error: {result.validation.message}", file=sys.stderr)
@@ -48,8 +153,38 @@ def main():
         with open(args.output, 'w') as f:
             f.write(result.code)
         print(f"Code written to {args.output}")
-    else:
-        print(result.code)
+    elif not args.stream:
+        print(result.code, flush=True)
+
+    if result.upgrade is not None:
+        print("Caching an LLM version for later requests...", file=sys.stderr)
+        generator.close()
+
+
+def run_batch(generator: CodeGenerator, args, complexity: ComplexityLevel, recorder) -> int:
+    """Batch mode; returns the exit status"""
+    queries = read_queries(args.batch)
+    runner = BatchRunner(generator, args.output_dir, complexity,
+                         max_retries=args.max_retries, retry_failed=args.retry_failed)
+
+    def progress(record):
+        detail = record.get("file") or record.get("error", "")
+        print(f"[{record['status']:7s}] {record['index']:5d} {record['query'][:50]}  {detail}",
+              file=sys.stderr, flush=True)
+
+    async def run():
+        try:
+            return await runner.run(queries, progress)
+        finally:
+            await generator.aclose()
+
+    summary = asyncio.run(run())
+    if recorder is not None:
+        recorder.close()
+    print(f"{summary.written} written ({summary.template} template, {summary.llm} llm), "
+          f"{summary.failed} failed, {summary.skipped} already done, "
+          f"{summary.retries} retries in {summary.elapsed:.1f}s -> {args.output_dir}")
+    return 1 if summary.failed else 0
 
 
 if __name__ == "__main__":
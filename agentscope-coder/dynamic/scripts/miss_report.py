@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""miss_report.py - Rank clusters of queries that no template matched
+
+Reads a miss log written by MissRecorder (generate.py --miss-log) and
+lists the largest clusters: each is a candidate template, and its size
+estimates the LLM calls that template would save.
+
+Usage:
+    python miss_report.py misses.jsonl
+    python miss_report.py misses.jsonl --top 50 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.analytics import MissRecorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report template-miss clusters")
+    parser.add_argument("log", help="Miss log JSONL file")
+    parser.add_argument("--top", type=int, default=20, help="Clusters to show")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"Error: {args.log} not found", file=sys.stderr)
+        sys.exit(1)
+
+    clusters = MissRecorder(args.log, max_clusters=sys.maxsize).top(args.top)
+    if args.json:
+        print(json.dumps(clusters, ensure_ascii=False, indent=2))
+        return
+
+    for rank, cluster in enumerate(clusters, 1):
+        examples = " | ".join(cluster["examples"][:3])
+        print(f"{rank:3d}. {cluster['estimated_misses']:6d} misses  "
+              f"{cluster['share'] * 100:5.1f}%  {examples}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""warmup.py - Fill the LLM generation cache with common queries
+
+Generates every query at every complexity level (unless a template
+serves it or it is cached already) and reports coverage and the LLM
+latency that first users no longer pay. Rerunning continues an
+interrupted run. Keep --concurrency and --rpm low while live traffic
+shares the API quota.
+
+Usage:
+    python warmup.py queries.txt
+    python warmup.py --miss-log misses.jsonl --top 200 --rpm 20
+    python warmup.py queries.txt --levels concise --concurrency 4 --cache /srv/cache.sqlite3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+
+# Add skill root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dynamic.backends import LocalBackend
+from dynamic.batch import read_queries
+from dynamic.cache import GenerationCache
+from dynamic.core import ComplexityLevel
+from dynamic.generator import CodeGenerator
+from dynamic.ratelimit import RateLimiter
+from dynamic.warmup import DEFAULT_WARMUP_CONCURRENCY, WarmupRunner, queries_from_miss_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the LLM generation cache")
+    parser.add_argument("queries", nargs="?", help="Query file (one per line, most common first)")
+    parser.add_argument("--miss-log", help="Warm the largest clusters of a miss log instead")
+    parser.add_argument("--top", type=int, default=100, help="Clusters taken from --miss-log")
+    parser.add_argument("--levels", default="minimal,concise,complete",
+                        help="Comma-separated complexity levels")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="Generation cache database (default: ~/.cache/agentscope-coder)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_WARMUP_CONCURRENCY,
+                        help="Concurrent LLM calls")
+    parser.add_argument("--rpm", type=float, help="LLM requests per minute")
+    parser.add_argument("--tpm", type=float, help="LLM tokens per minute (estimated)")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries of transient failures")
+    parser.add_argument("--backend", choices=["dashscope", "local"], default="dashscope",
+                        help="LLM backend; local answers offline with canned code")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the report")
+    args = parser.parse_args()
+    if (args.queries is None) == (args.miss_log is None):
+        parser.error("give either a query file or --miss-log")
+
+    try:
+        levels = [ComplexityLevel(level.strip()) for level in args.levels.split(",")]
+    except ValueError as e:
+        parser.error(str(e))
+    queries = (read_queries(args.queries) if args.queries
+               else queries_from_miss_log(args.miss_log, args.top))
+
+    try:
+        cache = GenerationCache(args.cache)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error: cannot open generation cache ({e})", file=sys.stderr)
+        sys.exit(1)
+    generator = CodeGenerator(
+        cache=cache,
+        max_concurrency=args.concurrency,
+        backend=LocalBackend() if args.backend == "local" else None
+    )
+    try:
+        runner = WarmupRunner(
+            generator, levels,
+            concurrency=args.concurrency,
+            rate_limiter=RateLimiter(args.rpm, args.tpm) if args.rpm or args.tpm else None,
+            max_retries=args.max_retries
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    def progress(record):
+        if not args.quiet:
+            detail = record.get("error") or record.get("seconds", "")
+            print(f"[{record['status']:8s}] {record['complexity']:8s} "
+                  f"{record['query'][:50]}  {detail}", file=sys.stderr, flush=True)
+
+    async def run():
+        try:
+            return await runner.run(queries, progress)
+        finally:
+            await generator.aclose()
+
+    report = asyncio.run(run())
+    print(json.dumps(report.to_dict(), indent=2))
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
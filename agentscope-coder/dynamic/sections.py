@@ -0,0 +1,284 @@
+"""sections.py - Section index over template source files
+
+A template file is split into top-level sections: functions, classes and
+banner-delimited blocks of other statements, e.g.
+
+    # ============ 创建消息中心 ============
+    hub = MsgHub(...)
+
+Each section is stored as a byte range plus the terms it can be found by
+and the top-level names it defines and uses. A lookup scores sections
+against the query, adds the sections they depend on and reads only those
+byte ranges (plus the imports they need) from disk.
+"""
+
+import ast
+import math
+import os
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# "# ===== title =====" or "# ----- title -----" at column 0
+BANNER_RE = re.compile(r'^#\s*[=-]{3,}\s*(.*?)\s*[=-]{3,}\s*$')
+
+# Header terms (name, docstring, banner) count this much more than body terms
+HEADER_WEIGHT = 2.0
+
+_CAMEL_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+
+
+class ImportSpan(NamedTuple):
+    """One top-level import statement"""
+    start: int  # byte offsets
+    end: int
+    names: FrozenSet[str]  # names it binds; empty for __future__ imports
+
+
+class Section(NamedTuple):
+    """One top-level function, class or banner block"""
+    name: str  # def/class name, or banner title ("" before the first banner)
+    kind: str  # "function", "class" or "block"
+    start: int  # byte offsets
+    end: int
+    header_terms: FrozenSet[str]
+    body_terms: FrozenSet[str]
+    defines: FrozenSet[str]
+    uses: FrozenSet[str]
+
+
+class SectionIndex(NamedTuple):
+    """Sections of one file, tagged with the file state they were built from"""
+    mtime_ns: int
+    size: int
+    imports: Tuple[ImportSpan, ...]
+    sections: Tuple[Section, ...]
+
+    def is_current(self, path: str) -> bool:
+        """Check the file is unchanged since the index was built"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == (self.mtime_ns, self.size)
+
+
+def build_section_index(
+    path: str,
+    terms: Callable[[str], Set[str]],
+    data: Optional[bytes] = None
+) -> Optional[SectionIndex]:
+    """Parse a template file into sections
+
+    Args:
+        path: Python source file
+        terms: Turns text into match terms (the retriever's tokenizer)
+        data: Source bytes, when they do not come from path (archives);
+            the index is then tagged with mtime 0
+
+    Returns:
+        Optional[SectionIndex]: None if the file is missing or not valid Python
+    """
+    try:
+        if data is None:
+            st = os.stat(path)
+            mtime_ns, size = st.st_mtime_ns, st.st_size
+            with open(path, 'rb') as f:
+                data = f.read()
+        else:
+            mtime_ns, size = 0, len(data)
+        tree = ast.parse(data)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    lines = data.split(b"\n")
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+    offsets[-1] = len(data)
+    banners = [(i + 1, m.group(1)) for i, line in enumerate(lines)
+               for m in [BANNER_RE.match(line.decode('utf-8', 'replace').rstrip())] if m]
+
+    imports: List[ImportSpan] = []
+    sections: List[Section] = []
+    block: List[ast.stmt] = []
+    banner_idx = -1  # last banner before the current statement
+    banner_line = 0  # line of a banner nothing has been emitted after yet
+    block_start = 0
+
+    def banner_title() -> str:
+        return banners[banner_idx][1] if banner_idx >= 0 else ""
+
+    def flush_block():
+        if block:
+            sections.append(_make_section(
+                banner_title(), "block", block, offsets[block_start - 1],
+                offsets[block[-1].end_lineno], banner_title(), terms
+            ))
+            block.clear()
+
+    body = tree.body[1:] if ast.get_docstring(tree) is not None else tree.body
+
+    for node in body:
+        first = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", ())])
+        while banner_idx + 1 < len(banners) and banners[banner_idx + 1][0] < first:
+            flush_block()
+            banner_idx += 1
+            banner_line = banners[banner_idx][0]
+        start_line = banner_line or first
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            flush_block()
+            if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+                names = frozenset()
+            else:
+                names = frozenset((a.asname or a.name.split(".")[0]) for a in node.names)
+            imports.append(ImportSpan(offsets[first - 1], offsets[node.end_lineno], names))
+            continue
+
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            flush_block()
+            kind = "class" if isinstance(node, ast.ClassDef) else "function"
+            sections.append(_make_section(
+                node.name, kind, [node], offsets[start_line - 1],
+                offsets[node.end_lineno], banner_title(), terms
+            ))
+        else:
+            if not block:
+                block_start = start_line
+            block.append(node)
+        banner_line = 0
+
+    flush_block()
+    return SectionIndex(mtime_ns, size, tuple(imports), tuple(sections))
+
+
+def select_sections(
+    index: SectionIndex,
+    query_terms: Set[str]
+) -> List[Section]:
+    """Best-scoring sections for the query plus the sections they depend on
+
+    Terms are weighted by inverse section frequency within the file, so a
+    word found in every section ("agent" in an agent template) counts
+    least. Returns sections in file order; empty if no term matches.
+    """
+    sections = index.sections
+    df: Dict[str, int] = {}
+    for section in sections:
+        for term in (section.header_terms | section.body_terms) & query_terms:
+            df[term] = df.get(term, 0) + 1
+    if not df:
+        return []
+
+    scores = []
+    for section in sections:
+        score = 0.0
+        for term in (section.header_terms | section.body_terms) & query_terms:
+            weight = math.log(1 + len(sections) / df[term])
+            score += weight * (HEADER_WEIGHT if term in section.header_terms else 1.0)
+        scores.append(score)
+
+    best = max(scores)
+    if best <= 0:
+        return []
+    chosen = {i for i, score in enumerate(scores) if score >= best - 1e-9}
+
+    # Pull in sections defining names the chosen ones use
+    definers: Dict[str, List[int]] = {}
+    for i, section in enumerate(sections):
+        for name in section.defines:
+            definers.setdefault(name, []).append(i)
+    pending = list(chosen)
+    while pending:
+        for name in sections[pending.pop()].uses:
+            for i in definers.get(name, ()):
+                if i not in chosen:
+                    chosen.add(i)
+                    pending.append(i)
+    return [sections[i] for i in sorted(chosen)]
+
+
+def read_sections(
+    path: str,
+    index: SectionIndex,
+    sections: Iterable[Section],
+    data: Optional[bytes] = None
+) -> str:
+    """Read the given sections and the imports they use
+
+    Only the needed byte ranges are read from path, or sliced from data
+    when the source is already in memory.
+    """
+    sections = list(sections)
+    used: Set[str] = set()
+    for section in sections:
+        used |= section.uses
+    spans = [(span.start, span.end) for span in index.imports
+             if not span.names or span.names & used]
+
+    if data is None:
+        with open(path, 'rb') as f:
+            chunks = []
+            for start, end in spans + [(s.start, s.end) for s in sections]:
+                f.seek(start)
+                chunks.append(f.read(end - start))
+    else:
+        chunks = [data[start:end] for start, end in spans + [(s.start, s.end) for s in sections]]
+    chunks = [chunk.decode('utf-8').rstrip() for chunk in chunks]
+
+    parts = chunks[len(spans):]
+    if spans:
+        parts.insert(0, "\n".join(chunks[:len(spans)]))
+    return "\n\n\n".join(parts) + "\n"
+
+
+def _make_section(
+    name: str,
+    kind: str,
+    nodes: List[ast.stmt],
+    start: int,
+    end: int,
+    banner: str,
+    terms: Callable[[str], Set[str]]
+) -> Section:
+    """Collect terms and top-level names of a run of statements"""
+    header = [banner]
+    body: List[str] = []
+    defines: Set[str] = set()
+    uses: Set[str] = set()
+    local: Set[str] = set()  # names bound inside functions and classes
+    for node in nodes:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            header.extend([_split_identifier(node.name), node.name, ast.get_docstring(node) or ""])
+            defines.add(node.name)
+        scoped = isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        for child in ast.walk(node):
+            if scoped and isinstance(child, ast.arg):
+                local.add(child.arg)
+            if isinstance(child, ast.Name):
+                body.append(_split_identifier(child.id))
+                if isinstance(child.ctx, ast.Store):
+                    (local if scoped else defines).add(child.id)
+                elif isinstance(child.ctx, ast.Load):
+                    uses.add(child.id)
+            elif isinstance(child, ast.Attribute):
+                body.append(_split_identifier(child.attr))
+            elif isinstance(child, ast.Constant) and isinstance(child.value, str):
+                body.append(child.value)
+
+    header_terms = frozenset(terms("\n".join(header)))
+    return Section(
+        name=name,
+        kind=kind,
+        start=start,
+        end=end,
+        header_terms=header_terms,
+        body_terms=frozenset(terms("\n".join(body))) - header_terms,
+        defines=frozenset(defines),
+        uses=frozenset(uses - defines - local),
+    )
+
+
+def _split_identifier(name: str) -> str:
+    """Split an identifier into words: ToolRegistry, tool_registry -> Tool Registry, tool registry"""
+    return _CAMEL_RE.sub(" ", name).replace("_", " ")
@@ -0,0 +1,112 @@
+"""semantic.py - Offline semantic matching with hashed n-gram embeddings
+
+No network and no model download: text is embedded by hashing word and
+character n-grams into a fixed number of buckets with TF-IDF weighting.
+Requires numpy (optional dependency).
+"""
+
+import math
+import re
+import zlib
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+_CAMEL_RE = re.compile(r'([a-z0-9])([A-Z])')
+_WORD_RE = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]+')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+
+def has_numpy() -> bool:
+    """Check if numpy is installed"""
+    return np is not None
+
+
+class HashingEmbedder:
+    """Deterministic text embedder over hashed word and character n-grams
+
+    Word unigrams/bigrams and character 3/4-grams of English words (2/3-grams
+    of CJK runs) are hashed with CRC32 into `dim` buckets. Bucket weights are
+    sublinear TF times IDF learned by fit().
+    """
+
+    def __init__(self, dim: int = 4096):
+        if np is None:
+            raise ImportError("numpy is required for semantic matching (pip install numpy)")
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def features(self, text: str) -> Dict[int, int]:
+        """Count hashed features of text, keyed by bucket"""
+        words = _WORD_RE.findall(_CAMEL_RE.sub(r'\1 \2', text).lower())
+        feats = []
+        for i, word in enumerate(words):
+            if _CJK_RE.match(word):
+                feats.extend(f"c:{g}" for g in _char_ngrams(word, (2, 3)))
+                continue
+            feats.append(f"w:{word}")
+            if i + 1 < len(words):
+                feats.append(f"b:{word} {words[i + 1]}")
+            feats.extend(f"c:{g}" for g in _char_ngrams(f"<{word}>", (3, 4)))
+
+        counts: Dict[int, int] = {}
+        for feat in feats:
+            bucket = zlib.crc32(feat.encode('utf-8')) % self.dim
+            counts[bucket] = counts.get(bucket, 0) + 1
+        return counts
+
+    def fit(self, texts: Sequence[str]) -> "HashingEmbedder":
+        """Learn IDF weights from a document collection"""
+        df = np.zeros(self.dim, dtype=np.float32)
+        for text in texts:
+            df[list(self.features(text))] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, text: str) -> "np.ndarray":
+        """Embed text as an L2-normalized float32 vector"""
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for bucket, count in self.features(text).items():
+            vec[bucket] = (1 + math.log(count)) * self.idf[bucket]
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def embed_many(self, texts: Sequence[str]) -> "np.ndarray":
+        """Embed texts into one contiguous (len(texts), dim) float32 matrix"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed(text)
+        return np.ascontiguousarray(matrix)
+
+
+class SemanticIndex:
+    """Cosine-similarity search over a fixed set of documents"""
+
+    def __init__(self, ids: List[str], texts: List[str], dim: int = 4096):
+        self.ids = list(ids)
+        self.embedder = HashingEmbedder(dim).fit(texts)
+        self.matrix = self.embedder.embed_many(texts)
+
+    def search(self, query: str, k: int = 1) -> List[Tuple[str, float]]:
+        """Return up to k (id, cosine similarity) pairs, best first"""
+        if not self.ids or k <= 0:
+            return []
+        scores = self.matrix @ self.embedder.embed(query)
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+
+def _char_ngrams(text: str, sizes: Tuple[int, ...]) -> List[str]:
+    """Character n-grams of text for each size (whole text if shorter)"""
+    grams = []
+    for n in sizes:
+        if len(text) <= n:
+            grams.append(text)
+            break
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
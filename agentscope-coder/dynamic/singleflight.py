@@ -0,0 +1,227 @@
+"""singleflight.py - Coalescing of concurrent identical generations
+
+When a popular query spikes, every concurrent cache miss would start its
+own LLM call. SingleFlight lets the first caller of a key (the leader)
+do the work; callers arriving while it runs (followers) wait for its
+result, or its exception, instead. Sync and async callers of one
+instance share flights. If the leader is cancelled, a follower takes
+over.
+
+With a lock_dir, the leader also holds an flock on a per-key lock file,
+so leaders in other processes wait for each other too. The work function
+should re-check a shared cache first: a leader that waited finds the
+other process's result there. The OS drops the flocks of a dead process,
+so lock files never go stale.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Longest wait for another caller's result, in seconds
+DEFAULT_TIMEOUT = 120.0
+
+# Poll interval while another process holds a lock file
+LOCK_POLL_INTERVAL = 0.05
+
+T = TypeVar("T")
+
+
+class _LeaderAbandoned(Exception):
+    """Set on a flight whose leader was cancelled; followers retry"""
+
+
+class SingleFlight:
+    """At most one in-flight call per key, in this process and optionally across processes"""
+
+    def __init__(self, lock_dir: Optional[str] = None, timeout: Optional[float] = DEFAULT_TIMEOUT):
+        """Initialize coalescer
+
+        Args:
+            lock_dir: Directory of per-key lock files for cross-process
+                coalescing (optional; needs fcntl)
+            timeout: Seconds a caller waits for another caller's result or
+                lock before raising TimeoutError (None: no limit)
+        """
+        if lock_dir and fcntl is None:
+            logger.warning("fcntl not available; coalescing within this process only")
+            lock_dir = None
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self.led = 0
+        self.joined = 0
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Result of fn(), shared with concurrent callers of the same key
+
+        Raises:
+            TimeoutError: Waited longer than timeout
+            Exception: Whatever the leader's fn() raised
+        """
+        deadline = self._deadline()
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return self._lead(key, future, fn, deadline)
+            try:
+                return future.result(self._remaining(deadline))
+            except _LeaderAbandoned:
+                continue
+            except FutureTimeoutError:
+                if future.done():
+                    raise
+                raise self._timed_out(key)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """do() for coroutine functions"""
+        deadline = self._deadline()
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return await self._alead(key, future, fn, deadline)
+            # Cancelling the wrapper (timeout, our own cancellation) leaves
+            # the running flight alone
+            waiter = asyncio.wrap_future(future)
+            try:
+                return await asyncio.wait_for(waiter, self._remaining(deadline))
+            except _LeaderAbandoned:
+                continue
+            except asyncio.TimeoutError:
+                if waiter.cancelled():
+                    raise self._timed_out(key)
+                raise
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """The key's flight, and whether the caller just started it"""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.joined += 1
+                return future, False
+            future = self._flights[key] = Future()
+            # Running futures cannot be cancelled by a follower's wrapper
+            future.set_running_or_notify_cancel()
+            self.led += 1
+            return future, True
+
+    def _lead(self, key: str, future: Future, fn: Callable[[], T], deadline: Optional[float]) -> T:
+        try:
+            with self._file_lock(key, deadline):
+                result = fn()
+        except Exception as e:
+            self._land(key, future, error=e)
+            raise
+        except BaseException:
+            self._land(key, future, error=_LeaderAbandoned())
+            raise
+        self._land(key, future, result=result)
+        return result
+
+    async def _alead(
+        self,
+        key: str,
+        future: Future,
+        fn: Callable[[], Awaitable[T]],
+        deadline: Optional[float]
+    ) -> T:
+        try:
+            async with self._afile_lock(key, deadline):
+                result = await fn()
+        except Exception as e:
+            self._land(key, future, error=e)
+            raise
+        except BaseException:
+            self._land(key, future, error=_LeaderAbandoned())
+            raise
+        self._land(key, future, result=result)
+        return result
+
+    def _land(self, key: str, future: Future, result=None, error: Optional[BaseException] = None):
+        """Hand the outcome to followers, then let the next caller lead"""
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    @contextmanager
+    def _file_lock(self, key: str, deadline: Optional[float]):
+        if not self.lock_dir:
+            yield
+            return
+        fd = self._open_lock(key)
+        try:
+            while not _try_flock(fd):
+                remaining = self._remaining(deadline)
+                if remaining is not None and remaining <= 0:
+                    raise self._timed_out(key)
+                time.sleep(_poll_delay(remaining))
+            yield
+        finally:
+            # Closing the descriptor releases the flock
+            os.close(fd)
+
+    @asynccontextmanager
+    async def _afile_lock(self, key: str, deadline: Optional[float]):
+        if not self.lock_dir:
+            yield
+            return
+        fd = self._open_lock(key)
+        try:
+            while not _try_flock(fd):
+                remaining = self._remaining(deadline)
+                if remaining is not None and remaining <= 0:
+                    raise self._timed_out(key)
+                await asyncio.sleep(_poll_delay(remaining))
+            yield
+        finally:
+            os.close(fd)
+
+    def _open_lock(self, key: str) -> int:
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + ".lock"
+        return os.open(os.path.join(self.lock_dir, name), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _deadline(self) -> Optional[float]:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def _timed_out(self, key: str) -> TimeoutError:
+        return TimeoutError(f"Timed out after {self.timeout}s waiting for an identical request")
+
+
+def _poll_delay(remaining: Optional[float]) -> float:
+    return LOCK_POLL_INTERVAL if remaining is None else min(LOCK_POLL_INTERVAL, remaining)
+
+
+def _try_flock(fd: int) -> bool:
+    """Take an exclusive flock without blocking"""
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
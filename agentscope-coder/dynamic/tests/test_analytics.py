@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Unit tests for analytics.py"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.analytics import MissRecorder, minhash, shingles, similarity
+from dynamic.generator import CodeGenerator
+
+
+class TestMinHash(unittest.TestCase):
+    """Test cases for query signatures"""
+
+    def test_shingles_normalized(self):
+        """Test stopwords are dropped and words normalized"""
+        self.assertEqual(shingles("How to use browser agents"), ["browser", "agent"])
+        self.assertEqual(shingles("浏览器代理"), ["浏览", "览器", "器代", "代理"])
+        self.assertEqual(shingles("  "), [""])
+
+    def test_similarity(self):
+        """Test signatures estimate Jaccard similarity"""
+        a = minhash(shingles("browser automation agent"))
+        self.assertEqual(similarity(a, minhash(shingles("Browser agents automation"))), 1.0)
+        self.assertLess(similarity(a, minhash(shingles("excel spreadsheet export"))), 0.2)
+
+
+class TestMissRecorder(unittest.TestCase):
+    """Test cases for MissRecorder"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "misses.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_clusters_ranked(self):
+        """Test similar misses share a cluster and large clusters rank first"""
+        recorder = MissRecorder()
+        for query in ["browser automation agent", "browser automation agents",
+                      "Browser  automation agent", "agent for browser automation"]:
+            recorder.record(query)
+        recorder.record("excel spreadsheet export")
+        top = recorder.top()
+        self.assertEqual(len(recorder), 2)
+        self.assertEqual(top[0]["count"], 4)
+        self.assertEqual(top[0]["examples"][0], "browser automation agent")
+        self.assertEqual(top[1]["examples"], ["excel spreadsheet export"])
+
+    def test_sampling(self):
+        """Test unsampled misses are skipped and estimates are scaled"""
+        recorder = MissRecorder(sample_rate=0.0)
+        self.assertFalse(recorder.record("browser automation"))
+        self.assertEqual(len(recorder), 0)
+
+        recorder = MissRecorder(sample_rate=0.5)
+        recorder._random.seed(0)
+        sampled = sum(recorder.record("browser automation") for _ in range(200))
+        self.assertEqual(recorder.top()[0]["estimated_misses"], sampled * 2)
+
+    def test_bounded_clusters(self):
+        """Test the smallest clusters are evicted past max_clusters"""
+        recorder = MissRecorder(max_clusters=10)
+        for _ in range(3):
+            recorder.record("browser automation agent")
+        for i in range(100):
+            recorder.record(f"unrelated query number{i} topic{i * 7}")
+        self.assertLessEqual(len(recorder), 10)
+        self.assertEqual(recorder.top(1)[0]["count"], 3)
+        self.assertGreater(recorder.evicted, 0)
+
+    def test_flush_and_reload(self):
+        """Test clusters survive a flush and accumulate across runs"""
+        recorder = MissRecorder(self.path)
+        recorder.record("browser automation agent")
+        recorder.record("excel spreadsheet export")
+        recorder.close()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 2)
+
+        recorder = MissRecorder(self.path)
+        recorder.record("browser automation agents")
+        self.assertEqual(len(recorder), 2)
+        self.assertEqual(recorder.top(1)[0]["count"], 2)
+
+    def test_periodic_flush(self):
+        """Test record flushes once flush_interval has passed"""
+        recorder = MissRecorder(self.path, flush_interval=0)
+        recorder.record("browser automation agent")
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_periodic_flush_not_repeated(self):
+        """Test recorders skip the flush while another thread is doing it or just did"""
+        recorder = MissRecorder(self.path, flush_interval=60)
+        recorder._last_flush -= 60
+        with recorder._flush_lock:
+            recorder.record("browser automation agent")
+        self.assertFalse(os.path.exists(self.path))
+
+        recorder.record("browser automation agent")
+        self.assertTrue(os.path.exists(self.path))
+        os.remove(self.path)
+        recorder.record("excel spreadsheet export")
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestGeneratorMisses(unittest.TestCase):
+    """Test CodeGenerator reports template misses"""
+
+    def test_only_misses_recorded(self):
+        """Test template hits are not recorded and misses are"""
+        recorder = MissRecorder()
+        generator = CodeGenerator(api_key="", miss_recorder=recorder)
+        generator.generate("react agent")
+        self.assertEqual(len(recorder), 0)
+        generator.generate("quantum spreadsheet")
+        self.assertEqual(recorder.top()[0]["examples"], ["quantum spreadsheet"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Unit tests for archive.py"""
+
+import sys
+import os
+import gc
+import shutil
+import tempfile
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.archive import TemplateArchive, archive_path, collect_files, write_archive
+from dynamic.retriever import TemplateRetriever
+
+TEMPLATES_DIR = os.path.join(parent_dir, "references", "templates")
+
+
+class TestTemplateArchive(unittest.TestCase):
+    """Test cases for the archive format"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = archive_path(self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_roundtrip(self):
+        """Test every packed file reads back unchanged"""
+        files = collect_files(TEMPLATES_DIR)
+        stats = write_archive(files, self.path)
+        archive = TemplateArchive(self.path)
+        self.assertEqual(sorted(archive.names()), sorted(files))
+        for name, data in files.items():
+            self.assertEqual(archive.read(name), data)
+        self.assertLess(stats["archive_bytes"], stats["raw_bytes"] // 2)
+        archive.close()
+
+    def test_without_dictionary(self):
+        """Test archives without a preset dictionary"""
+        write_archive({"a.py": b"print('a')\n"}, self.path, use_dictionary=False)
+        archive = TemplateArchive(self.path)
+        self.assertEqual(archive.read("a.py"), b"print('a')\n")
+        archive.close()
+
+    def test_rejects_truncated_file(self):
+        """Test a partially written archive is not opened"""
+        write_archive({"a.py": b"x = 1\n" * 100}, self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with open(self.path, 'wb') as f:
+            f.write(data[:-10])
+        with self.assertRaises(ValueError):
+            TemplateArchive(self.path)
+
+    def test_detects_corrupt_entry(self):
+        """Test entry checksums are verified"""
+        write_archive({"a.py": b"x = 1\n" * 100, "b.py": b"y = 2\n"}, self.path,
+                      use_dictionary=False)
+        archive = TemplateArchive(self.path)
+        offset, length = archive.entries["a.py"][:2]
+        archive.close()
+        with open(self.path, 'r+b') as f:
+            f.seek(offset + length // 2)
+            f.write(b"\xff\xff")
+        archive = TemplateArchive(self.path)
+        with self.assertRaises(ValueError):
+            archive.read("a.py")
+        self.assertEqual(archive.read("b.py"), b"y = 2\n")
+        archive.close()
+
+
+class TestArchivedRetriever(unittest.TestCase):
+    """Test TemplateRetriever serving templates from an archive"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        write_archive(collect_files(TEMPLATES_DIR), archive_path(cls.tmp))
+        cls.archived = TemplateRetriever(cls.tmp)
+        cls.raw = TemplateRetriever()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_same_answers_as_raw_files(self):
+        """Test matches and template code equal the unpacked templates"""
+        self.assertTrue(self.archived.use_archive)
+        self.assertEqual(list(self.archived.templates), list(self.raw.templates))
+        self.assertEqual(self.archived.match("react agent").id, "react_agent")
+        for level in ("minimal", "concise", "complete"):
+            self.assertEqual(self.archived.get_template_code("rag", level),
+                             self.raw.get_template_code("rag", level))
+
+    def test_entries_decompressed_lazily(self):
+        """Test nothing is decompressed until a template is requested"""
+        retriever = TemplateRetriever(self.tmp)
+        self.assertEqual(retriever._snapshot.contents, {})
+        retriever.get_template_code("streaming", "concise")
+        self.assertEqual(len(retriever._snapshot.contents), 1)
+
+    def test_sections_from_archive(self):
+        """Test section lookup works on archived sources"""
+        query = "format currency"
+        self.assertEqual(
+            self.archived.get_template_section("custom_tool", "complete", query),
+            self.raw.get_template_section("custom_tool", "complete", query)
+        )
+
+    def test_etags_match_raw_files(self):
+        """Test archived templates carry the same content hashes"""
+        self.assertEqual(self.archived.templates["rag"].content_hashes,
+                         self.raw.templates["rag"].content_hashes)
+        etag = self.raw.templates["rag"].content_hashes["complete"]
+        result = self.archived.get_template_code_if_changed("rag", "complete", etag)
+        self.assertFalse(result.modified)
+
+    def test_replaced_archive_is_reloaded(self):
+        """Test refresh picks up a rebuilt archive and drops cached code"""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        files = collect_files(TEMPLATES_DIR)
+        write_archive(files, archive_path(root))
+        retriever = TemplateRetriever(root)
+        name = "advanced/rag/concise.py"
+        self.assertIsNotNone(retriever.get_template_code("rag"))
+        old_file = retriever._archive._file
+
+        files[name] = b"# rebuilt\n"
+        write_archive(files, archive_path(root))
+        self.assertTrue(retriever.refresh([archive_path(root)]))
+        self.assertEqual(retriever.get_template_code("rag"), "# rebuilt\n")
+        # The replaced archive's file is closed once nothing refers to it
+        gc.collect()
+        self.assertTrue(old_file.closed)
+
+    def test_captured_snapshot_reads_its_archive(self):
+        """Test a lookup holding the old snapshot reads the old archive"""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        files = collect_files(TEMPLATES_DIR)
+        write_archive(files, archive_path(root))
+        retriever = TemplateRetriever(root)
+        name = "advanced/rag/concise.py"
+        path = os.path.join(root, name)
+        snap = retriever._snapshot
+        old_file = snap.source_archive._file
+        original = files[name].decode('utf-8')
+
+        files[name] = b"# rebuilt\n"
+        write_archive(files, archive_path(root))
+        self.assertTrue(retriever.refresh([archive_path(root)]))
+        self.assertFalse(old_file.closed)
+        self.assertEqual(retriever._read_source(snap, path), original)
+        self.assertEqual(snap.contents[os.path.abspath(path)], original)
+        self.assertEqual(retriever._read_source(retriever._snapshot, path), "# rebuilt\n")
+
+        del snap
+        gc.collect()
+        self.assertTrue(old_file.closed)
+
+    def test_replaced_archive_invalidates_etags(self):
+        """Test an edited archive with unchanged metadata reports new etags"""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        files = collect_files(TEMPLATES_DIR)
+        write_archive(files, archive_path(root))
+        retriever = TemplateRetriever(root)
+        etag = retriever.templates["rag"].content_hashes["concise"]
+        self.assertFalse(retriever.get_template_code_if_changed("rag", "concise", etag).modified)
+
+        files["advanced/rag/concise.py"] = b"# rebuilt\n"
+        write_archive(files, archive_path(root))
+        self.assertTrue(retriever.refresh([archive_path(root)]))
+        result = retriever.get_template_code_if_changed("rag", "concise", etag)
+        self.assertTrue(result.modified)
+        self.assertEqual(result.code, "# rebuilt\n")
+        self.assertNotEqual(retriever.templates["rag"].content_hashes["concise"], etag)
+
+
+if __name__ == "__main__":
+    unittest.main()
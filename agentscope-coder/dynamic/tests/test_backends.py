@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Unit tests for backends.py"""
+
+import sys
+import os
+import asyncio
+import json
+import time
+import unittest
+from unittest import mock
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.backends import DashScopeBackend, LocalBackend, local_code
+from dynamic.core import ComplexityLevel
+from dynamic.errors import LLMGenerationError
+from dynamic.generator import CodeGenerator
+from dynamic.validator import CodeValidator
+
+PROMPT = "Generate Python code for: quantum spreadsheet\n- Code length: 50-100 lines\n"
+
+
+class TestLocalBackend(unittest.TestCase):
+    """Test cases for LocalBackend"""
+
+    def test_deterministic_templated_response(self):
+        """Test equal prompts get equal, valid, sized code"""
+        backend = LocalBackend()
+        text = backend.call(PROMPT)
+        self.assertEqual(text, backend.call(PROMPT))
+        data = json.loads(text)
+        self.assertEqual(data["title"], "quantum spreadsheet")
+        self.assertEqual(len(data["code"].splitlines()), 50)
+        self.assertTrue(CodeValidator().validate_complete(data["code"])["is_valid"])
+        self.assertEqual(backend.calls, 2)
+
+    def test_canned_response(self):
+        """Test a canned response is chosen by query substring"""
+        backend = LocalBackend({"Spreadsheet": "not json"})
+        self.assertEqual(backend.call(PROMPT), "not json")
+
+    def test_latency(self):
+        """Test calls take the configured time, on threads and loops"""
+        backend = LocalBackend(latency=0.05, chars_per_second=1e5)
+        start = time.perf_counter()
+        backend.call(PROMPT)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+        async def run():
+            start = time.perf_counter()
+            await asyncio.gather(*(backend.acall(PROMPT) for _ in range(10)))
+            return time.perf_counter() - start
+
+        self.assertLess(asyncio.run(run()), 0.4)
+
+    def test_stream_chunks(self):
+        """Test streamed chunks add up to the call response"""
+        backend = LocalBackend()
+        chunks = list(backend.stream(PROMPT))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), backend.call(PROMPT))
+
+    def test_fail_every(self):
+        """Test injected failures look like rate limits"""
+        backend = LocalBackend(fail_every=2)
+        backend.call(PROMPT)
+        with self.assertRaisesRegex(LLMGenerationError, "429"):
+            backend.call(PROMPT)
+
+    def test_local_code_escapes_query(self):
+        """Test quotes in a query keep the code valid"""
+        code = local_code('say "hi" \\ and \'bye\'', 20)
+        self.assertTrue(CodeValidator().validate_complete(code)["is_valid"])
+
+
+class TestGeneratorBackends(unittest.TestCase):
+    """Test cases for CodeGenerator with pluggable backends"""
+
+    def test_local_backend_paths(self):
+        """Test generate, agenerate and generate_stream through LocalBackend"""
+        generator = CodeGenerator(backend=LocalBackend())
+        self.assertTrue(generator.has_llm())
+        result = generator.generate("quantum spreadsheet", ComplexityLevel.MINIMAL)
+        self.assertEqual(result.source, "llm")
+        self.assertTrue(result.is_valid())
+        self.assertEqual(asyncio.run(generator.agenerate("quantum spreadsheet",
+                                                         ComplexityLevel.MINIMAL)).code, result.code)
+        items = list(generator.generate_stream("quantum spreadsheet", ComplexityLevel.MINIMAL))
+        self.assertEqual(items[-1].code, result.code)
+        self.assertEqual(generator._cache_args()[0], "local")
+
+    def test_dashscope_availability(self):
+        """Test DashScope needs an API key"""
+        with mock.patch.dict(os.environ, {"DASHSCOPE_API_KEY": ""}):
+            self.assertFalse(CodeGenerator().has_llm())
+        self.assertTrue(DashScopeBackend("key").available())
+
+    def test_backend_missing(self):
+        """Test a missing client library gives a failed result"""
+        with mock.patch.dict(sys.modules, {"dashscope": None}):
+            result = CodeGenerator(api_key="key").generate("quantum spreadsheet")
+        self.assertEqual(result.validation.message, "dashscope backend not installed")
+        self.assertIn("pip install dashscope", result.validation.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
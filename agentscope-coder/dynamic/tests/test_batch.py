@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Unit tests for batch.py"""
+
+import sys
+import os
+import asyncio
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.batch import CHECKPOINT_FILE, BatchRunner, is_transient, output_name, read_queries
+from dynamic.core import ComplexityLevel, GeneratedCode, ValidationResult, ValidationStatus
+
+
+def _failed(error: str, message: str = "LLM generation failed") -> GeneratedCode:
+    return GeneratedCode(code="", title="Generation Failed", complexity=ComplexityLevel.CONCISE,
+                         source="llm", validation=ValidationResult(
+                             status=ValidationStatus.FAILED, message=message, error=error))
+
+
+class _FakeGenerator:
+    """agenerate stand-in with scripted failures per query"""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self.closed = False
+
+    async def agenerate(self, query, complexity):
+        self.calls.append(query)
+        script = self.failures.get(query)
+        if script:
+            return _failed(script.pop(0))
+        if query == "bad":
+            return _failed("Failed to extract code", message="Failed to parse LLM response")
+        return GeneratedCode(code=f"# {query}\n", title=query, complexity=complexity, source="llm")
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestBatchHelpers(unittest.TestCase):
+    """Test cases for batch helpers"""
+
+    def test_transient_classification(self):
+        """Test rate limits and server errors are retried, bad requests not"""
+        self.assertTrue(is_transient(_failed("API error 429: Throttling.RateQuota")))
+        self.assertTrue(is_transient(_failed("API error 503: ServiceUnavailable")))
+        self.assertTrue(is_transient(_failed("ReadTimeout: timed out")))
+        self.assertFalse(is_transient(_failed("API error 400: InvalidParameter")))
+        self.assertFalse(is_transient(_failed("timeout", message="Failed to parse LLM response")))
+
+    def test_output_name(self):
+        """Test file names are indexed slugs"""
+        self.assertEqual(output_name(7, "ReAct agent, with tools!"), "00007_react_agent_with_tools.py")
+        self.assertEqual(output_name(8, "多智能体"), "00008_query.py")
+
+    def test_read_queries(self):
+        """Test blank lines and comments are skipped"""
+        with tempfile.NamedTemporaryFile('w', suffix=".txt", delete=False) as f:
+            f.write("a\n\n# note\n  b  \n")
+        self.addCleanup(os.unlink, f.name)
+        self.assertEqual(read_queries(f.name), ["a", "b"])
+
+
+class TestBatchRunner(unittest.TestCase):
+    """Test cases for BatchRunner"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _runner(self, generator, **kwargs):
+        return BatchRunner(generator, self.tmp, backoff_base=0.001, **kwargs)
+
+    def test_outputs_and_retries(self):
+        """Test one file per query and transient failures retried"""
+        generator = _FakeGenerator({"b": ["API error 429: Throttling", "API error 500: x"]})
+        summary = asyncio.run(self._runner(generator).run(["a", "b", "bad"]))
+        self.assertEqual((summary.written, summary.failed, summary.retries), (2, 1, 2))
+        self.assertEqual(generator.calls.count("b"), 3)
+        self.assertTrue(generator.closed)
+        with open(os.path.join(self.tmp, output_name(1, "b"))) as f:
+            self.assertEqual(f.read(), "# b\n")
+
+    def test_retries_exhausted(self):
+        """Test a persistent transient failure stops after max_retries"""
+        generator = _FakeGenerator({"a": ["API error 503: busy"] * 10})
+        summary = asyncio.run(self._runner(generator, max_retries=2).run(["a"]))
+        self.assertEqual((summary.failed, summary.retries), (1, 2))
+        self.assertEqual(len(generator.calls), 3)
+
+    def test_resume(self):
+        """Test a second run skips finished queries and survives a torn line"""
+        asyncio.run(self._runner(_FakeGenerator()).run(["a", "b", "bad"]))
+        with open(os.path.join(self.tmp, CHECKPOINT_FILE), 'a') as f:
+            f.write('{"index": 3, "que')
+
+        generator = _FakeGenerator()
+        summary = asyncio.run(self._runner(generator).run(["a", "b", "bad", "c"]))
+        self.assertEqual(generator.calls, ["c"])
+        self.assertEqual(summary.skipped, 3)
+
+        generator = _FakeGenerator()
+        asyncio.run(self._runner(generator, retry_failed=True).run(["a", "b", "bad", "c"]))
+        self.assertEqual(generator.calls, ["bad"])
+
+    def test_changed_query_regenerated(self):
+        """Test an edited input line is not taken from the checkpoint"""
+        asyncio.run(self._runner(_FakeGenerator()).run(["a"]))
+        generator = _FakeGenerator()
+        asyncio.run(self._runner(generator).run(["a2"]))
+        self.assertEqual(generator.calls, ["a2"])
+        with open(os.path.join(self.tmp, CHECKPOINT_FILE)) as f:
+            self.assertEqual([json.loads(line)["query"] for line in f], ["a", "a2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Unit tests for cache.py"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import types
+import unittest
+from multiprocessing import get_context
+from unittest import mock
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.backends import LocalBackend
+from dynamic.cache import GenerationCache, SemanticCache, cache_key
+from dynamic.core import ComplexityLevel, GeneratedCode, ValidationResult, ValidationStatus
+from dynamic.generator import CodeGenerator
+from dynamic.semantic import has_numpy
+
+KEY = ("qwen-max", "1", "1")
+CONCISE = ComplexityLevel.CONCISE
+
+
+def _result(code: str, complexity: ComplexityLevel = CONCISE) -> GeneratedCode:
+    return GeneratedCode(
+        code=code, title="Demo", complexity=complexity, source="llm",
+        validation=ValidationResult(status=ValidationStatus.FAILED, message="bad", error="e")
+    )
+
+
+def _write_many(path: str, worker: int):
+    cache = GenerationCache(path)
+    for i in range(30):
+        cache.put(f"query {worker} {i}", _result(f"x = {i}"), *KEY)
+        cache.get(f"query {(worker + 1) % 4} {i}", CONCISE, *KEY)
+
+
+class TestGenerationCache(unittest.TestCase):
+    """Test cases for GenerationCache"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "cache", "gen.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_roundtrip(self):
+        """Test code and validation survive storage and queries are normalized"""
+        cache = GenerationCache(self.path)
+        self.assertIsNone(cache.get("Browser agent", CONCISE, *KEY))
+        cache.put("Browser agent", _result("x = 1"), *KEY)
+
+        cached = cache.get("  browser   AGENT ", CONCISE, *KEY)
+        self.assertEqual(cached.code, "x = 1")
+        self.assertEqual(cached.validation.status, ValidationStatus.FAILED)
+        self.assertEqual(cached.validation.error, "e")
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+        # Persisted for other instances
+        self.assertIsNotNone(GenerationCache(self.path).get("browser agent", CONCISE, *KEY))
+
+    def test_key_components(self):
+        """Test complexity, model, prompt and validator versions all key entries"""
+        cache = GenerationCache(self.path)
+        cache.put("browser agent", _result("x = 1"), *KEY)
+        self.assertIsNone(cache.get("browser agent", ComplexityLevel.MINIMAL, *KEY))
+        self.assertIsNone(cache.get("browser agent", CONCISE, "qwen-plus", "1", "1"))
+        self.assertIsNone(cache.get("browser agent", CONCISE, "qwen-max", "2", "1"))
+        self.assertIsNone(cache.get("browser agent", CONCISE, "qwen-max", "1", "2"))
+
+    def test_ttl(self):
+        """Test expired entries are neither returned nor kept"""
+        cache = GenerationCache(self.path, ttl=0.05)
+        cache.put("browser agent", _result("x = 1"), *KEY)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("browser agent", CONCISE, *KEY))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted past max_entries"""
+        cache = GenerationCache(self.path, max_entries=2, touch_interval=0)
+        cache.put("a", _result("a = 1"), *KEY)
+        cache.put("b", _result("b = 1"), *KEY)
+        time.sleep(0.01)
+        cache.get("a", CONCISE, *KEY)
+        cache.put("c", _result("c = 1"), *KEY)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get("a", CONCISE, *KEY))
+        self.assertIsNone(cache.get("b", CONCISE, *KEY))
+
+    def test_concurrent_processes(self):
+        """Test worker processes share one database safely"""
+        GenerationCache(self.path)
+        ctx = get_context("spawn")
+        workers = [ctx.Process(target=_write_many, args=(self.path, w)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join(60)
+            self.assertEqual(p.exitcode, 0)
+        cache = GenerationCache(self.path)
+        self.assertEqual(len(cache), 120)
+        self.assertEqual(cache.get("query 3 29", CONCISE, *KEY).code, "x = 29")
+
+    def test_legacy_table_upgraded(self):
+        """Test a database from before entry ids keeps its entries"""
+        os.makedirs(os.path.dirname(self.path))
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "CREATE TABLE generations (key TEXT PRIMARY KEY, query TEXT NOT NULL, "
+            "complexity TEXT NOT NULL, model TEXT NOT NULL, prompt_version TEXT NOT NULL, "
+            "validator_version TEXT NOT NULL, title TEXT NOT NULL, code TEXT NOT NULL, "
+            "status TEXT, message TEXT, error TEXT, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        now = time.time()
+        conn.execute("INSERT INTO generations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (cache_key("browser agent", "concise", *KEY), "browser agent", "concise",
+                      *KEY, "Demo", "x = 1", None, None, None, now, now))
+        conn.commit()
+        conn.close()
+
+        cache = GenerationCache(self.path)
+        self.assertEqual(cache.get("browser agent", CONCISE, *KEY).code, "x = 1")
+        self.assertEqual([row[:2] for row in cache.entries_since(0)], [(1, "browser agent")])
+
+
+@unittest.skipUnless(has_numpy(), "numpy not installed")
+class TestSemanticCache(unittest.TestCase):
+    """Test cases for SemanticCache"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = GenerationCache(os.path.join(self.tmp, "gen.sqlite3"))
+        self.store.put("react agent that calls a weather tool", _result("weather = 1"), *KEY)
+        self.store.put("web scraper agent that saves to csv", _result("csv = 1"), *KEY)
+        self.cache = SemanticCache(self.store)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_paraphrase_hit(self):
+        """Test paraphrases return the cached generation"""
+        self.assertEqual(self.cache.get("ReAct agent with weather tool", CONCISE, *KEY).code,
+                         "weather = 1")
+        self.assertEqual(self.cache.get("agent that scrapes websites and saves csv",
+                                        CONCISE, *KEY).code, "csv = 1")
+        self.assertEqual(self.cache.stats(), {"hits": 2, "misses": 0, "size": 2})
+
+    def test_different_request_miss(self):
+        """Test similar wording with a different subject misses"""
+        self.assertIsNone(self.cache.get("react agent with search tool", CONCISE, *KEY))
+        self.assertIsNone(self.cache.get("web scraper agent that saves to json", CONCISE, *KEY))
+
+    def test_complexity_and_versions_separate(self):
+        """Test hits require the same complexity, model and versions"""
+        query = "ReAct agent with weather tool"
+        self.assertIsNone(self.cache.get(query, ComplexityLevel.MINIMAL, *KEY))
+        self.assertIsNone(self.cache.get(query, CONCISE, "qwen-max", "2", "1"))
+
+    def test_new_entries_picked_up(self):
+        """Test entries written through another cache instance are found"""
+        other = GenerationCache(self.store.path)
+        other.put("agent that summarizes pdf files", _result("pdf = 1"), *KEY)
+        self.assertEqual(self.cache.get("summarize PDF files agent", CONCISE, *KEY).code,
+                         "pdf = 1")
+
+    def test_removed_entry_not_returned(self):
+        """Test entries gone from the store are not served"""
+        self.store.clear()
+        self.assertIsNone(self.cache.get("ReAct agent with weather tool", CONCISE, *KEY))
+
+    def test_entries_after_clear_picked_up(self):
+        """Test entries written after removals are indexed (ids are never reused)"""
+        self.assertIsNotNone(self.cache.get("ReAct agent with weather tool", CONCISE, *KEY))
+        self.store.clear()
+        self.store.put("agent that summarizes pdf files", _result("pdf = 1"), *KEY)
+        self.assertEqual(self.store.get("agent that summarizes pdf files", CONCISE, *KEY).code,
+                         "pdf = 1")
+        self.assertEqual(self.cache.get("summarize PDF files agent", CONCISE, *KEY).code,
+                         "pdf = 1")
+
+    def test_matrix_growth(self):
+        """Test the embedding matrix grows past its initial capacity"""
+        for i in range(100):
+            self.store.put(f"agent number{i} task{i}", _result(f"x = {i}"), *KEY)
+        self.assertEqual(len(self.cache.get("agent task42 number42", CONCISE, *KEY).code), 6)
+        self.assertEqual(len(self.cache), 102)
+
+    def test_churn_keeps_matrix_bounded(self):
+        """Test rows of evicted entries are reclaimed instead of piling up"""
+        store = GenerationCache(os.path.join(self.tmp, "small.sqlite3"), max_entries=10,
+                                touch_interval=0)
+        cache = SemanticCache(store)
+        for i in range(300):
+            store.put(f"agent number{i} task{i}", _result(f"x = {i}"), *KEY)
+            cache.get(f"agent task{i} number{i}", CONCISE, *KEY)
+        self.assertEqual(len(store), 10)
+        group = next(iter(cache._groups.values()))
+        self.assertEqual(group.matrix.shape[1], 64)
+        self.assertLessEqual(len(group.queries), 64)
+        self.assertEqual(cache.get("agent task299 number299", CONCISE, *KEY).code, "x = 299")
+
+        # Rows lookups find gone from the store are dropped, compacting when sparse
+        store.clear()
+        for i in range(290, 300):
+            self.assertIsNone(cache.get(f"agent task{i} number{i}", CONCISE, *KEY))
+            self.assertNotIn(f"agent number{i} task{i}", group.rows)
+        self.assertLessEqual(group.dead, len(group.queries) // 2)
+
+
+class TestGeneratorCache(unittest.TestCase):
+    """Test CodeGenerator skips the LLM on cached queries"""
+
+    def test_llm_called_once(self):
+        """Test a repeated query is served from the cache"""
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        calls = []
+        response = types.SimpleNamespace(
+            status_code=200, message="",
+            output=types.SimpleNamespace(
+                text='{"title": "Demo", "code": "import agentscope\\nagentscope.init()\\n"}'
+            )
+        )
+        dashscope = types.ModuleType("dashscope")
+        dashscope.Generation = types.SimpleNamespace(
+            call=lambda **kwargs: calls.append(kwargs) or response
+        )
+
+        generator = CodeGenerator(api_key="key", cache=GenerationCache(os.path.join(tmp, "c.db")))
+        with mock.patch.dict(sys.modules, {"dashscope": dashscope}):
+            first = generator.generate("quantum spreadsheet")
+            second = generator.generate("Quantum spreadsheet")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first.code, second.code)
+        self.assertEqual(first.validation.status, second.validation.status)
+
+    def test_failed_generation_not_cached(self):
+        """Test code that failed validation is regenerated, not served from the cache"""
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        store = GenerationCache(os.path.join(tmp, "c.db"))
+        backend = LocalBackend(responses={
+            "quantum": '{"title": "Broken", "code": "def broken(:\\n    pass\\n"}'
+        })
+        generator = CodeGenerator(cache=store, semantic_cache=SemanticCache(store),
+                                  backend=backend)
+        first = generator.generate("quantum spreadsheet")
+        self.assertEqual(first.validation.status, ValidationStatus.FAILED)
+        second = generator.generate("quantum spreadsheet")
+        self.assertEqual(second.validation.status, ValidationStatus.FAILED)
+        self.assertEqual(backend.calls, 2)
+
+        # Failed entries stored by older versions count as misses
+        store.put("quantum spreadsheet", first, *generator._cache_args())
+        self.assertIsNone(generator.cached("quantum spreadsheet", CONCISE))
+
+
+if __name__ == "__main__":
+    unittest.main()
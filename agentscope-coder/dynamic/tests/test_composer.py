@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Unit tests for composer.py"""
+
+import sys
+import os
+import ast
+import asyncio
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.backends import LocalBackend
+from dynamic.composer import TemplateComposer
+from dynamic.core import ComplexityLevel
+from dynamic.generator import CodeGenerator
+from dynamic.retriever import TemplateInfo, TemplateMatch, TemplateRetriever
+from dynamic.validator import CodeValidator
+
+COMPOUND = "ReActAgent with long-term memory and streaming"
+
+TOOLS = '''"""Tools"""
+
+import agentscope
+from agentscope.agents import ReActAgent
+
+agentscope.init(model_configs="./model_config.json")
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+bot = ReActAgent(
+    name="calc",
+    model_config_name="qwen-max",
+    tools={"add": add},
+)
+
+print(bot("1 + 2"))
+'''
+
+MORE_TOOLS = '''"""More tools"""
+
+import agentscope
+from agentscope.agents import DialogAgent
+
+agentscope.init(model_configs="./model_config.json", project="demo")
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def sub(a: int, b: int) -> int:
+    return a - b
+
+
+agent = DialogAgent(name="other", tools={"add": add, "sub": sub}, verbose=True)
+
+print(agent("3 - 2"))
+'''
+
+LONG_MEMORY = '''"""Long-term memory"""
+
+import agentscope
+from agentscope.agents import DialogAgent
+from agentscope.memory import LongTermMemory
+
+agentscope.init(model_configs="./model_config.json")
+
+memory = LongTermMemory(name="long_memory")
+
+agent = DialogAgent(name="assistant", model_config_name="qwen-max", memory=memory)
+
+print(agent("hi"))
+'''
+
+SHORT_MEMORY = '''"""Short-term memory"""
+
+import agentscope
+from agentscope.agents import DialogAgent
+from agentscope.memory import InMemoryMemory
+
+agentscope.init(model_configs="./model_config.json")
+
+memory = InMemoryMemory()
+
+agent = DialogAgent(name="assistant", model_config_name="qwen-max", memory=memory)
+
+print(len(memory.get_memory()))
+'''
+
+SINGLE_INTENT = [
+    "如何使用长期记忆存储对话",
+    "把对话历史持久化存储到数据库",
+    "多轮对话中的短期记忆",
+    "short term memory 对话历史",
+    "RAG 知识库检索",
+    "streaming output",
+]
+
+
+class _FakeRetriever:
+    """Serves fixed sources, both templates matching every query"""
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.templates = {tid: TemplateInfo(tid, tid.title(), "tools", [tid], "")
+                          for tid in sources}
+
+    def match_topk(self, query, k=3):
+        return [TemplateMatch(t, 1.0) for t in self.templates.values()][:k]
+
+    def match_terms(self, query):
+        return {tid: {tid} for tid in self.sources}
+
+    def get_template_code(self, template_id, complexity="concise"):
+        return self.sources[template_id]
+
+
+class TestTemplateComposer(unittest.TestCase):
+    """Test cases for TemplateComposer"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.retriever = TemplateRetriever()
+
+    def setUp(self):
+        self.composer = TemplateComposer(self.retriever)
+
+    def test_compound_query_composed(self):
+        """Test three templates merge into one valid example"""
+        composed = self.composer.compose(COMPOUND, ComplexityLevel.MINIMAL)
+        self.assertIsNotNone(composed)
+        self.assertEqual(composed.templates, ["react_agent", "long_term_memory", "streaming"])
+        self.assertTrue(CodeValidator().validate_complete(composed.code)["is_valid"])
+
+        tree = ast.parse(composed.code)
+        agents = [node for node in tree.body if isinstance(node, ast.Assign)
+                  and isinstance(node.value, ast.Call)
+                  and getattr(node.value.func, "id", "").endswith("Agent")]
+        self.assertEqual(len(agents), 1)
+        keywords = {kw.arg for kw in agents[0].value.keywords}
+        self.assertTrue({"tools", "memory", "stream"} <= keywords)
+
+        # Imports deduplicated; other templates' agent classes dropped
+        self.assertEqual(composed.code.count("import agentscope\n"), 1)
+        self.assertIn("LongTermMemory", composed.code)
+        self.assertNotIn("DialogAgent", composed.code)
+
+    def test_single_template_queries_not_composed(self):
+        """Test queries one template covers are left to it"""
+        for query in ("react agent", "memory management", "react agent with tools"):
+            self.assertIsNone(self.composer.compose(query), query)
+
+    def test_multi_agent_templates_not_composed(self):
+        """Test templates with several agents are not merged"""
+        self.assertIsNone(self.composer.compose("multi-agent debate with long-term memory"))
+
+    def test_cached(self):
+        """Test repeated requests reuse the composed example"""
+        first = self.composer.compose(COMPOUND)
+        self.assertIs(self.composer.compose(COMPOUND), first)
+
+    def test_merge_details(self):
+        """Test dict arguments merge, helpers dedupe and agent names alias"""
+        composer = TemplateComposer(_FakeRetriever({"tools": TOOLS, "more_tools": MORE_TOOLS}))
+        composed = composer.compose("calculator")
+        self.assertIsNotNone(composed)
+        code = composed.code
+
+        self.assertIn('agentscope.init(model_configs="./model_config.json", project="demo")', code)
+        self.assertEqual(code.count("def add("), 1)
+        self.assertIn("def sub(", code)
+        self.assertIn('    tools={\n        "add": add,\n        "sub": sub,\n    },', code)
+        self.assertIn("verbose=True", code)
+        self.assertIn("agent = bot\n", code)
+        self.assertNotIn("DialogAgent", code)
+        self.assertEqual(composed.title, "Tools + More_Tools")
+
+    def test_rebinding_template_left_out(self):
+        """Test a template whose setup overwrites an earlier object is not merged"""
+        sources = {"long": LONG_MEMORY, "short": SHORT_MEMORY}
+        self.assertIsNone(TemplateComposer(_FakeRetriever(sources)).compose("memory"))
+
+        sources["tools"] = TOOLS
+        composed = TemplateComposer(_FakeRetriever(sources)).compose("memory")
+        self.assertEqual(composed.templates, ["long", "tools"])
+        self.assertNotIn("InMemoryMemory", composed.code)
+        self.assertIn("memory=memory", composed.code)
+
+    def test_incidental_overlap_not_composed(self):
+        """Test keyword fragments and minor hits do not pull in more templates"""
+        query = "如何使用长期记忆存储对话"
+        self.assertEqual([t.id for t in self.composer.select(query)], ["long_term_memory"])
+        for query in SINGLE_INTENT:
+            self.assertEqual(len(self.composer.select(query)), 1, query)
+
+
+class TestGeneratorComposition(unittest.TestCase):
+    """Test cases for composed results of CodeGenerator"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.retriever = TemplateRetriever()
+
+    def test_generate_composed_without_llm(self):
+        """Test compound queries are answered without an LLM call"""
+        backend = LocalBackend()
+        generator = CodeGenerator(retriever=self.retriever, backend=backend)
+        result = generator.generate(COMPOUND, ComplexityLevel.MINIMAL)
+        self.assertEqual(result.source, "composed")
+        self.assertTrue(result.is_valid())
+        self.assertEqual(backend.calls, 0)
+
+        result = asyncio.run(generator.agenerate(COMPOUND, ComplexityLevel.MINIMAL))
+        self.assertEqual(result.source, "composed")
+
+        lines = list(generator.generate_stream(COMPOUND, ComplexityLevel.MINIMAL))
+        self.assertEqual(lines[-1].source, "composed")
+        self.assertEqual("\n".join(lines[:-1]), lines[-1].code.rstrip("\n"))
+
+    def test_single_intent_served_by_template(self):
+        """Test plain single-intent queries still get their one template"""
+        generator = CodeGenerator(retriever=self.retriever, backend=LocalBackend())
+        for query in SINGLE_INTENT:
+            self.assertEqual(generator.generate(query).source, "template", query)
+
+    def test_compose_disabled(self):
+        """Test compose=False serves the best single template"""
+        generator = CodeGenerator(retriever=self.retriever, backend=LocalBackend(), compose=False)
+        result = generator.generate(COMPOUND, ComplexityLevel.MINIMAL)
+        self.assertEqual(result.source, "template")
+        self.assertEqual(result.code, self.retriever.get_template_code("react_agent", "minimal"))
+
+    def test_single_template_unchanged(self):
+        """Test queries one template covers still get that template"""
+        generator = CodeGenerator(retriever=self.retriever, backend=LocalBackend())
+        result = generator.generate("react agent with tools")
+        self.assertEqual(result.source, "template")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Unit tests for fuzzy.py"""
+
+import sys
+import os
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.fuzzy import SymmetricDeleteIndex, osa_distance
+from dynamic.retriever import TemplateRetriever
+
+
+class TestSymmetricDeleteIndex(unittest.TestCase):
+    """Test cases for SymmetricDeleteIndex"""
+
+    def setUp(self):
+        self.index = SymmetricDeleteIndex(["memory", "reactagent", "stream", "streaming", "chat"])
+
+    def test_osa_distance(self):
+        """Test transpositions count as one edit and the limit cuts off"""
+        self.assertEqual(osa_distance("memroy", "memory", 2), 1)
+        self.assertEqual(osa_distance("memry", "memory", 2), 1)
+        self.assertEqual(osa_distance("mmory", "memory", 2), 1)
+        self.assertIsNone(osa_distance("pipeline", "memory", 2))
+
+    def test_lookup_closest_first(self):
+        """Test candidates are sorted by distance"""
+        self.assertEqual(self.index.lookup("streem")[0], ("stream", 1))
+        self.assertEqual(self.index.lookup("reactagnet"), [("reactagent", 1)])
+
+    def test_short_words_are_not_corrected(self):
+        """Test words under the minimum length are neither indexed nor looked up"""
+        self.assertNotIn("chat", self.index.words)
+        self.assertEqual(self.index.lookup("that"), [])
+
+    def test_edit_budget_grows_with_length(self):
+        """Test short words tolerate one edit and long words two"""
+        index = SymmetricDeleteIndex(["memory", "pipeline"])
+        self.assertEqual(index.lookup("memroy"), [("memory", 1)])
+        self.assertEqual(index.lookup("mmeroy"), [])
+        self.assertEqual(index.lookup("pipleien"), [("pipeline", 2)])
+
+
+class TestFuzzyRetrieval(unittest.TestCase):
+    """Test cases for typo correction in TemplateRetriever"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.retriever = TemplateRetriever()
+
+    def test_misspelled_query_matches(self):
+        """Test misspelled keywords are corrected"""
+        self.assertEqual(self.retriever.match("reactagnet with memroy").id, "react_agent")
+        self.assertEqual(self.retriever.match("streamign output").id, "streaming")
+
+    def test_fuzzy_disabled(self):
+        """Test typo correction can be turned off"""
+        self.assertIsNone(TemplateRetriever(fuzzy=False).match("reactagnet with memroy"))
+
+    def test_exact_match_skips_correction(self):
+        """Test correction never overrides an exact keyword hit"""
+        results = self.retriever.match_topk("tool cusotm")
+        self.assertEqual(results[0].template.id, "react_agent")
+
+    def test_zero_budget_disables_correction(self):
+        """Test an exhausted latency budget stops correction"""
+        retriever = TemplateRetriever(fuzzy_budget_ms=0)
+        self.assertIsNone(retriever.match("reactagnet with memroy"))
+
+    def test_budget_cut_result_not_cached(self):
+        """Test a miss caused by an exhausted budget is retried later"""
+        retriever = TemplateRetriever(fuzzy_budget_ms=0)
+        self.assertIsNone(retriever.match("reactagnet with memroy"))
+        self.assertEqual(len(retriever._snapshot.results), 0)
+
+        retriever.fuzzy_budget_ms = 1000
+        self.assertEqual(retriever.match("reactagnet with memroy").id, "react_agent")
+        self.assertEqual(len(retriever._snapshot.results), 1)
+
+    def test_match_batch_uses_correction(self):
+        """Test batch matching agrees with match() on misspelled queries"""
+        queries = ["reactagnet with memroy", "streamign output", "xyzabc123"]
+        expected = [self.retriever.match(q) for q in queries]
+        self.assertEqual(self.retriever.match_batch(queries), expected)
+
+    def test_fuzzy_index_follows_refresh(self):
+        """Test the delete dictionary is shared while keywords are unchanged"""
+        retriever = TemplateRetriever()
+        before = retriever._snapshot.fuzzy_index
+        retriever.refresh()
+        self.assertIs(retriever._snapshot.fuzzy_index, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""Unit tests for generator.py"""
+
+import sys
+import os
+import asyncio
+import json
+import re
+import shutil
+import tempfile
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.backends import LocalBackend
+from dynamic.cache import GenerationCache
+from dynamic.core import ComplexityLevel, GeneratedCode
+from dynamic import llm_client
+from dynamic.generator import CodeGenerator
+from dynamic.ratelimit import RateLimiter
+
+
+class TestCodeGenerator(unittest.TestCase):
+    """Test cases for CodeGenerator without an API key"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.generator = CodeGenerator(api_key="")
+
+    def test_template_result(self):
+        """Test a matching query returns template code"""
+        result = self.generator.generate("react agent", ComplexityLevel.MINIMAL)
+        self.assertEqual(result.source, "template")
+        self.assertTrue(result.code)
+
+    def test_not_available(self):
+        """Test no template and no key gives a failed result"""
+        result = self.generator.generate("quantum spreadsheet")
+        self.assertEqual(result.source, "none")
+        self.assertFalse(result.code)
+
+    def test_agenerate_matches_generate(self):
+        """Test agenerate returns the same results as generate"""
+        for query in ("react agent", "quantum spreadsheet"):
+            expected = self.generator.generate(query)
+            result = asyncio.run(self.generator.agenerate(query))
+            self.assertEqual((result.source, result.code, result.title),
+                             (expected.source, expected.code, expected.title))
+
+
+class TestGenerateStream(unittest.TestCase):
+    """Test cases for generate_stream"""
+
+    def test_template_stream(self):
+        """Test template code is yielded line by line, then the result"""
+        items = list(CodeGenerator(api_key="").generate_stream("react agent"))
+        result = items[-1]
+        self.assertIsInstance(result, GeneratedCode)
+        self.assertEqual(items[:-1], result.code.splitlines())
+
+    def test_llm_lines_before_completion(self):
+        """Test lines arrive while the LLM is still streaming"""
+        code = "import agentscope\n\nagentscope.init()\n" + "print('step')\n" * 20
+        text = json.dumps({"title": "Demo", "code": code})
+        chunks = [text[i:i + 8] for i in range(0, len(text), 8)]
+        sent = []
+
+        def call(**kwargs):
+            self.assertTrue(kwargs["stream"])
+            for chunk in chunks:
+                sent.append(chunk)
+                yield types.SimpleNamespace(status_code=200, message="",
+                                            output=types.SimpleNamespace(text=chunk))
+
+        dashscope = types.ModuleType("dashscope")
+        dashscope.Generation = types.SimpleNamespace(call=call)
+        generator = CodeGenerator(api_key="key")
+        with mock.patch.dict(sys.modules, {"dashscope": dashscope}):
+            items = []
+            for item in generator.generate_stream("quantum spreadsheet"):
+                items.append((item, len(sent)))
+
+        first_line, chunks_sent = items[0]
+        self.assertEqual(first_line, "import agentscope")
+        self.assertLess(chunks_sent, len(chunks) // 4)
+        result = items[-1][0]
+        self.assertEqual(result.code, code)
+        self.assertEqual([item for item, _ in items[:-1]], code.splitlines())
+
+    def test_stream_error(self):
+        """Test an API error ends the stream with a failed result"""
+        def call(**kwargs):
+            yield types.SimpleNamespace(status_code=500, message="boom", output=None)
+
+        dashscope = types.ModuleType("dashscope")
+        dashscope.Generation = types.SimpleNamespace(call=call)
+        with mock.patch.dict(sys.modules, {"dashscope": dashscope}):
+            items = list(CodeGenerator(api_key="key").generate_stream("quantum spreadsheet"))
+        self.assertEqual(len(items), 1)
+        self.assertIn("boom", items[0].validation.error)
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class _FakeAsyncClient:
+    """httpx.AsyncClient stand-in: query N answers after (10 - N) * 5 ms"""
+    instances = []
+
+    def __init__(self, timeout, limits):
+        self.limits = limits
+        self.in_flight = self.max_in_flight = self.posts = 0
+        self.closed = False
+        _FakeAsyncClient.instances.append(self)
+
+    async def post(self, url, **kwargs):
+        self.posts += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        n = int(re.search(r"spreadsheet (\d+)", kwargs["json"]["input"]["prompt"]).group(1))
+        await asyncio.sleep((10 - n) * 0.005)
+        self.in_flight -= 1
+        if n == 7:
+            return _FakeResponse(400, {"code": "InvalidParameter", "message": "bad prompt"})
+        code = f"import agentscope\nresult = {n}\n"
+        text = json.dumps({"title": f"Q{n}", "code": code})
+        return _FakeResponse(200, {"output": {"text": text}})
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestAsyncGenerateMany(unittest.TestCase):
+    """Test cases for agenerate_many"""
+
+    def setUp(self):
+        _FakeAsyncClient.instances = []
+        fake_httpx = types.SimpleNamespace(AsyncClient=_FakeAsyncClient, Limits=lambda **kw: kw)
+        patcher = mock.patch.object(llm_client, "httpx", fake_httpx)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, generator, queries):
+        async def run():
+            results = [item async for item in generator.agenerate_many(queries)]
+            await generator.aclose()
+            return results
+        return asyncio.run(run())
+
+    def test_results_in_completion_order(self):
+        """Test faster generations are yielded first"""
+        generator = CodeGenerator(api_key="key", max_concurrency=10)
+        results = self._run(generator, [f"quantum spreadsheet {n}" for n in range(10)])
+        self.assertEqual([i for i, _ in results], list(range(9, -1, -1)))
+        by_index = dict(results)
+        self.assertEqual(by_index[3].code, "import agentscope\nresult = 3\n")
+        self.assertIn("bad prompt", by_index[7].validation.error)
+
+    def test_concurrency_limit_and_pooled_client(self):
+        """Test in-flight calls stay under the limit on one pooled client"""
+        generator = CodeGenerator(api_key="key", max_concurrency=3)
+        queries = [f"quantum spreadsheet {n % 10} v{n}" for n in range(12)] + ["react agent"]
+        results = self._run(generator, queries)
+        self.assertEqual(len(results), 13)
+        self.assertEqual(dict(results)[12].source, "template")
+        client, = _FakeAsyncClient.instances
+        self.assertEqual(client.max_in_flight, 3)
+        self.assertEqual(client.posts, 12)
+        self.assertEqual(client.limits["max_keepalive_connections"], 3)
+        self.assertTrue(client.closed)
+
+    def test_client_closed_per_run(self):
+        """Test each event loop's pooled client is closed when its run ends"""
+        generator = CodeGenerator(api_key="key")
+        for run in range(2):
+            asyncio.run(_collect(generator.agenerate_many([f"quantum spreadsheet {run}"])))
+        self.assertEqual(len(_FakeAsyncClient.instances), 2)
+        self.assertTrue(all(client.closed for client in _FakeAsyncClient.instances))
+
+    def test_close_waits_for_calls_in_flight(self):
+        """Test closing the pool lets calls already started finish"""
+        generator = CodeGenerator(api_key="key")
+
+        async def run():
+            pending = asyncio.ensure_future(generator.agenerate("quantum spreadsheet 1"))
+            await asyncio.sleep(0.01)
+            await generator.aclose()
+            client, = _FakeAsyncClient.instances
+            self.assertFalse(client.closed)
+            result = await pending
+            self.assertTrue(client.closed)
+            return result
+
+        self.assertEqual(asyncio.run(run()).code, "import agentscope\nresult = 1\n")
+
+    def test_identical_queries_coalesced(self):
+        """Test concurrent identical queries make one LLM call"""
+        generator = CodeGenerator(api_key="key")
+        queries = ["quantum spreadsheet 4", "Quantum  spreadsheet 4", "quantum spreadsheet 4",
+                   "quantum spreadsheet 5"]
+        results = dict(self._run(generator, queries))
+        client, = _FakeAsyncClient.instances
+        self.assertEqual(client.posts, 2)
+        self.assertEqual({results[i].code for i in range(3)}, {"import agentscope\nresult = 4\n"})
+        self.assertEqual(generator.single_flight.joined, 2)
+
+    def test_sync_callers_coalesced(self):
+        """Test threads calling generate() for one query share one call"""
+        calls = []
+
+        def call(**kwargs):
+            calls.append(1)
+            time.sleep(0.05)
+            text = json.dumps({"title": "T", "code": "import agentscope\n"})
+            return types.SimpleNamespace(status_code=200, message="",
+                                         output=types.SimpleNamespace(text=text))
+
+        dashscope = types.ModuleType("dashscope")
+        dashscope.Generation = types.SimpleNamespace(call=call)
+        generator = CodeGenerator(api_key="key")
+        results = []
+        with mock.patch.dict(sys.modules, {"dashscope": dashscope}):
+            threads = [threading.Thread(
+                target=lambda: results.append(generator.generate("quantum spreadsheet")))
+                for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r.code for r in results], ["import agentscope\n"] * 6)
+
+    def test_thread_fallback_without_httpx(self):
+        """Test the SDK path runs on threads under the same limit"""
+        lock = threading.Lock()
+        state = {"in_flight": 0, "max": 0}
+
+        def call(**kwargs):
+            with lock:
+                state["in_flight"] += 1
+                state["max"] = max(state["max"], state["in_flight"])
+            time.sleep(0.01)
+            with lock:
+                state["in_flight"] -= 1
+            text = json.dumps({"title": "T", "code": "import agentscope\n"})
+            return types.SimpleNamespace(status_code=200, message="",
+                                         output=types.SimpleNamespace(text=text))
+
+        dashscope = types.ModuleType("dashscope")
+        dashscope.Generation = types.SimpleNamespace(call=call)
+        with mock.patch.object(llm_client, "httpx", None), \
+                mock.patch.dict(sys.modules, {"dashscope": dashscope}):
+            generator = CodeGenerator(api_key="key", max_concurrency=2)
+            results = self._run(generator, [f"quantum spreadsheet {n}" for n in range(8)])
+        self.assertEqual(len(results), 8)
+        self.assertEqual(state["max"], 2)
+
+
+class TestRevalidate(unittest.TestCase):
+    """Test cases for stale-while-revalidate generation"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.cache = GenerationCache(os.path.join(self.tmp, "gen.sqlite3"))
+
+    def _generator(self, backend, **kwargs):
+        generator = CodeGenerator(backend=backend, cache=self.cache, revalidate=True, **kwargs)
+        self.addCleanup(generator.close)
+        return generator
+
+    def test_template_then_upgrade(self):
+        """Test the template comes first and later requests get the LLM version"""
+        backend = LocalBackend(latency=0.05)
+        generator = self._generator(backend)
+        upgrades = []
+        start = time.perf_counter()
+        stale = generator.generate("react agent", on_upgrade=upgrades.append)
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual(stale.source, "template")
+        self.assertIs(generator.generate("react agent").upgrade, stale.upgrade)
+
+        upgraded = stale.upgrade.result(2)
+        self.assertEqual(upgraded.source, "llm")
+        _wait_for(lambda: upgrades)
+        self.assertEqual(upgrades[0].code, upgraded.code)
+
+        fresh = generator.generate("React  agent")
+        self.assertEqual((fresh.source, fresh.code), ("llm", upgraded.code))
+        self.assertIsNone(fresh.upgrade)
+        self.assertEqual(backend.calls, 1)
+
+    def test_failed_upgrade_keeps_template(self):
+        """Test a failed upgrade is not announced and the template stays"""
+        generator = self._generator(LocalBackend(fail_every=1))
+        upgrades = []
+        stale = generator.generate("react agent", on_upgrade=upgrades.append)
+        self.assertFalse(stale.upgrade.result(2).is_valid())
+        generator.close()
+        self.assertEqual(upgrades, [])
+        self.assertEqual(generator.generate("react agent").source, "template")
+
+    def test_strong_match_and_miss(self):
+        """Test matches above revalidate_below and misses are not revalidated"""
+        generator = self._generator(LocalBackend(), revalidate_below=2.0)
+        strong = generator.generate("react agent with tools")
+        self.assertEqual((strong.source, strong.upgrade), ("template", None))
+        self.assertIsNotNone(generator.generate("react agent").upgrade)
+        miss = generator.generate("quantum spreadsheet")
+        self.assertEqual((miss.source, miss.upgrade), ("llm", None))
+
+    def test_no_upgrade_without_cache(self):
+        """Test revalidate does not pay for upgrades it could not keep"""
+        generator = CodeGenerator(backend=LocalBackend(), revalidate=True)
+        self.addCleanup(generator.close)
+        self.assertIsNone(generator.generate("react agent").upgrade)
+        self.assertEqual(generator.backend.calls, 0)
+
+    def test_upgrade_rate_limited(self):
+        """Test upgrades take rate limiter quota and a concurrency slot"""
+        class CountingLimiter(RateLimiter):
+            def __init__(self):
+                super().__init__(requests_per_minute=600)
+                self.acquired = []
+
+            async def acquire(self, tokens: int = 0):
+                self.acquired.append(tokens)
+                await super().acquire(tokens)
+
+        limiter = CountingLimiter()
+        generator = self._generator(LocalBackend(latency=0.05), rate_limiter=limiter,
+                                    max_concurrency=1)
+        start = time.perf_counter()
+        upgrades = [generator.generate(query).upgrade
+                    for query in ("react agent", "memory management")]
+        for upgrade in upgrades:
+            self.assertTrue(upgrade.result(2).is_valid())
+        self.assertEqual(len(limiter.acquired), 2)
+        self.assertLess(limiter.requests.tokens, 599)
+        # One slot: the two upgrades ran one after the other
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+
+    def test_off_by_default(self):
+        """Test templates are final without revalidate"""
+        generator = CodeGenerator(backend=LocalBackend(), cache=self.cache)
+        self.assertIsNone(generator.generate("react agent").upgrade)
+        self.assertEqual(generator.backend.calls, 0)
+
+
+async def _collect(results):
+    return [item async for item in results]
+
+
+def _wait_for(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+if __name__ == "__main__":
+    unittest.main()
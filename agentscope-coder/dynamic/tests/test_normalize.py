@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Unit tests for normalize.py"""
+
+import sys
+import os
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.normalize import cjk_synonyms, normalize_token, stem
+from dynamic.retriever import TemplateRetriever
+
+
+class TestNormalize(unittest.TestCase):
+    """Test cases for stemming and synonym tables"""
+
+    def test_plurals_and_inflections(self):
+        """Test variants reduce to the same stem as the base word"""
+        for variant, base in [("agents", "agent"), ("tools", "tool"), ("pipelines", "pipeline"),
+                              ("memories", "memory"), ("streamed", "stream"),
+                              ("streaming", "stream"), ("embedding", "embed"),
+                              ("matches", "match"), ("stored", "store")]:
+            self.assertEqual(stem(variant), stem(base), variant)
+
+    def test_words_left_alone(self):
+        """Test short, non-alphabetic and protected words are unchanged"""
+        for word in ("rag", "mem0", "class", "status", "string", "多agent", "记忆"):
+            self.assertEqual(stem(word), word)
+
+    def test_synonyms(self):
+        """Test synonyms map to the keyword's normalized form"""
+        self.assertEqual(normalize_token("multiagent"), normalize_token("multi"))
+        self.assertEqual(normalize_token("chatbots"), normalize_token("chat"))
+        self.assertEqual(normalize_token("retrieval"), "rag")
+
+    def test_cjk_synonyms(self):
+        """Test Chinese synonym phrases yield their keyword, longest first"""
+        self.assertEqual(list(cjk_synonyms("把对话持久化")), ["存储"])
+        self.assertEqual(list(cjk_synonyms("子智能体")), ["子"])
+        self.assertEqual(list(cjk_synonyms("普通文本")), [])
+
+
+class TestNormalizedRetrieval(unittest.TestCase):
+    """Test normalization in TemplateRetriever"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.retriever = TemplateRetriever()
+
+    def test_plural_query_matches(self):
+        """Test plural and inflected queries hit singular keywords"""
+        self.assertEqual(self.retriever.match("custom tools").id, "custom_tool")
+        self.assertEqual(self.retriever.match("streamed output").id, "streaming")
+        self.assertEqual(self.retriever.match("sequential pipelines").id, "sequential_pipeline")
+
+    def test_synonym_query_matches(self):
+        """Test English and Chinese synonyms reach the template"""
+        self.assertEqual(self.retriever.match("a basic chatbot").id, "basic_chat_agent")
+        self.assertEqual(self.retriever.match("multiagent debate").id, "multi_agent")
+        self.assertEqual(self.retriever.match("主从智能体").id, "subagent")
+
+    def test_keywords_normalized_at_build(self):
+        """Test keyword_index holds normalized keywords"""
+        self.assertIn("stream", self.retriever.keyword_index)
+        self.assertNotIn("streaming", self.retriever.keyword_index)
+
+    def test_normalize_disabled(self):
+        """Test raw keywords are kept when normalization is off"""
+        retriever = TemplateRetriever(normalize=False, fuzzy=False)
+        self.assertIn("streaming", retriever.keyword_index)
+        self.assertIsNone(retriever.match("multiagent debate"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Unit tests for parser.py"""
+
+import sys
+import os
+import json
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.parser import CodeParser, StreamingCodeParser
+
+CODE = 'import agentscope\n\ndef f(x: int) -> str:\n    return "a\\tb" + \'é😀\'\n'
+
+
+def _stream(response: str, step: int) -> list:
+    parser = StreamingCodeParser()
+    lines = []
+    for i in range(0, len(response), step):
+        lines.extend(parser.feed(response[i:i + step]))
+    return lines + parser.flush()
+
+
+class TestCodeParser(unittest.TestCase):
+    """Test cases for CodeParser"""
+
+    def test_strategies(self):
+        """Test JSON, fenced JSON and python block responses"""
+        payload = json.dumps({"title": "Demo", "code": CODE})
+        for response, strategy in [(payload, "direct_json"),
+                                   (f"```json\n{payload}\n```", "json_markdown"),
+                                   (f"# Demo\n```python\n{CODE}```", "python_block")]:
+            parsed, error = CodeParser().parse(response)
+            self.assertIsNone(error)
+            self.assertEqual(parsed.parse_strategy, strategy)
+            self.assertEqual(parsed.code.strip(), CODE.strip())
+            self.assertEqual(parsed.title, "Demo")
+
+
+class TestStreamingCodeParser(unittest.TestCase):
+    """Test cases for StreamingCodeParser"""
+
+    def test_json_any_chunking(self):
+        """Test escapes split across chunks decode like json.loads"""
+        for payload in (json.dumps({"title": "Demo", "code": CODE}),
+                        json.dumps({"title": "Demo", "code": CODE}, ensure_ascii=False)):
+            response = f"Sure:\n```json\n{payload}\n```\n"
+            for step in (1, 2, 5, 64):
+                self.assertEqual(_stream(response, step), CODE.split("\n")[:-1], step)
+
+    def test_python_fence(self):
+        """Test fenced code stops at the closing fence"""
+        response = f"# Demo\n```python\n{CODE}```\nThat is all.\n"
+        for step in (1, 7):
+            self.assertEqual(_stream(response, step), CODE.split("\n")[:-1])
+
+    def test_unterminated_code(self):
+        """Test the last line is delivered on flush"""
+        self.assertEqual(_stream("```python\nprint(1)\nprint(2)", 3), ["print(1)", "print(2)"])
+        self.assertEqual(_stream('{"code": "x = 1\\ny = 2', 4), ["x = 1", "y = 2"])
+
+    def test_malformed_unicode_escape(self):
+        """Test a bad \\u escape is skipped instead of failing the stream"""
+        response = '{"title": "Demo", "code": "a = \'\\uzz9\'\\nb = 2"}'
+        for step in (1, 3, 64):
+            self.assertEqual(_stream(response, step), ["a = 'zz9'", "b = 2"], step)
+
+    def test_long_response_scans_only_new_text(self):
+        """Test a long stream keeps only unconsumed text and still returns it all"""
+        for response in (json.dumps({"title": "Long", "code": CODE * 200}),
+                         f"```python\n{CODE * 200}```\n"):
+            parser = StreamingCodeParser()
+            lines, longest = [], 0
+            for i in range(0, len(response), 16):
+                lines += parser.feed(response[i:i + 16])
+                longest = max(longest, len(parser._buf))
+            lines += parser.flush()
+            self.assertEqual(lines, (CODE * 200).split("\n")[:-1])
+            self.assertEqual(parser.text, response)
+            self.assertLess(longest, 100)
+
+    def test_lines_before_end(self):
+        """Test lines are returned before the response is complete"""
+        parser = StreamingCodeParser()
+        self.assertEqual(parser.feed('{"title": "Demo", "co'), [])
+        self.assertEqual(parser.feed('de": "import agentscope\\nagentscope.in'), ["import agentscope"])
+        self.assertEqual(parser.feed('it()\\n"}'), ["agentscope.init()"])
+        self.assertEqual(parser.flush(), [])
+
+    def test_no_code(self):
+        """Test prose without code yields nothing"""
+        self.assertEqual(_stream("I cannot help with that.", 4), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Unit tests for ratelimit.py"""
+
+import sys
+import os
+import asyncio
+import time
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.ratelimit import RateLimiter, TokenBucket, estimate_tokens
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for TokenBucket"""
+
+    def test_burst_then_wait(self):
+        """Test a full bucket allows a burst, then refills at the rate"""
+        bucket = TokenBucket(rate_per_minute=600, capacity=2)
+        self.assertEqual(bucket.wait_time(2), 0.0)
+        bucket.take(2)
+        self.assertAlmostEqual(bucket.wait_time(1), 0.1, places=2)
+
+    def test_oversized_amount(self):
+        """Test amounts above capacity wait for a full bucket, not forever"""
+        bucket = TokenBucket(rate_per_minute=60, capacity=10)
+        self.assertEqual(bucket.wait_time(100), 0.0)
+        bucket.take(100)
+        self.assertGreater(bucket.wait_time(1), 60)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for RateLimiter"""
+
+    def test_requests_per_minute(self):
+        """Test requests beyond the burst are spaced by the rate"""
+        limiter = RateLimiter(requests_per_minute=1200)
+        limiter.requests.tokens = 1
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.acquire() for _ in range(4)))
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.14)
+
+    def test_tokens_per_minute(self):
+        """Test the token quota limits large requests"""
+        limiter = RateLimiter(tokens_per_minute=60000)
+        limiter.tokens.tokens = 0
+
+        async def run():
+            start = time.monotonic()
+            await limiter.acquire(100)
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.09)
+
+    def test_unlimited(self):
+        """Test a limiter without quotas never waits"""
+        asyncio.run(RateLimiter().acquire(10 ** 9))
+
+    def test_estimate_tokens(self):
+        """Test estimates grow with prompt length and complexity"""
+        self.assertEqual(estimate_tokens("a" * 400, "minimal"), 700)
+        self.assertEqual(estimate_tokens("智能体", "complete"), 3003)
+        self.assertGreater(estimate_tokens("x", "complete"), estimate_tokens("x", "concise"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""Unit tests for retriever.py"""
+
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+import shutil
+import tempfile
+import unittest
+from array import array
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.catalog import write_catalog
+from dynamic.retriever import TemplateRetriever
+
+
+class TestTemplateRetriever(unittest.TestCase):
+    """Test cases for TemplateRetriever"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the bundled templates once"""
+        cls.retriever = TemplateRetriever()
+
+    def test_loads_all_templates(self):
+        """Test all bundled templates are indexed"""
+        self.assertEqual(len(self.retriever.templates), 12)
+
+    def test_match_english_keywords(self):
+        """Test English keyword matching"""
+        info = self.retriever.match("react agent with tools")
+        self.assertEqual(info.id, "react_agent")
+
+    def test_match_no_hit(self):
+        """Test unrelated query returns None"""
+        self.assertIsNone(self.retriever.match("xyzabc123 nonexistent"))
+
+    def test_match_cjk_sentence(self):
+        """Test keywords embedded in an unsegmented Chinese sentence"""
+        info = self.retriever.match("如何使用长期记忆存储对话")
+        self.assertEqual(info.id, "long_term_memory")
+
+    def test_match_cjk_title_overlap(self):
+        """Test n-gram overlap with a template title"""
+        info = self.retriever.match("顺序流水线处理多阶段任务")
+        self.assertEqual(info.id, "sequential_pipeline")
+
+    def test_cjk_ngrams_disabled(self):
+        """Test whole-run tokenization when n-grams are turned off"""
+        retriever = TemplateRetriever(cjk_ngrams=False)
+        self.assertIsNone(retriever.match("如何使用长期记忆存储对话"))
+
+    def test_ngram_index_skips_stopwords(self):
+        """Test stopword n-grams are never indexed"""
+        self.assertNotIn("使用", self.retriever.ngram_index)
+
+    def test_match_topk_ranked(self):
+        """Test top-k results are sorted by score"""
+        results = self.retriever.match_topk("memory", k=3)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(
+            {m.template.id for m in results},
+            {"long_term_memory", "short_term_memory"}
+        )
+        self.assertGreaterEqual(results[0].score, results[1].score)
+
+    def test_match_topk_priority_breaks_ties(self):
+        """Test equal scores are ordered by template priority"""
+        # "tool" scores react_agent (priority 10) and custom_tool (priority 9)
+        results = self.retriever.match_topk("tool", k=2)
+        self.assertEqual(results[0].score, results[1].score)
+        self.assertEqual(
+            [m.template.id for m in results], ["react_agent", "custom_tool"]
+        )
+
+    def test_match_topk_filters(self):
+        """Test category and difficulty filters"""
+        results = self.retriever.match_topk("tool", k=5, filters={"category": "tools"})
+        self.assertEqual([m.template.id for m in results], ["custom_tool"])
+
+        results = self.retriever.match_topk(
+            "memory", k=5, filters={"difficulty": ["beginner"]}
+        )
+        self.assertEqual([m.template.id for m in results], ["short_term_memory"])
+
+    def test_match_batch_agrees_with_match(self):
+        """Test batch matching returns the same templates as match()"""
+        queries = [
+            "react agent with tools", "tool", "memory memory", "如何使用长期记忆存储对话",
+            "xyzabc123 nonexistent", "react agent with tools", "ReActAgent 工具调用",
+        ]
+        expected = [self.retriever.match(q) for q in queries]
+        self.assertEqual(self.retriever.match_batch(queries), expected)
+
+    def test_match_batch_empty(self):
+        """Test empty input gives empty output"""
+        self.assertEqual(self.retriever.match_batch([]), [])
+
+    def test_match_topk_unknown_filter(self):
+        """Test unsupported filter fields are rejected"""
+        with self.assertRaises(ValueError):
+            self.retriever.match_topk("tool", filters={"author": "x"})
+
+    def test_postings_are_compact_arrays(self):
+        """Test keyword postings hold template ordinals in array('I')"""
+        postings = self.retriever.keyword_index["memory"]
+        self.assertIsInstance(postings, array)
+        self.assertEqual(postings.typecode, 'I')
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for the match result cache"""
+
+    def test_equivalent_queries_share_entry(self):
+        """Test queries with the same token bag hit one cache entry"""
+        retriever = TemplateRetriever()
+        first = retriever.match("how to use the react agent")
+        second = retriever.match("Agent REACT")
+        self.assertIs(first, second)
+        stats = retriever.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+    def test_token_multiset_is_kept(self):
+        """Test repeated tokens are part of the key"""
+        retriever = TemplateRetriever()
+        retriever.match_topk("memory")
+        retriever.match_topk("memory memory")
+        self.assertEqual(retriever.cache_stats()["misses"], 2)
+
+    def test_negative_results_cached(self):
+        """Test misses are remembered and counted"""
+        retriever = TemplateRetriever()
+        self.assertIsNone(retriever.match("xyzabc123 nonexistent"))
+        self.assertIsNone(retriever.match("nonexistent xyzabc123"))
+        stats = retriever.cache_stats()
+        self.assertEqual((stats["hits"], stats["negative_hits"]), (1, 1))
+
+    def test_k_and_filters_are_part_of_key(self):
+        """Test different k or filters are cached separately"""
+        retriever = TemplateRetriever()
+        retriever.match_topk("memory", k=1)
+        retriever.match_topk("memory", k=2)
+        retriever.match_topk("memory", k=2, filters={"difficulty": "beginner"})
+        retriever.match_topk("memory", k=2, filters={"difficulty": ["beginner"]})
+        stats = retriever.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 3))
+
+    def test_lru_bound(self):
+        """Test the least recently used entry is evicted"""
+        retriever = TemplateRetriever(cache_size=2)
+        retriever.match("react")
+        retriever.match("memory")
+        retriever.match("react")
+        retriever.match("rag")
+        self.assertEqual(retriever.cache_stats()["size"], 2)
+        retriever.match("react")
+        retriever.match("memory")
+        self.assertEqual(retriever.cache_stats()["hits"], 2)
+
+    def test_refresh_starts_empty_cache(self):
+        """Test a new snapshot does not serve old results"""
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        root = os.path.join(tmp, "templates")
+        shutil.copytree(os.path.join(parent_dir, "references", "templates"), root)
+        retriever = TemplateRetriever(root)
+        self.assertIsNone(retriever.match("weather"))
+
+        index_path = os.path.join(root, "metadata_index.json")
+        with open(index_path, encoding='utf-8') as f:
+            metadata = json.load(f)
+        metadata["templates"][0]["keywords"].append("weather")
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f)
+
+        self.assertTrue(retriever.refresh([index_path]))
+        self.assertEqual(retriever.cache_stats()["size"], 0)
+        self.assertEqual(retriever.match("weather").id, metadata["templates"][0]["id"])
+
+    def test_cache_disabled(self):
+        """Test cache_size=0 turns caching off"""
+        retriever = TemplateRetriever(cache_size=0)
+        retriever.match("react")
+        retriever.match("react")
+        self.assertEqual(retriever.cache_stats()["hits"], 0)
+
+
+class TestConditionalFetch(unittest.TestCase):
+    """Test cases for content hashes and get_template_code_if_changed"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp, "templates")
+        shutil.copytree(os.path.join(parent_dir, "references", "templates"), self.root)
+        self.retriever = TemplateRetriever(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_hashes_in_template_info(self):
+        """Test every existing complexity level has a content hash"""
+        info = self.retriever.templates["rag"]
+        self.assertEqual(sorted(info.content_hashes), ["complete", "concise", "minimal"])
+        self.assertEqual(len(set(info.content_hashes.values())), 3)
+
+    def test_not_modified_skips_read(self):
+        """Test a matching etag returns no code and reads nothing"""
+        etag = self.retriever.templates["rag"].content_hashes["concise"]
+        self.retriever._snapshot.contents.clear()
+        result = self.retriever.get_template_code_if_changed("rag", "concise", etag)
+        self.assertFalse(result.modified)
+        self.assertIsNone(result.code)
+        self.assertEqual(self.retriever._snapshot.contents, {})
+
+    def test_stale_etag_returns_code(self):
+        """Test an unknown etag returns the code and the current etag"""
+        result = self.retriever.get_template_code_if_changed("rag", "concise", "stale")
+        self.assertTrue(result.modified)
+        self.assertEqual(result.code, self.retriever.get_template_code("rag", "concise"))
+        self.assertEqual(result.etag, self.retriever.templates["rag"].content_hashes["concise"])
+
+    def test_edit_changes_etag(self):
+        """Test an edited file is detected even without a refresh"""
+        first = self.retriever.get_template_code_if_changed("rag", "minimal")
+        with open(self.retriever.templates["rag"].minimal_path, 'a', encoding='utf-8') as f:
+            f.write("\n# edited\n")
+        second = self.retriever.get_template_code_if_changed("rag", "minimal", first.etag)
+        self.assertTrue(second.modified)
+        self.assertNotEqual(second.etag, first.etag)
+        self.assertTrue(second.code.endswith("# edited\n"))
+
+    def test_unknown_template(self):
+        """Test unknown templates return None"""
+        self.assertIsNone(self.retriever.get_template_code_if_changed("nope"))
+
+
+class TestShardedCatalog(unittest.TestCase):
+    """Test cases for the sharded catalog format"""
+
+    def setUp(self):
+        """Write the bundled metadata as a catalog in a scratch directory"""
+        self.tmp = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp, "templates")
+        shutil.copytree(
+            os.path.join(parent_dir, "references", "templates"), self.root
+        )
+        with open(os.path.join(self.root, "metadata_index.json"), encoding='utf-8') as f:
+            write_catalog(json.load(f)["templates"], self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_catalog_matches_like_single_file(self):
+        """Test the catalog gives the same answers as metadata_index.json"""
+        sharded = TemplateRetriever(self.root)
+        single = TemplateRetriever()
+        self.assertTrue(sharded.use_catalog)
+        for query in ("react agent with tools", "memory", "如何使用长期记忆存储对话", "rag"):
+            self.assertEqual(sharded.match(query).id, single.match(query).id)
+
+    def test_shards_load_lazily(self):
+        """Test shards are read only when a template is materialized"""
+        retriever = TemplateRetriever(self.root)
+        self.assertEqual(retriever.loaded_shards, [])
+        self.assertEqual(len(retriever.templates), 12)
+
+        info = retriever.match("rag")
+        self.assertEqual(retriever.loaded_shards, ["advanced.json"])
+        self.assertEqual(info.description, "学习使用 RAG 技术增强 Agent 的知识问答能力")
+
+    def test_shard_change_refreshes_templates(self):
+        """Test an edited shard is re-read after refresh"""
+        retriever = TemplateRetriever(self.root)
+        retriever.match("rag")
+        shard_path = os.path.join(self.root, "catalog", "advanced.json")
+        with open(shard_path, encoding='utf-8') as f:
+            shard = json.load(f)
+        for entry in shard["templates"]:
+            entry["description"] = "updated"
+        with open(shard_path, 'w', encoding='utf-8') as f:
+            json.dump(shard, f)
+
+        retriever.refresh([shard_path])
+        self.assertEqual(retriever.match("rag").description, "updated")
+
+    def test_rewrite_replaces_files(self):
+        """Test a rewrite swaps in whole files instead of truncating them"""
+        catalog_dir = os.path.join(self.root, "catalog")
+        with open(os.path.join(catalog_dir, "manifest.json"), encoding='utf-8') as old_manifest:
+            with open(os.path.join(self.root, "metadata_index.json"), encoding='utf-8') as f:
+                write_catalog(json.load(f)["templates"][:1], self.root)
+            # A reader that opened the manifest before still sees all of it
+            self.assertEqual(len(json.load(old_manifest)["templates"]), 12)
+        self.assertFalse([name for name in os.listdir(catalog_dir) if name.endswith(".tmp")])
+        self.assertEqual(len(TemplateRetriever(self.root).templates), 1)
+
+
+class TestAsyncIO(unittest.TestCase):
+    """Test async loading and template reads"""
+
+    def test_acreate_and_amatch(self):
+        """Test async construction and matching agree with the sync API"""
+        async def run():
+            retriever = await TemplateRetriever.acreate(fuzzy=False)
+            return retriever, await retriever.amatch("react agent")
+
+        retriever, info = asyncio.run(run())
+        self.assertEqual(len(retriever.templates), 12)
+        self.assertEqual(info.id, "react_agent")
+
+    def test_aget_template_code(self):
+        """Test async reads return the same code as get_template_code"""
+        retriever = TemplateRetriever()
+        sync = TemplateRetriever()
+
+        async def run():
+            return await asyncio.gather(*(retriever.aget_template_code("rag", level)
+                                          for level in ("minimal", "concise", "complete", "other")))
+
+        self.assertEqual(asyncio.run(run()), [sync.get_template_code("rag", level)
+                                              for level in ("minimal", "concise", "complete", "other")])
+        self.assertIsNone(asyncio.run(retriever.aget_template_code("missing")))
+
+    def test_concurrent_reads_coalesced(self):
+        """Test concurrent requests for one file share a single read"""
+        retriever = TemplateRetriever()
+        reads = []
+        read_source = retriever._read_source
+
+        def slow_read(snap, path):
+            reads.append((path, threading.current_thread().name))
+            time.sleep(0.05)
+            return read_source(snap, path)
+
+        retriever._read_source = slow_read
+
+        async def run():
+            return await asyncio.gather(*(retriever.aget_template_code("streaming", "complete")
+                                          for _ in range(20)))
+
+        results = asyncio.run(run())
+        self.assertEqual(len(reads), 1)
+        self.assertTrue(reads[0][1].startswith("template-io"))
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(retriever._inflight, {})
+
+        # Cached afterwards: no further reads
+        asyncio.run(retriever.aget_template_code("streaming", "complete"))
+        self.assertEqual(len(reads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Unit tests for sections.py"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.retriever import TemplateRetriever
+from dynamic.sections import build_section_index, read_sections, select_sections
+
+SOURCE = '''"""Demo template"""
+
+import logging
+import math
+from agentscope.agents import ReActAgent
+
+logger = logging.getLogger(__name__)
+
+
+def compute_area(radius: float) -> float:
+    """Area of a circle"""
+    logger.info("area")
+    return math.pi * radius ** 2
+
+
+class WeatherTool:
+    """Look up the weather"""
+
+    def run(self, city):
+        return f"{city}: sunny"
+
+
+# ============ 创建智能体 ============
+
+agent = ReActAgent(name="demo", tools=[WeatherTool().run])
+'''
+
+
+def simple_terms(text):
+    return set(text.lower().split())
+
+
+class TestSectionIndex(unittest.TestCase):
+    """Test cases for the section index"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "demo.py")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(SOURCE)
+        self.index = build_section_index(self.path, simple_terms)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_sections_and_imports(self):
+        """Test top-level functions, classes and banner blocks are split out"""
+        self.assertEqual(
+            [(s.name, s.kind) for s in self.index.sections],
+            [("", "block"), ("compute_area", "function"), ("WeatherTool", "class"),
+             ("创建智能体", "block")]
+        )
+        self.assertEqual(len(self.index.imports), 3)
+
+    def test_select_pulls_in_dependencies(self):
+        """Test a selected section brings the sections and imports it uses"""
+        selected = select_sections(self.index, {"area"})
+        self.assertEqual([s.name for s in selected], ["", "compute_area"])
+        code = read_sections(self.path, self.index, selected)
+        self.assertIn("import logging\nimport math\n", code)
+        self.assertNotIn("ReActAgent", code)
+        self.assertIn("logger = logging.getLogger(__name__)", code)
+        compile(code, "<section>", "exec")
+
+    def test_banner_block_includes_banner(self):
+        """Test a banner block starts at its banner comment"""
+        selected = select_sections(self.index, {"weather"})
+        self.assertEqual([s.name for s in selected], ["WeatherTool"])
+        block = self.index.sections[-1]
+        code = read_sections(self.path, self.index, [block])
+        self.assertIn("# ============ 创建智能体 ============\n\nagent =", code)
+
+    def test_no_match(self):
+        """Test unrelated queries select nothing"""
+        self.assertEqual(select_sections(self.index, {"database"}), [])
+
+    def test_invalid_source(self):
+        """Test files that do not parse have no index"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("def broken(:\n")
+        self.assertIsNone(build_section_index(self.path, simple_terms))
+
+    def test_is_current(self):
+        """Test the index notices edits to its file"""
+        self.assertTrue(self.index.is_current(self.path))
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("\nprint(agent)\n")
+        self.assertFalse(self.index.is_current(self.path))
+
+
+class TestTemplateSections(unittest.TestCase):
+    """Test get_template_section on the bundled templates"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.retriever = TemplateRetriever()
+
+    def test_returns_only_relevant_function(self):
+        """Test a query about one tool returns that tool, not the file"""
+        code = self.retriever.get_template_section("custom_tool", "complete", "format currency")
+        full = self.retriever.get_template_code("custom_tool", "complete")
+        self.assertIn("def format_currency", code)
+        self.assertNotIn("def safe_calculate", code)
+        self.assertLess(len(code), len(full) // 2)
+
+    def test_sections_indexed_at_load(self):
+        """Test template files are parsed when the retriever loads"""
+        path = os.path.abspath(self.retriever.templates["custom_tool"].complete_path)
+        self.assertIn(path, self.retriever._snapshot.sections)
+
+    def test_unknown_template_or_no_match(self):
+        """Test None for unknown templates and unmatched queries"""
+        self.assertIsNone(self.retriever.get_template_section("nope", "concise", "tool"))
+        self.assertIsNone(self.retriever.get_template_section("custom_tool", "concise", "xyzabc"))
+
+    def test_edited_file_is_reindexed(self):
+        """Test sections follow file edits even without a refresh"""
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        root = os.path.join(tmp, "templates")
+        shutil.copytree(os.path.join(parent_dir, "references", "templates"), root)
+        retriever = TemplateRetriever(root)
+        path = retriever.templates["custom_tool"].concise_path
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("\n\ndef convert_units(value):\n    return value\n")
+
+        code = retriever.get_template_section("custom_tool", "concise", "convert units")
+        self.assertIn("def convert_units", code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Unit tests for semantic.py"""
+
+import sys
+import os
+import json
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.semantic import has_numpy
+from dynamic.retriever import SEMANTIC_MATCH_THRESHOLD, TemplateRetriever
+
+CORPUS = os.path.join(parent_dir, "dynamic", "scripts", "corpus", "retriever_queries.jsonl")
+
+if has_numpy():
+    import numpy as np
+    from dynamic.semantic import HashingEmbedder, SemanticIndex
+
+
+@unittest.skipUnless(has_numpy(), "numpy not installed")
+class TestSemanticIndex(unittest.TestCase):
+    """Test cases for HashingEmbedder and SemanticIndex"""
+
+    def test_embedding_is_deterministic(self):
+        """Test the same text always embeds to the same vector"""
+        a = HashingEmbedder(dim=256).embed("react agent with tools")
+        b = HashingEmbedder(dim=256).embed("react agent with tools")
+        self.assertTrue(np.array_equal(a, b))
+        self.assertAlmostEqual(float(np.linalg.norm(a)), 1.0, places=5)
+
+    def test_matrix_layout(self):
+        """Test template vectors live in one contiguous float32 matrix"""
+        index = SemanticIndex(["a", "b"], ["weather tool", "memory store"], dim=256)
+        self.assertEqual(index.matrix.shape, (2, 256))
+        self.assertEqual(index.matrix.dtype, np.float32)
+        self.assertTrue(index.matrix.flags['C_CONTIGUOUS'])
+
+    def test_search_ranks_by_similarity(self):
+        """Test nearest document comes first"""
+        index = SemanticIndex(
+            ["weather", "memory", "pipeline"],
+            ["call a weather tool", "remember conversation history", "sequential pipeline stages"],
+            dim=1024
+        )
+        results = index.search("remembering the conversation", k=2)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0][0], "memory")
+        self.assertGreater(results[0][1], results[1][1])
+
+
+@unittest.skipUnless(has_numpy(), "numpy not installed")
+class TestRetrieverSemanticFallback(unittest.TestCase):
+    """Test semantic fallback in TemplateRetriever"""
+
+    def test_paraphrase_matches_without_keywords(self):
+        """Test a query with no keyword hit is served semantically"""
+        retriever = TemplateRetriever(semantic=True)
+        info = retriever.match("assistant that looks up weather for a city")
+        self.assertEqual(info.id, "react_agent")
+
+    def test_threshold_sends_weak_matches_to_llm(self):
+        """Test similarities below the threshold are not served"""
+        retriever = TemplateRetriever(semantic=True, semantic_threshold=0.99)
+        self.assertIsNone(retriever.match("assistant that looks up weather for a city"))
+
+    def test_default_threshold_on_labeled_paraphrases(self):
+        """Test the default threshold serves no off-topic query of the corpus"""
+        with open(CORPUS, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        rows = [row for row in rows if row["lang"] == "paraphrase"]
+        self.assertGreaterEqual(len(rows), 20)
+
+        def served(threshold):
+            retriever = TemplateRetriever(semantic=True, semantic_threshold=threshold)
+            return [(row, retriever.match(row["query"])) for row in rows]
+
+        results = served(SEMANTIC_MATCH_THRESHOLD)
+        self.assertEqual([row["query"] for row, info in results
+                          if info is not None and row["expected"] is None], [])
+        correct = sum(info is not None and info.id == row["expected"] for row, info in results)
+        wrong = sum(info is not None and info.id != row["expected"] for row, info in results)
+        self.assertGreater(correct, wrong)
+
+        # Known miss (see SEMANTIC_MATCH_THRESHOLD): a threshold low
+        # enough to serve it serves off-topic queries too
+        retriever = TemplateRetriever(semantic=True)
+        self.assertIsNone(retriever.match("agent that remembers past sessions"))
+        self.assertTrue(any(info is not None and row["expected"] is None
+                            for row, info in served(0.12)))
+
+    def test_disabled_by_default(self):
+        """Test keyword-only retrieval unless semantic is requested"""
+        self.assertIsNone(TemplateRetriever().semantic_index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Unit tests for singleflight.py"""
+
+import sys
+import os
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.singleflight import SingleFlight, fcntl
+
+
+def _wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for SingleFlight within a process"""
+
+    def _spawn(self, flight, n, fn, key="k"):
+        results = [None] * n
+
+        def call(i):
+            try:
+                results[i] = flight.do(key, fn)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_one_call_shared(self):
+        """Test concurrent callers of a key share one call"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            release.wait(2)
+            return "code"
+
+        threads, results = self._spawn(flight, 8, work)
+        _wait_until(lambda: flight.joined == 7)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["code"] * 8)
+        self.assertEqual(len(flight), 0)
+        self.assertEqual(flight.do("k", lambda: "again"), "again")
+
+    def test_error_propagated_not_cached(self):
+        """Test followers get the leader's exception and the next call retries"""
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(2)
+            raise ValueError("API error 500")
+
+        threads, results = self._spawn(flight, 4, fail)
+        _wait_until(lambda: flight.joined == 3)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(flight.do("k", lambda: "ok"), "ok")
+
+    def test_follower_timeout(self):
+        """Test a follower stops waiting after the timeout"""
+        flight = SingleFlight(timeout=0.05)
+        release = threading.Event()
+        threads, results = self._spawn(flight, 1, lambda: release.wait(2) and "late")
+        _wait_until(lambda: flight.led == 1)
+        with self.assertRaises(TimeoutError):
+            flight.do("k", lambda: "unused")
+        release.set()
+        threads[0].join()
+        self.assertEqual(results, ["late"])
+
+    def test_async_callers(self):
+        """Test coroutine callers coalesce and survive a cancelled leader"""
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return len(calls)
+
+        async def run():
+            shared = await asyncio.gather(*(flight.ado("k", work) for _ in range(5)))
+            leader = asyncio.ensure_future(flight.ado("c", work))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.ado("c", work))
+            await asyncio.sleep(0.005)
+            leader.cancel()
+            return shared, await follower
+
+        shared, taken_over = asyncio.run(run())
+        self.assertEqual(shared, [1] * 5)
+        self.assertEqual(taken_over, 3)
+        self.assertEqual(len(flight), 0)
+
+    def test_async_follower_of_thread(self):
+        """Test a coroutine waits for a flight led by a thread"""
+        flight = SingleFlight()
+        release = threading.Event()
+        threads, results = self._spawn(flight, 1, lambda: release.wait(2) and "threaded")
+        _wait_until(lambda: flight.led == 1)
+
+        async def unused():
+            return "unused"
+
+        async def run():
+            threading.Timer(0.02, release.set).start()
+            return await flight.ado("k", unused)
+
+        self.assertEqual(asyncio.run(run()), "threaded")
+        threads[0].join()
+
+
+@unittest.skipIf(fcntl is None, "fcntl not available")
+class TestLockFile(unittest.TestCase):
+    """Test cases for cross-process coalescing through lock files
+
+    Each SingleFlight opens its own descriptors, so two instances in one
+    process exclude each other like two processes would.
+    """
+
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.lock_dir)
+
+    def test_leaders_serialized(self):
+        """Test a second leader waits and then sees the first one's work"""
+        shared_cache = {}
+        started, release = threading.Event(), threading.Event()
+
+        def generate():
+            if "k" in shared_cache:
+                return "cached " + shared_cache["k"]
+            started.set()
+            release.wait(2)
+            shared_cache["k"] = "code"
+            return "code"
+
+        first = SingleFlight(self.lock_dir)
+        second = SingleFlight(self.lock_dir)
+        thread = threading.Thread(target=first.do, args=("k", generate))
+        thread.start()
+        started.wait(2)
+        threading.Timer(0.05, release.set).start()
+        self.assertEqual(second.do("k", generate), "cached code")
+        thread.join()
+
+        # Other keys do not wait
+        self.assertEqual(second.do("other", lambda: "free"), "free")
+
+    def test_lock_timeout(self):
+        """Test waiting for another process's lock honors the timeout"""
+        started, release = threading.Event(), threading.Event()
+        first = SingleFlight(self.lock_dir)
+        thread = threading.Thread(target=first.do,
+                                  args=("k", lambda: started.set() or release.wait(2)))
+        thread.start()
+        started.wait(2)
+        second = SingleFlight(self.lock_dir, timeout=0.05)
+        try:
+            with self.assertRaises(TimeoutError):
+                second.do("k", lambda: "unused")
+
+            async def unused():
+                return "unused"
+
+            with self.assertRaises(TimeoutError):
+                asyncio.run(second.ado("k", unused))
+        finally:
+            release.set()
+            thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Unit tests for warmup.py"""
+
+import sys
+import os
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.analytics import MissRecorder
+from dynamic.backends import LocalBackend
+from dynamic.cache import GenerationCache
+from dynamic.core import ComplexityLevel
+from dynamic.generator import CodeGenerator
+from dynamic.ratelimit import RateLimiter
+from dynamic.warmup import WarmupRunner, queries_from_miss_log, unique_queries
+
+QUERIES = ["react agent", "ledger reconciler", "glacier forecaster", "Ledger  reconciler"]
+
+
+class TestWarmup(unittest.TestCase):
+    """Test cases for WarmupRunner"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.cache = GenerationCache(os.path.join(self.tmp, "gen.sqlite3"))
+
+    def _generator(self, backend):
+        return CodeGenerator(backend=backend, cache=self.cache)
+
+    def test_fills_cache_and_resumes(self):
+        """Test every level is warmed once and a rerun makes no LLM calls"""
+        backend = LocalBackend(latency=0.01)
+        generator = self._generator(backend)
+        report = asyncio.run(WarmupRunner(generator).run(QUERIES))
+        self.assertEqual((report.total, report.template, report.warmed), (9, 3, 6))
+        self.assertEqual(report.coverage, 1.0)
+        self.assertGreaterEqual(report.mean_cold_latency, 0.01)
+        self.assertEqual(backend.calls, 6)
+        for level in ComplexityLevel:
+            self.assertEqual(generator.generate("glacier forecaster", level).source, "llm")
+        self.assertEqual(backend.calls, 6)
+
+        report = asyncio.run(WarmupRunner(generator).run(QUERIES))
+        self.assertEqual((report.cached, report.warmed, report.cold_seconds), (6, 0, 0.0))
+        self.assertEqual(backend.calls, 6)
+
+    def test_retries_and_failures(self):
+        """Test transient failures are retried and counted against coverage"""
+        generator = self._generator(LocalBackend(fail_every=2))
+        runner = WarmupRunner(generator, levels=[ComplexityLevel.MINIMAL], backoff_base=0.001)
+        report = asyncio.run(runner.run(["ledger reconciler", "glacier forecaster"]))
+        self.assertEqual((report.warmed, report.failed), (2, 0))
+        self.assertGreaterEqual(report.retries, 1)
+
+        generator = self._generator(LocalBackend(fail_every=1))
+        runner = WarmupRunner(generator, levels=[ComplexityLevel.COMPLETE], max_retries=1,
+                              backoff_base=0.001)
+        report = asyncio.run(runner.run(["comet planner"]))
+        self.assertEqual((report.failed, report.coverage), (1, 0.0))
+        self.assertEqual(report.to_dict()["coverage_by_level"], {"complete": 0.0})
+
+    def test_invalid_not_covered(self):
+        """Test code failing validation is not cached, so it counts against coverage"""
+        backend = LocalBackend(responses={"comet": '{"title": "Broken", "code": "def broken(:"}'})
+        generator = self._generator(backend)
+        runner = WarmupRunner(generator, levels=[ComplexityLevel.MINIMAL])
+        report = asyncio.run(runner.run(["comet planner"]))
+        self.assertEqual((report.invalid, report.warmed, report.coverage), (1, 0, 0.0))
+        self.assertIsNone(generator.cached("comet planner", ComplexityLevel.MINIMAL))
+
+    def test_throttled(self):
+        """Test the runner's concurrency and rate limit bound LLM calls"""
+        generator = self._generator(LocalBackend())
+        limiter = RateLimiter(requests_per_minute=1200)
+        limiter.requests.tokens = 1
+        runner = WarmupRunner(generator, levels=[ComplexityLevel.MINIMAL], rate_limiter=limiter)
+        start = time.monotonic()
+        asyncio.run(runner.run(["comet planner", "walnut archivist", "tundra inspector"]))
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_needs_cache_and_llm(self):
+        """Test warm-up refuses generators it cannot warm"""
+        with self.assertRaises(ValueError):
+            WarmupRunner(CodeGenerator(backend=LocalBackend()))
+        with self.assertRaises(ValueError):
+            WarmupRunner(CodeGenerator(api_key="", cache=self.cache))
+
+    def test_query_sources(self):
+        """Test query deduplication and miss-log input"""
+        self.assertEqual(unique_queries(QUERIES), QUERIES[:3])
+        path = os.path.join(self.tmp, "misses.jsonl")
+        recorder = MissRecorder(path)
+        for query in ["ledger reconciler"] * 3 + ["glacier forecaster"]:
+            recorder.record(query)
+        recorder.close()
+        self.assertEqual(queries_from_miss_log(path, top=1), ["ledger reconciler"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Unit tests for live template reloading (retriever.refresh and watcher.py)"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import time
+import unittest
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, parent_dir)
+
+from dynamic.retriever import TemplateRetriever
+from dynamic.watcher import TemplateWatcher
+
+TEMPLATES_DIR = os.path.join(parent_dir, "references", "templates")
+
+
+class TestTemplateReload(unittest.TestCase):
+    """Test incremental index updates and change detection"""
+
+    def setUp(self):
+        """Copy the bundled templates into a scratch directory"""
+        self.tmp = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp, "templates")
+        shutil.copytree(TEMPLATES_DIR, self.root)
+        self.index_path = os.path.join(self.root, "metadata_index.json")
+        self.retriever = TemplateRetriever(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _edit_metadata(self, edit):
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        edit(data["templates"])
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def test_refresh_add_template(self):
+        """Test a new metadata entry becomes matchable"""
+        self._edit_metadata(lambda tpls: tpls.append({
+            "id": "voice_agent", "title": "Voice", "category": "agents",
+            "keywords": ["voice", "tts"], "priority": 5,
+        }))
+        self.assertIsNone(self.retriever.match("voice"))
+        self.assertTrue(self.retriever.refresh([self.index_path]))
+        self.assertEqual(self.retriever.match("voice tts").id, "voice_agent")
+        self.assertEqual(len(self.retriever.templates), 13)
+
+    def test_refresh_remove_and_update(self):
+        """Test removed templates and changed keywords leave the index"""
+        def edit(tpls):
+            tpls[:] = [t for t in tpls if t["id"] != "rag"]
+            for t in tpls:
+                if t["id"] == "streaming":
+                    t["keywords"] = ["livecast"]
+        self._edit_metadata(edit)
+        self.retriever.refresh([self.index_path])
+
+        self.assertNotIn("rag", self.retriever.templates)
+        self.assertNotIn("rag", self.retriever.keyword_index)
+        self.assertIsNone(self.retriever.match("streaming"))
+        self.assertEqual(self.retriever.match("livecast").id, "streaming")
+        # Bitsets are rebuilt for the shifted ordinals
+        results = self.retriever.match_topk("tool", k=5, filters={"category": "tools"})
+        self.assertEqual([m.template.id for m in results], ["custom_tool"])
+
+    def test_refresh_keeps_old_snapshot_for_readers(self):
+        """Test a reader holding the old snapshot is unaffected by a swap"""
+        old = self.retriever._snapshot
+        self._edit_metadata(lambda tpls: tpls.pop())
+        self.retriever.refresh([self.index_path])
+        self.assertIsNot(self.retriever._snapshot, old)
+        self.assertEqual(len(old.ordinals), 12)
+        self.assertEqual(len(self.retriever.templates), 11)
+
+    def test_refresh_unchanged_metadata(self):
+        """Test no swap when nothing relevant changed"""
+        self.assertFalse(self.retriever.refresh([self.index_path]))
+
+    def test_content_cache_invalidation(self):
+        """Test edited template files are re-read"""
+        path = self.retriever.templates["rag"].minimal_path
+        self.assertIn("agentscope", self.retriever.get_template_code("rag", "minimal"))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("# edited\n")
+        # Still served from cache until the change is applied
+        self.assertNotEqual(self.retriever.get_template_code("rag", "minimal"), "# edited\n")
+        self.retriever.refresh([path])
+        self.assertEqual(self.retriever.get_template_code("rag", "minimal"), "# edited\n")
+
+    def test_poll_once_detects_changes(self):
+        """Test the polling scan reports modified files"""
+        watcher = TemplateWatcher(self.retriever, use_inotify=False)
+        self.assertEqual(watcher.mode, "polling")
+        self.assertEqual(watcher.poll_once(), [])
+
+        self._edit_metadata(lambda tpls: tpls.pop())
+        changed = watcher.poll_once()
+        self.assertEqual(changed, [os.path.abspath(self.index_path)])
+        self.assertEqual(len(self.retriever.templates), 11)
+
+    def test_background_watcher(self):
+        """Test the watcher thread applies changes on its own"""
+        with TemplateWatcher(self.retriever, interval=0.05) as watcher:
+            self._edit_metadata(lambda tpls: tpls.pop())
+            deadline = time.time() + 5
+            while len(self.retriever.templates) != 11 and time.time() < deadline:
+                time.sleep(0.02)
+        self.assertIn(watcher.mode, ("inotify", "polling"))
+        self.assertEqual(len(self.retriever.templates), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
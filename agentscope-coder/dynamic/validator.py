@@ -21,6 +21,9 @@ logger = logging.getLogger(__name__)
 class CodeValidator:
     """Validates generated AgentScope code with multiple checks"""
 
+    # Bump when checks change; cached LLM results are keyed on it
+    VERSION = "1"
+
     # Unsafe operation patterns
     UNSAFE_PATTERNS = [
         (r'os\.system\s*\(', 'os.system'),
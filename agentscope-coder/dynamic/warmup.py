@@ -0,0 +1,221 @@
+"""warmup.py - Fill the generation cache before users ask
+
+After a deploy the first user of every common non-template query waits
+for a full LLM generation. A WarmupRunner replays a query list (e.g. the
+top clusters of a miss log) at every complexity level, so those requests
+are cache hits instead.
+
+Pairs a template serves or the cache already holds are skipped in
+microseconds, so an interrupted run resumes where it stopped. LLM calls
+are throttled by the runner's own concurrency limit and optional rate
+limiter, on top of the generator's, so warming shares the API quota with
+live traffic instead of taking it over.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from .analytics import MissRecorder
+from .batch import backoff_delay, is_transient
+from .core import ComplexityLevel, ValidationStatus
+from .generator import CodeGenerator
+from .normalize import normalize_query
+from .ratelimit import RateLimiter
+
+# Concurrent LLM calls of a warm-up run
+DEFAULT_WARMUP_CONCURRENCY = 2
+
+
+@dataclass
+class WarmupReport:
+    """Outcome of one warm-up run, counted in (query, level) pairs
+
+    Attributes:
+        template: Served by a template, no LLM call needed
+        cached: Already cached (e.g. by an interrupted run)
+        warmed: Generated and cached by this run
+        invalid: Generated pairs whose code failed validation; these are
+            not cached, so they count against coverage
+        cold_seconds: LLM time of the warmed pairs, which their first
+            users no longer wait for
+    """
+    total: int = 0
+    template: int = 0
+    cached: int = 0
+    warmed: int = 0
+    invalid: int = 0
+    failed: int = 0
+    retries: int = 0
+    cold_seconds: float = 0.0
+    elapsed: float = 0.0
+    # level -> [covered pairs, pairs]
+    levels: Dict[str, List[int]] = field(default_factory=dict)
+
+    @property
+    def coverage(self) -> float:
+        """Share of pairs answered without a cold LLM call"""
+        return (self.template + self.cached + self.warmed) / self.total if self.total else 1.0
+
+    @property
+    def mean_cold_latency(self) -> float:
+        """Mean LLM time per warmed pair"""
+        return self.cold_seconds / self.warmed if self.warmed else 0.0
+
+    def to_dict(self) -> dict:
+        """JSON-ready summary"""
+        return {
+            "pairs": self.total,
+            "coverage": round(self.coverage, 4),
+            "coverage_by_level": {level: round(covered / total, 4) if total else 1.0
+                                  for level, (covered, total) in self.levels.items()},
+            "template": self.template,
+            "cached": self.cached,
+            "warmed": self.warmed,
+            "invalid": self.invalid,
+            "failed": self.failed,
+            "retries": self.retries,
+            "cold_seconds_saved": round(self.cold_seconds, 2),
+            "mean_cold_latency_s": round(self.mean_cold_latency, 3),
+            "elapsed_s": round(self.elapsed, 2),
+        }
+
+
+def unique_queries(queries: Iterable[str]) -> List[str]:
+    """Queries in order, without repeats that share a cache key"""
+    seen = set()
+    result = []
+    for query in queries:
+        key = normalize_query(query)
+        if key and key not in seen:
+            seen.add(key)
+            result.append(query)
+    return result
+
+
+def queries_from_miss_log(path: str, top: int = 100) -> List[str]:
+    """Most common example query of each of the largest miss clusters"""
+    clusters = MissRecorder(path, max_clusters=max(top, 1)).top(top)
+    return [cluster["examples"][0] for cluster in clusters if cluster["examples"]]
+
+
+class WarmupRunner:
+    """Replays queries at every complexity level into the generation cache"""
+
+    def __init__(
+        self,
+        generator: CodeGenerator,
+        levels: Sequence[ComplexityLevel] = tuple(ComplexityLevel),
+        concurrency: int = DEFAULT_WARMUP_CONCURRENCY,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0
+    ):
+        """Initialize runner
+
+        Args:
+            generator: Generator with the cache to fill
+            levels: Complexity levels to warm
+            concurrency: Concurrent LLM calls of this runner
+            rate_limiter: Request and token quota of this runner (optional)
+            max_retries: Retries of a transient failure
+            backoff_base: First backoff ceiling in seconds
+            backoff_cap: Largest backoff ceiling in seconds
+
+        Raises:
+            ValueError: If the generator has no cache or no LLM backend
+        """
+        if generator.cache is None:
+            raise ValueError("Cache warm-up needs a generator with a generation cache")
+        if not generator.has_llm():
+            raise ValueError("Cache warm-up needs an LLM backend (DASHSCOPE_API_KEY)")
+        self.generator = generator
+        self.levels = list(levels)
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+    async def run(
+        self,
+        queries: Iterable[str],
+        progress: Optional[Callable[[dict], None]] = None
+    ) -> WarmupReport:
+        """Warm every (query, level) pair
+
+        Pooled LLM connections of the running loop are closed when done.
+
+        Args:
+            queries: Queries, most important first
+            progress: Called with a record per finished pair
+
+        Returns:
+            Counts of this run
+        """
+        start = time.perf_counter()
+        pairs = [(q, level) for q in unique_queries(queries) for level in self.levels]
+        report = WarmupReport(total=len(pairs))
+        for level in self.levels:
+            report.levels[level.value] = [0, 0]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        tasks = [asyncio.ensure_future(self._warm(q, level, semaphore, report))
+                 for q, level in pairs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                record = await next_done
+                counts = report.levels[record["complexity"]]
+                counts[1] += 1
+                counts[0] += record["status"] not in ("failed", "invalid")
+                if progress is not None:
+                    progress(record)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.generator.aclose()
+
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    async def _warm(
+        self,
+        query: str,
+        level: ComplexityLevel,
+        semaphore: asyncio.Semaphore,
+        report: WarmupReport
+    ) -> dict:
+        """Warm one pair, with retries"""
+        record = {"query": query, "complexity": level.value}
+        if await self.generator.retriever.amatch(query):
+            report.template += 1
+            return dict(record, status="template")
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, self.generator.cached, query, level) is not None:
+            report.cached += 1
+            return dict(record, status="cached")
+
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(self.generator.estimate_tokens(query, level))
+                started = time.perf_counter()
+                result = await self.generator.agenerate_llm(query, level)
+                seconds = time.perf_counter() - started
+            if not is_transient(result) or attempt == self.max_retries:
+                break
+            report.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_cap))
+
+        if not result.code:
+            report.failed += 1
+            return dict(record, status="failed",
+                        error=result.validation.error or result.validation.message)
+        if result.validation is not None and result.validation.status == ValidationStatus.FAILED:
+            report.invalid += 1
+            return dict(record, status="invalid", seconds=round(seconds, 3))
+        report.warmed += 1
+        report.cold_seconds += seconds
+        return dict(record, status="warmed", seconds=round(seconds, 3))
@@ -0,0 +1,188 @@
+"""watcher.py - Live reload of the template directory
+
+Detects changes to metadata_index.json and template files and hands them
+to TemplateRetriever.refresh(). Uses Linux inotify (via ctypes, no extra
+dependency) to wake up on changes and falls back to mtime polling
+elsewhere. Either way the actual diff comes from a stat scan, so missed
+or coalesced events are harmless.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Files that can affect the index or the content cache
+WATCHED_SUFFIXES = (".json", ".py", ".tpa")
+
+# inotify event masks (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM
+                  | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE)
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+
+# Pause after the first event so an editor's burst of writes is one reload
+DEBOUNCE_SECONDS = 0.05
+
+
+class _Inotify:
+    """Minimal inotify wrapper used only as a change wake-up signal"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watched = set()
+
+    def watch_tree(self, root: str) -> int:
+        """Watch root and every subdirectory not watched yet
+
+        Returns:
+            int: Number of newly watched directories
+        """
+        added = 0
+        for dirpath, _, _ in os.walk(root):
+            if dirpath in self._watched:
+                continue
+            if self._add_watch(self.fd, os.fsencode(dirpath), _IN_WATCH_MASK) >= 0:
+                self._watched.add(dirpath)
+                added += 1
+        return added
+
+    def wait(self, timeout: float) -> bool:
+        """Block until events arrive or timeout; drain and report them"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        while True:
+            try:
+                if not os.read(self.fd, 64 * 1024):
+                    break
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class TemplateWatcher:
+    """Background thread applying template directory changes to a retriever"""
+
+    def __init__(self, retriever, interval: float = 1.0, use_inotify: bool = True):
+        """Initialize watcher
+
+        Args:
+            retriever: TemplateRetriever to refresh
+            interval: Seconds between scans (inotify wait timeout)
+            use_inotify: Prefer inotify when the platform supports it
+        """
+        self.retriever = retriever
+        self.root = retriever.templates_dir
+        self.interval = interval
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError, TypeError) as e:
+                logger.info(f"inotify unavailable, polling instead: {e}")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._state = self._scan()
+
+    @property
+    def mode(self) -> str:
+        """'inotify' or 'polling'"""
+        return "inotify" if self._inotify else "polling"
+
+    def start(self):
+        """Start the watcher thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if self._inotify is not None:
+            # Watch before returning so no change after start() is missed
+            self._inotify.watch_tree(self.root)
+        self._thread = threading.Thread(
+            target=self._run, name="template-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the watcher thread and release inotify"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def poll_once(self) -> List[str]:
+        """Scan once, refresh the retriever if anything changed
+
+        Returns:
+            List[str]: Paths that were added, modified or deleted
+        """
+        state = self._scan()
+        changed = [path for path in state.keys() | self._state.keys()
+                   if state.get(path) != self._state.get(path)]
+        self._state = state
+        if changed:
+            logger.info(f"Template changes detected: {len(changed)} file(s)")
+            self.retriever.refresh(changed)
+        return changed
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                if not self._inotify.wait(self.interval):
+                    continue
+                self._stop.wait(DEBOUNCE_SECONDS)
+            else:
+                self._stop.wait(self.interval)
+            try:
+                self.poll_once()
+                # Files written into a new directory before it was watched
+                # raised no event; rescan once after watching it
+                if self._inotify is not None and self._inotify.watch_tree(self.root):
+                    self.poll_once()
+            except Exception as e:
+                logger.error(f"Template refresh failed: {e}")
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Map watched files to (mtime_ns, size)"""
+        state = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(WATCHED_SUFFIXES):
+                    continue
+                path = os.path.abspath(os.path.join(dirpath, name))
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                state[path] = (st.st_mtime_ns, st.st_size)
+        return state